@@ -5,8 +5,12 @@ from datetime import datetime
 from bson import ObjectId
 
 from ..core.database import get_database
+from ..core.cache import cache_stats
+from ..core.compression import compression_stats
+from ..core.pubsub import get_broker
 from ..api.auth import get_current_user
 from ..models.user import UserResponse
+from ..services.forum_service import ForumService
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -271,3 +275,64 @@ async def get_service_participation_analytics(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error generating analytics: {str(e)}"
         )
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    current_user: UserResponse = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get hit/miss metrics for in-process caches (admin or moderator only)"""
+    if current_user.role != "admin" and current_user.role != "moderator":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin or moderator access required"
+        )
+    return {
+        "caches": cache_stats(),
+        "generated_at": datetime.utcnow().isoformat()
+    }
+
+@router.get("/compression/stats")
+async def get_compression_stats(
+    current_user: UserResponse = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get response compression counters and bytes saved (admin or moderator only)"""
+    if current_user.role != "admin" and current_user.role != "moderator":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin or moderator access required"
+        )
+    return {
+        "compression": compression_stats(),
+        "generated_at": datetime.utcnow().isoformat()
+    }
+
+@router.get("/pubsub/stats")
+async def get_pubsub_stats(
+    current_user: UserResponse = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get realtime pub/sub channel and delivery counters for this worker (admin or moderator only)"""
+    if current_user.role != "admin" and current_user.role != "moderator":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin or moderator access required"
+        )
+    return {
+        "pubsub": get_broker().stats(),
+        "generated_at": datetime.utcnow().isoformat()
+    }
+
+@router.post("/forum/reconcile-comment-counts")
+async def reconcile_forum_comment_counts(
+    current_user: UserResponse = Depends(get_current_user),
+    db=Depends(get_database)
+) -> Dict[str, Any]:
+    """Recount forum comments and repair stored comment_count fields (admin or moderator only)"""
+    if current_user.role != "admin" and current_user.role != "moderator":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin or moderator access required"
+        )
+    return {
+        "fixed": await ForumService(db).reconcile_comment_counts(),
+        "generated_at": datetime.utcnow().isoformat()
+    }
@@ -19,17 +19,26 @@ from ..services.auth_service import AuthService
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db=Depends(get_database)
 ) -> UserResponse:
     """Get current authenticated user"""
-    token = credentials.credentials
+    return await get_user_from_token(credentials.credentials, db)
+
+
+async def get_user_from_token(token: str, db, scope: Optional[str] = None) -> UserResponse:
+    """Resolve a bearer token to its user (also used where no Request exists, e.g. WebSockets).
+
+    Tokens minted for one purpose (``scope``, e.g. calendar subscription URLs)
+    are only accepted where that scope is asked for.
+    """
     payload = verify_token(token)
     user_id = payload.get("sub")
     
-    if not user_id:
+    if not user_id or payload.get("scope") != scope:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token"
@@ -46,6 +55,16 @@ async def get_current_user(
     
     return user
 
+
+async def get_optional_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db=Depends(get_database)
+) -> Optional[UserResponse]:
+    """Current user when a bearer token is sent, None for anonymous requests (invalid tokens still 401)"""
+    if credentials is None:
+        return None
+    return await get_current_user(credentials, db)
+
 @router.post("/register")
 async def register(user_data: UserCreate, db=Depends(get_database)):
     """Register a new user and return access token (auto sign-in)"""
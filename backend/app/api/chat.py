@@ -1,17 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List
+import asyncio
+import json
+from datetime import timedelta
+from fastapi import APIRouter, Depends, HTTPException, status, Query, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from typing import List, Optional
 
 from ..models.chat import (
-    ChatRoomCreate, ChatRoomUpdate, ChatRoomResponse, ChatRoomListResponse,
-    MessageCreate, MessageUpdate, MessageResponse, MessageListResponse
+    ChatRoomCreate, ChatRoomUpdate, ChatRoomResponse, ChatRoomListResponse, MarkReadRequest, MarkReadResponse,
+    MessageCreate, MessageUpdate, MessageResponse, MessageListResponse, MessageCursorResponse,
+    MessageSearchHit, MessageSearchResponse
 )
 from ..models.user import UserResponse
-from ..services.chat_service import ChatService
-from ..api.auth import get_current_user
+from ..services.chat_service import ChatService, MessageArchivedError
+from ..services.message_buffer import ACK_ACCEPTED, ACK_PERSISTED
+from ..api.auth import get_current_user, get_user_from_token
+from ..core.config import settings
 from ..core.database import get_database
+from ..core.security import create_access_token
+from ..core.pubsub import Subscription, get_broker, room_channel, user_channel
+from ..core.serialization import trusted_response
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+WS_SCOPE = "chat_ws"
+
 # Chat Rooms
 @router.post("/rooms", response_model=ChatRoomResponse)
 async def create_chat_room(
@@ -98,6 +110,26 @@ async def update_chat_room(
             detail=str(e)
         )
 
+@router.post("/rooms/{room_id}/read", response_model=MarkReadResponse)
+async def mark_chat_room_read(
+    room_id: str,
+    read_data: Optional[MarkReadRequest] = None,
+    current_user: UserResponse = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    """Mark a chat room as read (up to a message, or up to the latest one)"""
+    chat_service = ChatService(db)
+    try:
+        unread = await chat_service.mark_room_read(
+            room_id, str(current_user.id), read_data.message_id if read_data else None
+        )
+        return MarkReadResponse(room_id=room_id, unread_count=unread)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
 @router.post("/rooms/transaction/{transaction_id}", response_model=ChatRoomResponse)
 async def create_transaction_chat_room(
     transaction_id: str,
@@ -119,13 +151,14 @@ async def create_transaction_chat_room(
 @router.post("/messages", response_model=MessageResponse)
 async def send_message(
     message_data: MessageCreate,
+    ack: str = Query("persisted", pattern="^(persisted|accepted)$", description="With write-behind: wait for the write or only for queueing"),
     current_user: UserResponse = Depends(get_current_user),
     db=Depends(get_database)
 ):
     """Send a message to a chat room"""
     chat_service = ChatService(db)
     try:
-        message = await chat_service.send_message(message_data, str(current_user.id))
+        message = await chat_service.send_message(message_data, str(current_user.id), ack)
         return message
     except ValueError as e:
         raise HTTPException(
@@ -145,12 +178,65 @@ async def get_room_messages(
     chat_service = ChatService(db)
     try:
         messages, total = await chat_service.get_room_messages(room_id, str(current_user.id), page, limit)
-        return MessageListResponse(
+        return trusted_response(MessageListResponse.model_construct(
             messages=messages,
             total=total,
             page=page,
             limit=limit
+        ))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
+
+@router.get("/rooms/{room_id}/messages/cursor", response_model=MessageCursorResponse)
+async def get_room_messages_by_cursor(
+    room_id: str,
+    before: Optional[str] = Query(None, description="Return messages older than this message id"),
+    after: Optional[str] = Query(None, description="Return messages newer than this message id"),
+    limit: int = Query(50, ge=1, le=100),
+    wait: float = Query(0, ge=0, description="With after: seconds to wait for a new message"),
+    current_user: UserResponse = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    """Get messages of a chat room by message-id cursor (stable paging, no count)"""
+    chat_service = ChatService(db)
+    try:
+        messages, has_more = await chat_service.get_messages_by_cursor(
+            room_id, str(current_user.id), before=before, after=after, limit=limit,
+            wait=min(wait, settings.chat_long_poll_max_seconds)
+        )
+        return trusted_response(MessageCursorResponse.model_construct(
+            messages=messages,
+            has_more=has_more,
+            limit=limit
+        ))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.get("/rooms/{room_id}/search", response_model=MessageSearchResponse)
+async def search_room_messages(
+    room_id: str,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    current_user: UserResponse = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    """Search messages within a chat room"""
+    chat_service = ChatService(db)
+    try:
+        hits, next_cursor = await chat_service.search_room_messages(
+            room_id, str(current_user.id), q, limit=limit, cursor=cursor
+        )
+        return trusted_response(MessageSearchResponse.model_construct(
+            hits=[MessageSearchHit.model_construct(message=message, score=score) for message, score in hits],
+            next_cursor=next_cursor
+        ))
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -196,6 +282,11 @@ async def update_message(
                 detail="Failed to update message"
             )
         return updated_message
+    except MessageArchivedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -223,3 +314,109 @@ async def delete_message(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+
+
+# Realtime
+@router.post("/ws/token")
+async def create_websocket_token(current_user: UserResponse = Depends(get_current_user)):
+    """Short-lived token for the ``?token=`` of /chat/ws; it is accepted there only"""
+    token = create_access_token(
+        data={"sub": str(current_user.id), "scope": WS_SCOPE},
+        expires_delta=timedelta(seconds=settings.chat_ws_token_expire_seconds),
+    )
+    return {"token": token, "path": f"/chat/ws?token={token}"}
+
+
+@router.websocket("/ws")
+async def chat_websocket(
+    websocket: WebSocket,
+    token: Optional[str] = None,
+    db=Depends(get_database)
+):
+    """Push chat events of every room the user is in.
+
+    Browsers cannot set headers on a WebSocket, so authenticate with ``?token=`` from
+    POST /chat/ws/token (query strings end up in access logs; login tokens are refused
+    there) or with an ``Authorization: Bearer`` header.
+    Server frames: ``ready``, ``message.created|updated|deleted``, ``room.created``,
+    ``resync`` (events were dropped; call GET /sync and reconnect), ``sent``, ``pong``
+    and ``error``. Client frames: ``{"type": "ping"}`` and
+    ``{"type": "send", "room_id", "content", "client_id"?, "reply_to_message_id"?, "ack"?}``.
+    """
+    scope = WS_SCOPE
+    if token is None:
+        scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+        token = credentials if scheme.lower() == "bearer" else None
+        scope = None
+    try:
+        current_user = await get_user_from_token(token or "", db, scope=scope)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    chat_service = ChatService(db)
+    user_id = str(current_user.id)
+    subscription = get_broker().subscription()
+    try:
+        room_ids = await chat_service.get_active_room_ids(user_id)
+        await subscription.subscribe(user_channel(user_id), *(room_channel(room_id) for room_id in room_ids))
+        await websocket.send_json({"type": "ready", "room_ids": room_ids})
+
+        tasks = {
+            asyncio.create_task(_push_events(websocket, subscription, chat_service, user_id)),
+            asyncio.create_task(_receive_frames(websocket, chat_service, user_id)),
+        }
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            task.result()  # re-raise failures; a client disconnect ends up below
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await subscription.close()
+
+
+async def _push_events(websocket: WebSocket, subscription: Subscription, chat_service: ChatService, user_id: str):
+    while True:
+        item = await subscription.get()
+        if item is None:
+            if subscription.overflowed:
+                await websocket.send_json({"type": "resync"})
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            return
+        channel, payload = item
+        if channel == user_channel(user_id):
+            event = json.loads(payload)
+            if event.get("type") == "room.created" and await chat_service.is_room_participant(event["room_id"], user_id):
+                await subscription.subscribe(room_channel(event["room_id"]))
+        await websocket.send_text(payload.decode())
+
+
+async def _receive_frames(websocket: WebSocket, chat_service: ChatService, user_id: str):
+    while True:
+        try:
+            frame = await websocket.receive_json()
+        except (ValueError, TypeError):
+            await websocket.send_json({"type": "error", "detail": "Invalid JSON frame"})
+            continue
+        kind = frame.get("type") if isinstance(frame, dict) else None
+        if kind == "ping":
+            await websocket.send_json({"type": "pong"})
+        elif kind == "send":
+            client_id = frame.get("client_id")
+            try:
+                message_data = MessageCreate(
+                    room_id=frame.get("room_id"),
+                    content=frame.get("content"),
+                    reply_to_message_id=frame.get("reply_to_message_id"),
+                )
+                ack = ACK_ACCEPTED if frame.get("ack") == ACK_ACCEPTED else ACK_PERSISTED
+                message = await chat_service.send_message(message_data, user_id, ack)
+            except (ValidationError, ValueError) as e:
+                await websocket.send_json({"type": "error", "client_id": client_id, "detail": str(e)})
+                continue
+            await websocket.send_json({"type": "sent", "client_id": client_id, "message_id": message.id})
+        else:
+            await websocket.send_json({"type": "error", "detail": f"Unknown frame type: {kind}"})
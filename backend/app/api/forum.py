@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from typing import Optional
 
 from ..models.forum import (
@@ -10,8 +10,10 @@ from ..models.forum import (
     ForumCommentResponse, ForumCommentListResponse,
 )
 from ..models.user import UserResponse
+from ..services.calendar_service import CalendarService
 from ..services.forum_service import ForumService
-from ..api.auth import get_current_user
+from ..api.auth import get_current_user, get_optional_current_user
+from ..core import ical
 from ..core.database import get_database
 
 router = APIRouter(prefix="/forum", tags=["forum"])
@@ -98,13 +100,43 @@ async def list_events(
     tag: Optional[str] = None,
     q: Optional[str] = None,
     has_location: Optional[bool] = None,
+    near_lat: Optional[float] = Query(None, ge=-90, le=90),
+    near_lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: float = Query(10, gt=0, le=500),
+    bbox: Optional[str] = Query(None, description="min_lng,min_lat,max_lng,max_lat"),
+    upcoming: bool = Query(False, description="Only events that have not started, soonest first"),
     db=Depends(get_database),
 ):
     svc = _forum(db)
-    events, total = await svc.get_events(page, limit, tag, q, has_location=bool(has_location))
+    near = None
+    if near_lat is not None or near_lng is not None:
+        if near_lat is None or near_lng is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="near_lat and near_lng go together")
+        near = (near_lat, near_lng)
+    box = None
+    if bbox:
+        try:
+            min_lng, min_lat, max_lng, max_lat = (float(v) for v in bbox.split(","))
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="bbox must be min_lng,min_lat,max_lng,max_lat")
+        box = (min_lat, max_lat, min_lng, max_lng)
+    try:
+        events, total = await svc.get_events(
+            page, limit, tag, q, has_location=bool(has_location),
+            near=near, radius_km=radius_km, bbox=box, upcoming=upcoming,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     return ForumEventListResponse(events=events, total=total, page=page, limit=limit)
 
 
+@router.get("/events.ics")
+async def events_calendar(request: Request, db=Depends(get_database)):
+    """Upcoming forum events as an iCalendar feed; 304 when If-None-Match still matches"""
+    calendars = CalendarService(db)
+    return ical.feed_response(request, await calendars.forum_feed_etag(), calendars.stream_forum_feed(), "events.ics")
+
+
 @router.post("/events", response_model=ForumEventResponse, status_code=status.HTTP_201_CREATED)
 async def create_event(
     data: ForumEventCreate,
@@ -119,9 +151,13 @@ async def create_event(
 
 
 @router.get("/events/{event_id}", response_model=ForumEventResponse)
-async def get_event(event_id: str, db=Depends(get_database)):
+async def get_event(
+    event_id: str,
+    current_user: Optional[UserResponse] = Depends(get_optional_current_user),
+    db=Depends(get_database),
+):
     svc = _forum(db)
-    event = await svc.get_event_by_id(event_id)
+    event = await svc.get_event_by_id(event_id, str(current_user.id) if current_user else None)
     if not event:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
     return event
@@ -189,11 +225,13 @@ async def unattend_event(
 @router.get("/events/{event_id}/attendees")
 async def get_event_attendees(
     event_id: str,
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1, le=200),
     db=Depends(get_database),
 ):
     svc = _forum(db)
     try:
-        return await svc.get_event_attendees(event_id)
+        return await svc.get_event_attendees(event_id, page, limit)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
@@ -0,0 +1,69 @@
+from datetime import timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials
+
+from ..models.bootstrap import BootstrapResponse
+from ..models.user import UserResponse
+from ..services.bootstrap_service import BootstrapService
+from ..services.calendar_service import CalendarService
+from ..api.auth import get_current_user, get_user_from_token, optional_security
+from ..core import ical
+from ..core.config import settings
+from ..core.database import get_database
+from ..core.security import create_access_token
+
+router = APIRouter(prefix="/me", tags=["me"])
+
+CALENDAR_SCOPE = "calendar"
+
+@router.get("/bootstrap", response_model=BootstrapResponse)
+async def get_bootstrap(
+    current_user: UserResponse = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    """Profile, TimeBank, badges, saved service IDs, chat rooms and join requests in one call"""
+    bootstrap_service = BootstrapService(db)
+    try:
+        return await bootstrap_service.get_bootstrap(current_user)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post("/calendar/token")
+async def create_calendar_token(current_user: UserResponse = Depends(get_current_user)):
+    """Token for a calendar subscription URL; it is accepted by GET /me/calendar.ics only"""
+    token = create_access_token(
+        data={"sub": str(current_user.id), "scope": CALENDAR_SCOPE},
+        expires_delta=timedelta(days=settings.calendar_token_expire_days),
+    )
+    return {"token": token, "path": f"/me/calendar.ics?token={token}"}
+
+
+@router.get("/calendar.ics")
+async def get_calendar(
+    request: Request,
+    token: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db=Depends(get_database)
+):
+    """Events the user attends or organises and their scheduled services as an iCalendar feed.
+
+    Calendar apps cannot send headers, so subscriptions authenticate with
+    ``?token=`` from POST /me/calendar/token; a bearer header works too.
+    """
+    if token is not None:
+        current_user = await get_user_from_token(token, db, scope=CALENDAR_SCOPE)
+    elif credentials is not None:
+        current_user = await get_user_from_token(credentials.credentials, db)
+    else:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    calendars = CalendarService(db)
+    user_id = str(current_user.id)
+    return ical.feed_response(
+        request, await calendars.user_feed_etag(user_id), calendars.stream_user_feed(user_id), "calendar.ics"
+    )
@@ -5,17 +5,21 @@ from datetime import datetime, timezone
 from bson import ObjectId
 
 from ..models.service import (
-    ServiceCreate, ServiceUpdate, ServiceResponse, ServiceListResponse, 
-    ServiceFilters, ServiceStatus
+    ServiceCreate, ServiceUpdate, ServiceResponse,
+    ServiceListingResponse, ServiceFilters, ServiceStatus
 )
+from ..models.service_view import ServiceDetailViewResponse
 from ..models.user import UserResponse
-from ..services.service_service import ServiceService
-from ..api.auth import get_current_user
+from ..services.service_service import ServiceService, parse_service_fields
+from ..services.service_view_service import ServiceViewService
+from ..services.sync_service import record_tombstone
+from ..core.serialization import encoded_response
+from ..api.auth import get_current_user, get_optional_current_user
 from ..core.database import get_database
 
 router = APIRouter(prefix="/services", tags=["services"])
 
-@router.get("/", response_model=ServiceListResponse)
+@router.get("/", response_model=None, responses={200: {"model": ServiceListingResponse}})
 async def get_services(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
@@ -28,10 +32,19 @@ async def get_services(
     radius: Optional[float] = None,
     user_id: Optional[str] = None,
     is_remote: Optional[bool] = None,
+    view: str = Query("full", pattern="^(full|card)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated ServiceResponse fields"),
     db=Depends(get_database)
 ):
-    """Get services with optional filters"""
+    """Get services with optional filters (public; pages are served from the listing cache).
+
+    ``view=card`` returns slim ServiceCardResponse items; ``fields`` returns only the named fields.
+    """
     service_service = ServiceService(db)
+    try:
+        field_list = parse_service_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
     # Parse tags if provided
     tag_list = tags.split(",") if tags else None
@@ -55,13 +68,8 @@ async def get_services(
     )
     
     try:
-        services, total = await service_service.get_services(filters, page, limit)
-        return ServiceListResponse(
-            services=services,
-            total=total,
-            page=page,
-            limit=limit
-        )
+        body = await service_service.get_services_page(filters, page, limit, view, field_list)
+        return encoded_response(body)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -86,14 +94,20 @@ async def create_service(
             detail=str(e)
         )
 
-@router.get("/saved", response_model=ServiceListResponse)
+@router.get("/saved", response_model=None, responses={200: {"model": ServiceListingResponse}})
 async def get_saved_services(
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=100),
+    view: str = Query("full", pattern="^(full|card)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated ServiceResponse fields"),
     current_user: UserResponse = Depends(get_current_user),
     db=Depends(get_database)
 ):
-    """Get all services saved by the current user"""
+    """Get all services saved by the current user (supports ``view=card`` and ``fields``)"""
+    try:
+        field_list = parse_service_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     try:
         cursor = db.saved_services.find(
             {"user_id": str(current_user.id)}
@@ -103,21 +117,10 @@ async def get_saved_services(
         total = await db.saved_services.count_documents({"user_id": str(current_user.id)})
 
         service_service = ServiceService(db)
-        services = []
-        for doc in saved_docs:
-            try:
-                svc = await service_service.get_service_by_id(doc["service_id"])
-                if svc:
-                    services.append(svc)
-            except Exception:
-                pass
-
-        return ServiceListResponse(
-            services=services,
-            total=total,
-            page=page,
-            limit=limit,
+        body = await service_service.get_services_by_ids_page(
+            [doc["service_id"] for doc in saved_docs], total, page, limit, view, field_list
         )
+        return encoded_response(body)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -131,12 +134,8 @@ async def get_saved_service_ids(
     db=Depends(get_database)
 ):
     """Get list of service IDs saved by the current user (lightweight check)"""
-    cursor = db.saved_services.find(
-        {"user_id": str(current_user.id)},
-        {"service_id": 1, "_id": 0}
-    )
-    docs = await cursor.to_list(length=500)
-    return {"service_ids": [doc["service_id"] for doc in docs]}
+    service_service = ServiceService(db)
+    return {"service_ids": await service_service.get_saved_service_ids(str(current_user.id))}
 
 
 @router.get("/{service_id}", response_model=ServiceResponse)
@@ -300,6 +299,7 @@ async def unsave_service(
     })
     if result.deleted_count == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Saved service not found")
+    await record_tombstone(db, "saved_service", service_id, [current_user.id])
     return {"message": "Service unsaved successfully"}
 
 
@@ -434,6 +434,37 @@ async def get_service_participants(
             detail=f"Error fetching participants: {str(e)}"
         )
 
+@router.get("/{service_id}/view", response_model=ServiceDetailViewResponse)
+async def get_service_view(
+    service_id: str,
+    comment_limit: Optional[int] = Query(None, ge=0, le=100),
+    event_limit: Optional[int] = Query(None, ge=0, le=100),
+    current_user: Optional[UserResponse] = Depends(get_optional_current_user),
+    db=Depends(get_database)
+):
+    """Everything the service detail screen needs in one call: service, participants,
+    latest comments, linked events and, when authenticated, the caller's pending
+    join request and saved status. Section sizes default to server settings."""
+    view_service = ServiceViewService(db)
+    try:
+        view = await view_service.get_service_view(
+            service_id,
+            viewer_id=str(current_user.id) if current_user else None,
+            comment_limit=comment_limit,
+            event_limit=event_limit,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if not view:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Service not found"
+        )
+    return view
+
 @router.post("/check-expired")
 async def check_expired_services(
     db=Depends(get_database)
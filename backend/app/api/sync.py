@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional
+
+from ..models.sync import SyncResponse
+from ..models.user import UserResponse
+from ..services.sync_service import SyncService
+from ..core.serialization import trusted_response
+from ..api.auth import get_current_user
+from ..core.database import get_database
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+@router.get("", response_model=SyncResponse)
+async def sync_changes(
+    since: Optional[str] = Query(None, description="Token from the previous sync; omit for a full snapshot"),
+    current_user: UserResponse = Depends(get_current_user),
+    db=Depends(get_database)
+):
+    """Created, updated and deleted IDs plus compact documents of the current user's services,
+    saved services, chat rooms, messages, transactions and join requests since ``since``"""
+    sync_service = SyncService(db)
+    try:
+        changes = await sync_service.get_changes(str(current_user.id), since)
+        return trusted_response(changes)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
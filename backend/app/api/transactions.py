@@ -7,6 +7,7 @@ from ..services.transaction_service import TransactionService
 from ..api.auth import get_current_user
 from ..core.database import get_database
 from ..core.permissions import require_admin, require_moderator_or_admin
+from ..core.serialization import trusted_response
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
@@ -38,12 +39,12 @@ async def get_my_transactions(
     transaction_service = TransactionService(db)
     try:
         transactions, total = await transaction_service.get_user_transactions(str(current_user.id), page, limit)
-        return TransactionListResponse(
+        return trusted_response(TransactionListResponse.model_construct(
             transactions=transactions,
             total=total,
             page=page,
             limit=limit
-        )
+        ))
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -62,12 +63,12 @@ async def get_service_transactions(
     transaction_service = TransactionService(db)
     try:
         transactions, total = await transaction_service.get_service_transactions(service_id, page, limit)
-        return TransactionListResponse(
+        return trusted_response(TransactionListResponse.model_construct(
             transactions=transactions,
             total=total,
             page=page,
             limit=limit
-        )
+        ))
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -147,12 +148,12 @@ async def get_all_transactions_admin(
     transaction_service = TransactionService(db)
     try:
         transactions, total = await transaction_service.get_all_transactions(page, limit)
-        return TransactionListResponse(
+        return trusted_response(TransactionListResponse.model_construct(
             transactions=transactions,
             total=total,
             page=page,
             limit=limit
-        )
+        ))
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
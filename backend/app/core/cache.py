@@ -0,0 +1,509 @@
+"""Shared caching layer.
+
+Routers and services get a namespaced ``Cache`` via ``get_cache(namespace)``.
+Every namespace talks to the same backend, chosen by ``settings.cache_backend``:
+
+- ``memory``: bounded in-process LRU with per-entry TTL (default)
+- ``redis``: a Redis 7.0+ compatible server at ``settings.cache_url``, shared by all workers
+
+Values are stored with a freshness deadline. Once it passes, an entry may still be
+served for ``stale_ttl`` seconds while one background task refreshes it
+(stale-while-revalidate). Concurrent misses for the same key are coalesced into
+a single loader call.
+"""
+import abc
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import msgpack
+from bson import ObjectId
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# (value, fresh_until) as stored by every backend
+Envelope = Tuple[Any, float]
+
+
+class CacheBackend(abc.ABC):
+    """Storage interface used by ``Cache``. Keys and tags arrive fully qualified."""
+
+    @abc.abstractmethod
+    async def get_many(self, keys: List[str]) -> Dict[str, Envelope]:
+        ...
+
+    @abc.abstractmethod
+    async def set(self, key: str, envelope: Envelope, ttl: float, tags: Iterable[str] = ()) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def delete(self, keys: List[str]) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def invalidate_tags(self, tags: List[str]) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def clear(self) -> None:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__}
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU with per-entry expiry and tag index."""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[float, Envelope]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._key_tags: Dict[str, Tuple[str, ...]] = {}
+        self.evictions = 0
+
+    def _drop(self, key: str) -> None:
+        self._data.pop(key, None)
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Envelope]:
+        now = time.time()
+        found = {}
+        for key in keys:
+            entry = self._data.get(key)
+            if entry is None:
+                continue
+            expires_at, envelope = entry
+            if expires_at <= now:
+                self._drop(key)
+                continue
+            self._data.move_to_end(key)
+            found[key] = envelope
+        return found
+
+    async def set(self, key: str, envelope: Envelope, ttl: float, tags: Iterable[str] = ()) -> None:
+        if self.maxsize <= 0:
+            return
+        self._drop(key)
+        self._data[key] = (time.time() + ttl, envelope)
+        tags = tuple(tags)
+        if tags:
+            self._key_tags[key] = tags
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+        while len(self._data) > self.maxsize:
+            oldest = next(iter(self._data))
+            self._drop(oldest)
+            self.evictions += 1
+
+    async def delete(self, keys: List[str]) -> None:
+        for key in keys:
+            self._drop(key)
+
+    async def invalidate_tags(self, tags: List[str]) -> None:
+        for tag in tags:
+            for key in list(self._tags.get(tag, ())):
+                self._drop(key)
+
+    async def clear(self) -> None:
+        self._data.clear()
+        self._tags.clear()
+        self._key_tags.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "tags": len(self._tags),
+            "evictions": self.evictions,
+        }
+
+
+# MessagePack extension codes for the BSON values cached documents carry
+_EXT_OBJECT_ID = 1
+_EXT_DATETIME = 2
+
+
+def _pack_default(obj):
+    if isinstance(obj, ObjectId):
+        return msgpack.ExtType(_EXT_OBJECT_ID, obj.binary)
+    if isinstance(obj, datetime):
+        return msgpack.ExtType(_EXT_DATETIME, obj.isoformat().encode())
+    raise TypeError(f"Cannot cache value of type {type(obj).__name__}")
+
+
+def _unpack_ext(code: int, data: bytes):
+    if code == _EXT_OBJECT_ID:
+        return ObjectId(data)
+    if code == _EXT_DATETIME:
+        return datetime.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+def pack_envelope(envelope: Envelope) -> bytes:
+    """Serialize an envelope as MessagePack; only plain data, ObjectId and datetime are accepted."""
+    return msgpack.packb(envelope, default=_pack_default, use_bin_type=True)
+
+
+def unpack_envelope(payload: bytes) -> Envelope:
+    value, fresh_until = msgpack.unpackb(
+        payload, ext_hook=_unpack_ext, raw=False, strict_map_key=False
+    )
+    return value, fresh_until
+
+
+class RedisBackend(CacheBackend):
+    """Redis-compatible network backend (Redis, Valkey, KeyDB, fakeredis in tests).
+
+    Entries are MessagePack envelopes with a server-side expiry; each tag is a set of
+    member keys that is deleted together with its members on invalidation. Extending
+    tag expiry uses ``PEXPIRE ... GT``/``NX``, so the server must speak Redis 7.0+.
+    Payloads are never unpickled, so a writable cache server cannot run code here.
+    """
+
+    def __init__(self, url: Optional[str] = None, client=None, prefix: str = "hive:cache"):
+        if client is None:
+            import redis.asyncio as redis_asyncio
+            client = redis_asyncio.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:k:{key}"
+
+    def _tag(self, tag: str) -> str:
+        return f"{self.prefix}:t:{tag}"
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Envelope]:
+        if not keys:
+            return {}
+        raw = await self.client.mget([self._key(k) for k in keys])
+        return {k: unpack_envelope(v) for k, v in zip(keys, raw) if v is not None}
+
+    async def set(self, key: str, envelope: Envelope, ttl: float, tags: Iterable[str] = ()) -> None:
+        ttl_ms = max(int(ttl * 1000), 1)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(self._key(key), pack_envelope(envelope), px=ttl_ms)
+        for tag in tags:
+            tag_key = self._tag(tag)
+            pipe.sadd(tag_key, key)
+            # Tag sets only need to outlive their longest member (GT/NX need Redis 7.0+)
+            pipe.pexpire(tag_key, ttl_ms, gt=True)
+            pipe.pexpire(tag_key, ttl_ms, nx=True)
+        await pipe.execute()
+
+    async def delete(self, keys: List[str]) -> None:
+        if keys:
+            await self.client.delete(*[self._key(k) for k in keys])
+
+    async def invalidate_tags(self, tags: List[str]) -> None:
+        for tag in tags:
+            tag_key = self._tag(tag)
+            members = await self.client.smembers(tag_key)
+            to_delete = [self._key(m.decode() if isinstance(m, bytes) else m) for m in members]
+            await self.client.delete(tag_key, *to_delete)
+
+    async def clear(self) -> None:
+        async for key in self.client.scan_iter(match=f"{self.prefix}:*"):
+            await self.client.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis", "prefix": self.prefix}
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+class Cache:
+    """Namespaced async cache with single-flight loading and stale-while-revalidate."""
+
+    def __init__(
+        self,
+        namespace: str,
+        backend: Optional[CacheBackend] = None,
+        ttl: float = 60.0,
+        stale_ttl: float = 0.0,
+    ):
+        self.namespace = namespace
+        self._backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._inflight: Dict[str, Tuple[asyncio.Future, Tuple[str, ...]]] = {}
+        self._refreshing: Set[asyncio.Task] = set()
+        # Bumped on every tag invalidation; guards loads whose tags depend on the result
+        self._tag_generation = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    @property
+    def backend(self) -> CacheBackend:
+        return self._backend or get_backend()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _key(self, key) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def _read(self, keys: List[str]) -> Dict[str, Envelope]:
+        try:
+            return await self.backend.get_many(keys)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Cache read failed for namespace '{self.namespace}': {e}")
+            return {}
+
+    async def get(self, key, default=None) -> Any:
+        """Return the cached value (fresh or within its stale window) or ``default``."""
+        found = await self.get_many([key])
+        return found.get(key, default)
+
+    async def get_many(self, keys: Iterable) -> Dict[Any, Any]:
+        keys = list(keys)
+        qualified = {self._key(k): k for k in keys}
+        entries = await self._read(list(qualified))
+        now = time.time()
+        result = {}
+        for qkey, (value, fresh_until) in entries.items():
+            if fresh_until > now:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            result[qualified[qkey]] = value
+        self.misses += len(keys) - len(result)
+        return result
+
+    async def set(
+        self,
+        key,
+        value: Any,
+        ttl: Optional[float] = None,
+        tags: Iterable[str] = (),
+        stale_ttl: Optional[float] = None,
+    ) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+        try:
+            await self.backend.set(
+                self._key(key), (value, time.time() + ttl), ttl + max(stale_ttl, 0), tags
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Cache write failed for namespace '{self.namespace}': {e}")
+
+    async def delete(self, *keys) -> None:
+        qualified = [self._key(k) for k in keys]
+        for qkey in qualified:
+            self._inflight.pop(qkey, None)
+        try:
+            await self.backend.delete(qualified)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Cache delete failed for namespace '{self.namespace}': {e}")
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        """Drop every entry stored with one of ``tags`` (in all namespaces on the shared backend)."""
+        if self._backend is None:
+            await invalidate_tags(*tags)
+            return
+        self._detach_tagged(set(tags))
+        try:
+            await self._backend.invalidate_tags(list(tags))
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Cache tag invalidation failed for {tags}: {e}")
+
+    def _detach_tagged(self, tags: Set[str]) -> None:
+        self._tag_generation += 1
+        for qkey, (_, key_tags) in list(self._inflight.items()):
+            if tags.intersection(key_tags):
+                del self._inflight[qkey]
+
+    async def get_or_set(
+        self,
+        key,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        tags: Union[Iterable[str], Callable[[Any], Iterable[str]]] = (),
+        stale_ttl: Optional[float] = None,
+    ) -> Any:
+        """Return the cached value or run ``loader`` once for all concurrent callers.
+
+        ``None`` results are returned but not cached. A stale entry is returned
+        immediately and refreshed in the background. ``tags`` may be a callable
+        that derives the tags from the loaded value; such a load is only published
+        if no tag invalidation at all happened while it ran.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return await loader()
+        if not callable(tags):
+            tags = tuple(tags)
+        qkey = self._key(key)
+
+        entries = await self._read([qkey])
+        if qkey in entries:
+            value, fresh_until = entries[qkey]
+            if fresh_until > time.time():
+                self.hits += 1
+                return value
+            self.stale_hits += 1
+            if qkey not in self._inflight:
+                self._start_refresh(key, qkey, loader, ttl, tags, stale_ttl)
+            return value
+
+        pending = self._inflight.get(qkey)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending[0])
+
+        self.misses += 1
+        return await self._load(key, qkey, loader, ttl, tags, stale_ttl)
+
+    async def _load(self, key, qkey, loader, ttl, tags, stale_ttl) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        dynamic_tags = callable(tags)
+        generation = self._tag_generation
+        self._inflight[qkey] = (future, () if dynamic_tags else tags)
+        try:
+            value = await loader()
+        except BaseException as e:
+            if self._inflight.get(qkey, (None,))[0] is future:
+                del self._inflight[qkey]
+            if not future.done():
+                future.set_exception(e)
+                # Mark retrieved so an unawaited failure does not log a warning
+                future.exception()
+            raise
+        # Only publish if nobody invalidated the key while we were loading
+        owned = self._inflight.get(qkey, (None,))[0] is future
+        if owned and dynamic_tags and self._tag_generation != generation:
+            del self._inflight[qkey]
+        elif owned:
+            if dynamic_tags and value is not None:
+                tags = tuple(tags(value))
+            if value is not None:
+                await self.set(key, value, ttl=ttl, tags=tags, stale_ttl=stale_ttl)
+            if self._inflight.get(qkey, (None,))[0] is future:
+                del self._inflight[qkey]
+        if not future.done():
+            future.set_result(value)
+        return value
+
+    def _start_refresh(self, key, qkey, loader, ttl, tags, stale_ttl) -> None:
+        self.refreshes += 1
+
+        async def refresh():
+            try:
+                await self._load(key, qkey, loader, ttl, tags, stale_ttl)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Background refresh failed for '{qkey}': {e}")
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._refreshing.add(task)
+        task.add_done_callback(self._refreshing.discard)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "ttl_seconds": self.ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+_backend: Optional[CacheBackend] = None
+_caches: Dict[str, Cache] = {}
+
+
+def create_backend() -> CacheBackend:
+    """Build the backend selected in settings."""
+    if settings.cache_backend == "redis":
+        logger.info("Using Redis cache backend")
+        return RedisBackend(url=settings.cache_url, prefix=settings.cache_key_prefix)
+    if settings.cache_backend != "memory":
+        logger.warning(f"Unknown cache backend '{settings.cache_backend}', falling back to memory")
+    return MemoryBackend(maxsize=settings.cache_max_entries)
+
+
+def get_backend() -> CacheBackend:
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend: Optional[CacheBackend]) -> None:
+    """Replace the shared backend (``None`` rebuilds it from settings on next use)."""
+    global _backend
+    _backend = backend
+
+
+def get_cache(namespace: str, ttl: float = 60.0, stale_ttl: float = 0.0) -> Cache:
+    """Return the process-wide cache for ``namespace``, creating it on first use."""
+    cache = _caches.get(namespace)
+    if cache is None:
+        cache = _caches[namespace] = Cache(namespace, ttl=ttl, stale_ttl=stale_ttl)
+    return cache
+
+
+async def invalidate_tags(*tags: str) -> None:
+    """Drop every cached entry carrying one of ``tags`` across all namespaces."""
+    if not tags:
+        return
+    tag_set = set(tags)
+    for cache in _caches.values():
+        cache._detach_tagged(tag_set)
+    try:
+        await get_backend().invalidate_tags(list(tags))
+    except Exception as e:
+        logger.error(f"Cache tag invalidation failed for {tags}: {e}")
+
+
+def cache_stats() -> Dict[str, Any]:
+    return {
+        "backend": get_backend().stats(),
+        "namespaces": {name: cache.stats() for name, cache in _caches.items()},
+    }
+
+
+async def close_cache_backend() -> None:
+    global _backend
+    if _backend is not None:
+        await _backend.close()
+        _backend = None
+
+
+async def clear_all_caches() -> None:
+    for cache in _caches.values():
+        cache._inflight.clear()
+    await get_backend().clear()
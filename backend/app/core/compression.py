@@ -0,0 +1,213 @@
+"""Response compression with Accept-Encoding negotiation (brotli, gzip).
+
+Responses are compressed when the client accepts it, the content type is
+textual (JSON, text, XML, MessagePack) and the body is at least
+``settings.compression_min_size`` bytes. Streaming responses are compressed
+chunk by chunk. Endpoints decorated with ``@skip_compression`` are never touched.
+Brotli is used only when the optional ``brotli`` package is installed.
+"""
+import gzip
+import io
+from typing import Any, Callable, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/msgpack",
+    "application/xml",
+    "application/javascript",
+    "text/",
+)
+
+
+def skip_compression(endpoint: Callable) -> Callable:
+    """Opt an endpoint out of response compression (e.g. already-compressed payloads)."""
+    endpoint.skip_compression = True
+    return endpoint
+
+
+class _Stats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.compressed: Dict[str, int] = {}
+        self.skipped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def record(self, encoding: str, size_in: int, size_out: int) -> None:
+        self.compressed[encoding] = self.compressed.get(encoding, 0) + 1
+        self.bytes_in += size_in
+        self.bytes_out += size_out
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "compressed_responses": dict(self.compressed),
+            "skipped_responses": self.skipped,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None,
+        }
+
+
+_stats = _Stats()
+
+
+def compression_stats() -> Dict[str, Any]:
+    """Counters for the admin stats endpoint."""
+    return _stats.as_dict()
+
+
+def reset_compression_stats() -> None:
+    _stats.reset()
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick ``br`` or ``gzip`` from an Accept-Encoding header, honouring q=0."""
+    offered = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[token] = q
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    wildcard = offered.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = offered.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=level)
+        else:
+            self._buffer = io.BytesIO()
+            self._gzip = gzip.GzipFile(mode="wb", fileobj=self._buffer, compresslevel=level)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._br.process(data)
+            return out + (self._br.finish() if final else self._br.flush())
+        self._gzip.write(data)
+        if final:
+            self._gzip.close()
+        else:
+            self._gzip.flush()
+        out = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return out
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(scope, send, encoding, self.minimum_size, self.levels[encoding])
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, scope: Scope, send: Send, encoding: str, minimum_size: int, level: int):
+        self.scope = scope
+        self.downstream = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.level = level
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+        self.size_in = 0
+        self.size_out = 0
+
+    def _eligible(self, headers: Headers) -> bool:
+        endpoint = self.scope.get("endpoint")
+        if getattr(endpoint, "skip_compression", False):
+            return False
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = not self._eligible(headers)
+            if self.passthrough:
+                _stats.skipped += 1
+                await self.downstream(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        headers = MutableHeaders(raw=self.start_message["headers"])
+
+        if self.compressor is None:
+            if not more_body and len(body) < self.minimum_size:
+                # Small, complete body: not worth the CPU
+                self.passthrough = True
+                _stats.skipped += 1
+                headers.add_vary_header("Accept-Encoding")
+                await self.downstream(self.start_message)
+                await self.downstream(message)
+                return
+            self.compressor = _Compressor(self.encoding, self.level)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+            compressed = self.compressor.compress(body, final=not more_body)
+            if not more_body:
+                headers["Content-Length"] = str(len(compressed))
+            await self.downstream(self.start_message)
+        else:
+            compressed = self.compressor.compress(body, final=not more_body)
+
+        self.size_in += len(body)
+        self.size_out += len(compressed)
+        if not more_body:
+            _stats.record(self.encoding, self.size_in, self.size_out)
+        await self.downstream({"type": "http.response.body", "body": compressed, "more_body": more_body})
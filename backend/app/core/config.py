@@ -30,7 +30,81 @@ class Settings(BaseSettings):
     # Uploads (local filesystem)
     upload_dir: str = "uploads"
     max_upload_size_mb: float = 5.0
-    
+
+    # Upload derivatives (thumb/card/full WebP + fallback; needs Pillow), encoded by a
+    # pool of worker processes (0 = one background thread)
+    image_variants_enabled: bool = True
+    image_worker_processes: int = 2
+    image_webp_quality: int = 80
+
+    # Cache ("memory" = per-process LRU, "redis" = shared Redis 7.0+ compatible server)
+    cache_backend: str = "memory"
+    cache_url: str = "redis://localhost:6379/0"
+    cache_key_prefix: str = "hive:cache"
+    cache_max_entries: int = 10000
+
+    # Service detail read-through cache (0 disables)
+    service_cache_ttl_seconds: float = 60.0
+
+    # Public GET /services listing cache (0 disables); only pages up to max_page are cached
+    service_list_cache_ttl_seconds: float = 30.0
+    service_list_cache_max_page: int = 5
+
+    # Near-me candidate sets per geo cell (0 disables); denser cells fall back to $geoNear
+    geo_cache_ttl_seconds: float = 60.0
+    geo_cache_max_candidates: int = 500
+
+    # GET /services/{id}/view default section sizes (callers may override per request)
+    service_view_comment_limit: int = 10
+    service_view_event_limit: int = 5
+
+    # GET /me/bootstrap: first page size of chat rooms and join requests
+    bootstrap_chat_room_limit: int = 20
+    bootstrap_join_request_limit: int = 20
+
+    # Delta sync (GET /sync): items per section per call, token lag behind the clock,
+    # and how long tombstones are kept (older tokens get a full snapshot)
+    sync_max_items: int = 500
+    sync_overlap_seconds: float = 2.0
+    sync_tombstone_retention_days: int = 30
+
+    # Realtime chat pub/sub ("memory" = in-process, "redis" = fan-out across workers);
+    # a WebSocket whose queue of undelivered events overflows is told to resync
+    pubsub_backend: str = "memory"
+    pubsub_url: str = "redis://localhost:6379/0"
+    pubsub_channel_prefix: str = "hive:pubsub"
+    pubsub_queue_size: int = 256
+    # Tokens for GET /chat/ws?token=... (POST /chat/ws/token) are only good for connecting
+    chat_ws_token_expire_seconds: int = 60
+
+    # Write-behind batching of chat messages (one insert_many and room update per room per flush)
+    chat_write_behind_enabled: bool = False
+    chat_write_behind_max_delay_ms: float = 50.0
+    chat_write_behind_max_batch: int = 100
+
+    # Cold archive of chat messages: older ones are packed into compressed per-room,
+    # per-day buckets of at most bucket_size messages by a background task
+    chat_archive_enabled: bool = False
+    chat_archive_after_days: float = 90.0
+    chat_archive_bucket_size: int = 200
+    chat_archive_interval_minutes: float = 60.0
+
+    # Upper bound for the after= long poll of GET /chat/rooms/{id}/messages/cursor
+    chat_long_poll_max_seconds: float = 25.0
+    # A message's seq is taken shortly before it is written; cursor reads wait this long
+    # for a missing seq to be written before skipping it (must exceed the write-behind delay)
+    chat_sequence_grace_seconds: float = 5.0
+
+    # iCalendar feeds keep events of the last past_days; calendar subscription tokens
+    # (GET /me/calendar.ics?token=...) are valid for token_expire_days
+    calendar_feed_past_days: int = 30
+    calendar_token_expire_days: int = 365
+
+    # Response compression (gzip, or brotli when installed); smaller bodies are sent as-is
+    compression_min_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+
     def get_allowed_origins(self) -> List[str]:
         """Get allowed origins as a list"""
         # Get from environment variable or use default
@@ -91,7 +91,13 @@ async def create_indexes():
         await db.database.messages.create_index("room_id")
         await db.database.messages.create_index("sender_id")
         await db.database.messages.create_index("created_at")
-        await db.database.messages.create_index("is_deleted")
+        # In-room search (token index maintained by ChatService)
+        await db.database.messages.create_index([("room_id", 1), ("search_tokens", 1)])
+        # Archive buckets per room, looked up by message id range and read in seq order
+        await db.database.message_archive.create_index([("room_id", 1), ("first_id", 1)], unique=True)
+        await db.database.message_archive.create_index([("room_id", 1), ("last_id", 1)])
+        await db.database.message_archive.create_index([("room_id", 1), ("first_seq", 1)])
+        await db.database.message_archive.create_index([("room_id", 1), ("last_seq", 1)])
         
         # Saved services indexes
         await db.database.saved_services.create_index(
@@ -100,6 +106,31 @@ async def create_indexes():
         await db.database.saved_services.create_index("user_id")
         await db.database.saved_services.create_index("created_at")
 
+        # Delta sync (GET /sync): per-owner range scans on updated_at, tombstones expire
+        await db.database.services.create_index([("user_id", 1), ("updated_at", 1)])
+        await db.database.chat_rooms.create_index([("participant_ids", 1), ("updated_at", 1)])
+        await db.database.messages.create_index([("room_id", 1), ("updated_at", 1)])
+        # A room's messages in order (pages and before/after cursors), one per seq
+        await db.database.messages.create_index(
+            [("room_id", 1), ("seq", 1)], unique=True, partialFilterExpression={"seq": {"$exists": True}}
+        )
+        await db.database.transactions.create_index([("provider_id", 1), ("updated_at", 1)])
+        await db.database.transactions.create_index([("requester_id", 1), ("updated_at", 1)])
+        await db.database.join_requests.create_index([("user_id", 1), ("updated_at", 1)])
+        await db.database.join_requests.create_index([("service_id", 1), ("updated_at", 1)])
+        await db.database.saved_services.create_index([("user_id", 1), ("created_at", 1)])
+
+        # Derivative manifests of uploaded images, looked up by original URL
+        await db.database.image_variants.create_index("url", unique=True)
+
+        # Per-user calendar feed: own and joined services in schedule order
+        await db.database.services.create_index([("user_id", 1), ("specific_date", 1)])
+        await db.database.services.create_index([("matched_user_ids", 1), ("specific_date", 1)])
+        await db.database.sync_tombstones.create_index([("user_ids", 1), ("deleted_at", 1)])
+        await db.database.sync_tombstones.create_index(
+            "deleted_at", expireAfterSeconds=settings.sync_tombstone_retention_days * 86400
+        )
+
         # Forum indexes
         await db.database.forum_discussions.create_index("user_id")
         await db.database.forum_discussions.create_index("created_at")
@@ -110,7 +141,12 @@ async def create_indexes():
         await db.database.forum_events.create_index("created_at")
         await db.database.forum_events.create_index("tags.label")
         await db.database.forum_events.create_index("service_id")
-        await db.database.forum_events.create_index("latitude")
+        # Map queries: area ($geoWithin) plus upcoming (event_at) in one index
+        await db.database.forum_events.create_index([("geo", "2dsphere"), ("event_at", 1)])
+
+        await db.database.event_attendance.create_index([("event_id", 1), ("user_id", 1)], unique=True)
+        await db.database.event_attendance.create_index([("event_id", 1), ("created_at", 1)])
+        await db.database.event_attendance.create_index([("user_id", 1), ("created_at", 1)])
 
         await db.database.forum_comments.create_index([("target_type", 1), ("target_id", 1)])
         await db.database.forum_comments.create_index("user_id")
@@ -0,0 +1,106 @@
+"""Fixed geo grid used to share cached "near me" candidate sets.
+
+Query radii are rounded up to a bucket, and each bucket has its own grid whose
+cell side is half the bucket radius. A candidate set is computed once per
+(bucket, cell) over the cell's bounding box grown by the bucket radius, so any
+query point inside the cell with any radius up to the bucket is fully covered.
+"""
+import math
+from typing import List, Optional, Tuple
+
+KM_PER_DEGREE = 111.32
+EARTH_RADIUS_KM = 6378.1
+RADIUS_BUCKETS_KM = (1, 2, 5, 10, 25, 50, 100)
+
+# (lat_min, lat_max, lon_min, lon_max)
+BoundingBox = Tuple[float, float, float, float]
+
+
+def radius_bucket(radius_km: float) -> Optional[float]:
+    """Smallest bucket that covers ``radius_km`` (None when larger than every bucket)."""
+    for bucket in RADIUS_BUCKETS_KM:
+        if radius_km <= bucket:
+            return bucket
+    return None
+
+
+def _cell_step(bucket_km: float) -> float:
+    return (bucket_km / 2) / KM_PER_DEGREE
+
+
+def cell_for(latitude: float, longitude: float, bucket_km: float) -> Tuple[int, int]:
+    """Grid cell containing a point at the given bucket's resolution."""
+    step = _cell_step(bucket_km)
+    return math.floor(latitude / step), math.floor(longitude / step)
+
+
+def cell_tag(bucket_km: float, cell: Tuple[int, int]) -> str:
+    return f"geo:{bucket_km:g}:{cell[0]}:{cell[1]}"
+
+
+def cell_tags_for_point(latitude: float, longitude: float) -> List[str]:
+    """Tags of the cell containing a point at every bucket resolution."""
+    return [cell_tag(b, cell_for(latitude, longitude, b)) for b in RADIUS_BUCKETS_KM]
+
+
+def coverage_box(cell: Tuple[int, int], bucket_km: float) -> Optional[BoundingBox]:
+    """Bounding box of every point within ``bucket_km`` of the cell.
+
+    Returns None when the box would reach a pole or cross the antimeridian.
+    """
+    step = _cell_step(bucket_km)
+    lat_pad = bucket_km / KM_PER_DEGREE
+    lat_min = cell[0] * step - lat_pad
+    lat_max = (cell[0] + 1) * step + lat_pad
+    if lat_min <= -90 or lat_max >= 90:
+        return None
+    widest = math.cos(math.radians(max(abs(lat_min), abs(lat_max))))
+    lon_pad = bucket_km / (KM_PER_DEGREE * widest)
+    lon_min = cell[1] * step - lon_pad
+    lon_max = (cell[1] + 1) * step + lon_pad
+    if lon_min < -180 or lon_max > 180:
+        return None
+    return lat_min, lat_max, lon_min, lon_max
+
+
+def cells_in_box(box: BoundingBox, bucket_km: float) -> List[Tuple[int, int]]:
+    """Grid cells (at the bucket resolution) overlapping a bounding box."""
+    lat_min, lat_max, lon_min, lon_max = box
+    lat_lo, lon_lo = cell_for(lat_min, lon_min, bucket_km)
+    lat_hi, lon_hi = cell_for(lat_max, lon_max, bucket_km)
+    return [
+        (i, j)
+        for i in range(lat_lo, lat_hi + 1)
+        for j in range(lon_lo, lon_hi + 1)
+    ]
+
+
+def point_of(location) -> Optional[Tuple[float, float]]:
+    """(latitude, longitude) of a stored location in either plain or GeoJSON shape."""
+    if not isinstance(location, dict):
+        return None
+    if location.get("type") == "Point" and len(location.get("coordinates") or []) == 2:
+        longitude, latitude = location["coordinates"]
+        return latitude, longitude
+    if "latitude" in location and "longitude" in location:
+        return location["latitude"], location["longitude"]
+    return None
+
+
+def geojson_point(latitude: Optional[float], longitude: Optional[float]) -> Optional[dict]:
+    """GeoJSON Point for a coordinate pair (None unless both are set)."""
+    if latitude is None or longitude is None:
+        return None
+    return {"type": "Point", "coordinates": [longitude, latitude]}
+
+
+def within_radius(latitude: float, longitude: float, radius_km: float) -> dict:
+    """``$geoWithin`` operand for points within ``radius_km`` of a location (2dsphere-indexable)."""
+    return {"$centerSphere": [[longitude, latitude], radius_km / EARTH_RADIUS_KM]}
+
+
+def within_box(box: BoundingBox) -> dict:
+    """``$geoWithin`` operand for a (lat_min, lat_max, lon_min, lon_max) box as a GeoJSON polygon."""
+    lat_min, lat_max, lon_min, lon_max = box
+    ring = [[lon_min, lat_min], [lon_max, lat_min], [lon_max, lat_max], [lon_min, lat_max], [lon_min, lat_min]]
+    return {"$geometry": {"type": "Polygon", "coordinates": [ring]}}
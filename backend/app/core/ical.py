@@ -0,0 +1,129 @@
+"""iCalendar (RFC 5545) encoding and conditional feed responses.
+
+Feeds are written component by component, so a route can stream them from a
+database cursor. Text values go through ``text()``. Content lines are folded
+at 75 octets and end with CRLF.
+
+``feed_response`` answers ``If-None-Match`` with 304 when the feed's ETag
+still matches. The ETag is computed before streaming starts. A feed that
+changes while it is being streamed is therefore sent with the older tag, and
+the client simply downloads it again on its next poll.
+"""
+from datetime import date, datetime
+from typing import AsyncIterator, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+
+MEDIA_TYPE = "text/calendar; charset=utf-8"
+PRODID = "-//The Hive Platform//Calendar//EN"
+CRLF = "\r\n"
+_MAX_LINE_OCTETS = 75
+
+WEEKDAYS = {
+    "monday": "MO", "tuesday": "TU", "wednesday": "WE", "thursday": "TH",
+    "friday": "FR", "saturday": "SA", "sunday": "SU",
+}
+
+Property = Tuple[str, str]
+
+
+def text(value) -> str:
+    """Escape a TEXT value (backslash, semicolon, comma, newline)"""
+    value = str(value or "")
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n").replace("\r", "\\n")
+    )
+
+
+def fold(line: str) -> str:
+    """One content line, folded so no physical line exceeds 75 octets (never inside a UTF-8 sequence)"""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= _MAX_LINE_OCTETS:
+        return line + CRLF
+    parts = []
+    start, limit = 0, _MAX_LINE_OCTETS
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode("utf-8"))
+        # Continuation lines start with a space, which counts towards their length
+        start, limit = end, _MAX_LINE_OCTETS - 1
+    return (CRLF + " ").join(parts) + CRLF
+
+
+def utc(moment: datetime) -> str:
+    """DATE-TIME in UTC (naive datetimes are taken as UTC, as stored)"""
+    return moment.strftime("%Y%m%dT%H%M%SZ")
+
+
+def floating(moment: datetime) -> str:
+    """DATE-TIME without a zone: the same wall-clock time wherever the calendar is"""
+    return moment.strftime("%Y%m%dT%H%M%S")
+
+
+def day(value: date) -> str:
+    return value.strftime("%Y%m%d")
+
+
+def duration(hours: float) -> str:
+    return f"PT{max(int(round(hours * 60)), 1)}M"
+
+
+def weekly_rule(days: Iterable[str], until: Optional[str] = None) -> Optional[str]:
+    """RRULE for a weekly pattern given as day names; None when no day is recognised"""
+    codes = [WEEKDAYS[d.lower()] for d in days if isinstance(d, str) and d.lower() in WEEKDAYS]
+    if not codes:
+        return None
+    rule = f"FREQ=WEEKLY;BYDAY={','.join(dict.fromkeys(codes))}"
+    return f"{rule};UNTIL={until}" if until else rule
+
+
+def component(name: str, properties: Sequence[Property]) -> str:
+    """A component such as VEVENT; property names may carry parameters (``DTSTART;VALUE=DATE``)"""
+    lines = [f"BEGIN:{name}{CRLF}"]
+    lines.extend(fold(f"{key}:{value}") for key, value in properties if value is not None)
+    lines.append(f"END:{name}{CRLF}")
+    return "".join(lines)
+
+
+def calendar_start(name: str) -> str:
+    return "".join(fold(line) for line in (
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{text(name)}",
+    ))
+
+
+def calendar_end() -> str:
+    return f"END:VCALENDAR{CRLF}"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against ``etag`` (RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    candidates: List[str] = [tag.strip() for tag in if_none_match.split(",")]
+    return any((tag[2:] if tag.startswith("W/") else tag) == opaque for tag in candidates)
+
+
+def feed_response(request: Request, etag: str, chunks: AsyncIterator[str], filename: str) -> Response:
+    """304 when the client's copy is current, otherwise the feed streamed from ``chunks``"""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    async def body():
+        async for chunk in chunks:
+            yield chunk.encode("utf-8")
+
+    headers["Content-Disposition"] = f'inline; filename="{filename}"'
+    return StreamingResponse(body(), media_type=MEDIA_TYPE, headers=headers)
@@ -0,0 +1,112 @@
+"""MessagePack content negotiation.
+
+``ContentNegotiationMiddleware`` records whether the client prefers
+``application/msgpack`` over JSON (Accept header, q-values honoured). Every
+response rendered through the default ``ORJSONResponse`` and every
+``trusted_response`` then switches to MessagePack, so routers need no
+per-route code. Error responses stay JSON. JSON and MessagePack responses
+carry ``Vary: Accept`` so shared caches keep the two formats apart.
+
+Encoding: MessagePack carries the same data model as the JSON responses.
+ObjectIds are hex strings and datetimes ISO 8601 strings, whether the route
+returns through ``response_model`` (detail routes) or a trusted response
+(list routes). A client only swaps its parser and gets identical values.
+"""
+from contextvars import ContextVar
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+import msgpack
+from bson import Decimal128, ObjectId
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+# Response types whose format follows the Accept header
+NEGOTIATED_MEDIA_TYPES = ("application/json",) + MSGPACK_MEDIA_TYPES
+
+_wants_msgpack: ContextVar[bool] = ContextVar("wants_msgpack", default=False)
+
+
+def wants_msgpack() -> bool:
+    """True when the current request negotiated a MessagePack response."""
+    return _wants_msgpack.get()
+
+
+def prefers_msgpack(accept: str) -> bool:
+    """Whether an Accept header ranks MessagePack strictly above JSON."""
+    msgpack_q, json_q = 0.0, 0.0
+    for part in accept.split(","):
+        media_type, _, params = part.strip().partition(";")
+        media_type = media_type.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media_type in MSGPACK_MEDIA_TYPES:
+            msgpack_q = max(msgpack_q, q)
+        elif media_type in ("application/json", "application/*", "*/*"):
+            json_q = max(json_q, q)
+    return msgpack_q > 0 and msgpack_q > json_q
+
+
+class ContentNegotiationMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _wants_msgpack.set(prefers_msgpack(Headers(scope=scope).get("accept", "")))
+
+        async def send_with_vary(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+                if media_type in NEGOTIATED_MEDIA_TYPES:
+                    headers.add_vary_header("Accept")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_vary)
+        finally:
+            _wants_msgpack.reset(token)
+
+
+def _default(value: Any) -> Any:
+    """Same representation as the JSON responses (jsonable_encoder / orjson)"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    if isinstance(value, (ObjectId, UUID)):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal128):
+        return float(value.to_decimal())
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not MessagePack serializable")
+
+
+def packb(content: Any) -> bytes:
+    """Encode plain data (dicts, lists, models, BSON values) as MessagePack."""
+    return msgpack.packb(content, default=_default, use_bin_type=True)
+
+
+def unpackb(data: bytes) -> Any:
+    """Decode a MessagePack response body."""
+    return msgpack.unpackb(data, raw=False)
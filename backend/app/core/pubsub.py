@@ -0,0 +1,248 @@
+"""Publish/subscribe for realtime pushes (chat WebSocket).
+
+Services publish events to named channels (``room:<id>``, ``user:<id>``) and
+every WebSocket connection holds a ``Subscription`` to the channels of its
+user. The backend is chosen by ``settings.pubsub_backend``:
+
+- ``memory``: in-process fan-out (default; enough for a single worker)
+- ``redis``: Redis PUBLISH/SUBSCRIBE at ``settings.pubsub_url``, so an event
+  published by one worker reaches subscribers on every worker. Each process
+  keeps one Redis connection and fans out to its local subscribers.
+
+Payloads are encoded once per publish (JSON bytes), not once per subscriber.
+Delivery is best effort: a subscriber whose queue overflows is flagged
+``overflowed`` and is expected to resync (GET /sync) instead of receiving a gap.
+"""
+import abc
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Set, Tuple
+
+import orjson
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One subscriber's bounded inbox of ``(channel, payload)`` pairs."""
+
+    def __init__(self, broker: "PubSubBackend", maxsize: int = 256):
+        self.broker = broker
+        self.channels: Set[str] = set()
+        self.queue: "asyncio.Queue[Tuple[str, bytes]]" = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+        self._closed = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+
+    def deliver(self, channel: str, payload: bytes) -> None:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._enqueue(channel, payload)
+        else:
+            # Published from another thread's event loop
+            self._loop.call_soon_threadsafe(self._enqueue, channel, payload)
+
+    def _enqueue(self, channel: str, payload: bytes) -> None:
+        try:
+            self.queue.put_nowait((channel, payload))
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self._closed.set()
+
+    async def subscribe(self, *channels: str) -> None:
+        for channel in channels:
+            if channel not in self.channels:
+                self.channels.add(channel)
+                await self.broker.attach(channel, self)
+
+    async def unsubscribe(self, *channels: str) -> None:
+        for channel in channels:
+            if channel in self.channels:
+                self.channels.discard(channel)
+                await self.broker.detach(channel, self)
+
+    async def get(self) -> Optional[Tuple[str, bytes]]:
+        """Next ``(channel, payload)``; None once the subscription overflowed or was closed."""
+        if not self.queue.empty():
+            return self.queue.get_nowait()
+        if self._closed.is_set():
+            return None
+        getter = asyncio.ensure_future(self.queue.get())
+        closer = asyncio.ensure_future(self._closed.wait())
+        try:
+            await asyncio.wait({getter, closer}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            closer.cancel()
+            if not getter.done():
+                getter.cancel()
+        return getter.result() if getter.done() and not getter.cancelled() else None
+
+    async def close(self) -> None:
+        await self.unsubscribe(*list(self.channels))
+        self._closed.set()
+
+
+class PubSubBackend(abc.ABC):
+    """Channel registry of local subscriptions; subclasses add cross-process transport."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self.published = 0
+        self.delivered = 0
+
+    def subscription(self) -> Subscription:
+        return Subscription(self, maxsize=settings.pubsub_queue_size)
+
+    def dispatch(self, channel: str, payload: bytes) -> None:
+        """Deliver to the subscribers of ``channel`` in this process."""
+        for subscription in list(self._subscribers.get(channel, ())):
+            subscription.deliver(channel, payload)
+            self.delivered += 1
+
+    async def attach(self, channel: str, subscription: Subscription) -> None:
+        self._subscribers.setdefault(channel, set()).add(subscription)
+
+    async def detach(self, channel: str, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(channel)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[channel]
+
+    @abc.abstractmethod
+    async def publish(self, channel: str, payload: bytes) -> None:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "channels": len(self._subscribers),
+            "subscriptions": sum(len(s) for s in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+        }
+
+    async def close(self) -> None:
+        self._subscribers.clear()
+
+
+class MemoryPubSub(PubSubBackend):
+    """In-process fan-out."""
+
+    async def publish(self, channel: str, payload: bytes) -> None:
+        self.published += 1
+        self.dispatch(channel, payload)
+
+
+class RedisPubSub(PubSubBackend):
+    """Fan-out across workers through a Redis-compatible server.
+
+    The process subscribes to a Redis channel while it has at least one local
+    subscriber for it; a single reader task dispatches incoming messages locally.
+    """
+
+    def __init__(self, url: Optional[str] = None, client=None, prefix: str = "hive:pubsub"):
+        super().__init__()
+        if client is None:
+            import redis.asyncio as redis_asyncio
+            client = redis_asyncio.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self._pubsub = client.pubsub()
+        self._reader: Optional[asyncio.Task] = None
+
+    def _channel(self, channel: str) -> str:
+        return f"{self.prefix}:{channel}"
+
+    async def attach(self, channel: str, subscription: Subscription) -> None:
+        first = channel not in self._subscribers
+        await super().attach(channel, subscription)
+        if first:
+            await self._pubsub.subscribe(self._channel(channel))
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read())
+
+    async def detach(self, channel: str, subscription: Subscription) -> None:
+        await super().detach(channel, subscription)
+        if channel not in self._subscribers:
+            await self._pubsub.unsubscribe(self._channel(channel))
+
+    async def _read(self) -> None:
+        offset = len(self.prefix) + 1
+        while self._subscribers:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except Exception as e:
+                logger.error(f"Pub/sub read failed: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message and message.get("type") == "message":
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                self.dispatch(channel[offset:], message["data"])
+
+    async def publish(self, channel: str, payload: bytes) -> None:
+        self.published += 1
+        await self.client.publish(self._channel(channel), payload)
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+        await self._pubsub.close()
+        await self.client.close()
+        await super().close()
+
+
+_broker: Optional[PubSubBackend] = None
+
+
+def create_broker() -> PubSubBackend:
+    """Build the backend selected in settings."""
+    if settings.pubsub_backend == "redis":
+        logger.info("Using Redis pub/sub backend")
+        return RedisPubSub(url=settings.pubsub_url, prefix=settings.pubsub_channel_prefix)
+    if settings.pubsub_backend != "memory":
+        logger.warning(f"Unknown pub/sub backend '{settings.pubsub_backend}', falling back to memory")
+    return MemoryPubSub()
+
+
+def get_broker() -> PubSubBackend:
+    global _broker
+    if _broker is None:
+        _broker = create_broker()
+    return _broker
+
+
+def set_broker(broker: Optional[PubSubBackend]) -> None:
+    """Replace the shared broker (``None`` rebuilds it from settings on next use)."""
+    global _broker
+    _broker = broker
+
+
+async def publish(channel: str, event: Dict[str, Any]) -> None:
+    """Encode ``event`` once and publish it; failures are logged, never raised to the writer."""
+    try:
+        await get_broker().publish(channel, orjson.dumps(event, default=str))
+    except Exception as e:
+        logger.error(f"Publish to {channel} failed: {e}")
+
+
+async def close_broker() -> None:
+    global _broker
+    if _broker is not None:
+        await _broker.close()
+        _broker = None
+
+
+def room_channel(room_id) -> str:
+    return f"room:{room_id}"
+
+
+def user_channel(user_id) -> str:
+    return f"user:{user_id}"
@@ -0,0 +1,47 @@
+"""Default JSON response class (orjson).
+
+Route return values still pass through FastAPI's ``jsonable_encoder`` first, so
+ObjectId and Decimal128 are registered there too; handlers may return raw DB
+values without converting them by hand.
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from bson import Decimal128, ObjectId
+from fastapi.encoders import ENCODERS_BY_TYPE
+from fastapi import responses
+
+from .negotiation import MSGPACK_MEDIA_TYPE, packb, wants_msgpack
+
+
+def _default(value: Any) -> Any:
+    """Types orjson does not know natively."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return float(value.to_decimal())
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+ENCODERS_BY_TYPE.setdefault(ObjectId, str)
+ENCODERS_BY_TYPE.setdefault(Decimal128, lambda value: float(value.to_decimal()))
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to JSON bytes; datetimes, UUIDs, enums and ObjectIds are handled directly."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(responses.ORJSONResponse):
+    """FastAPI's ORJSONResponse plus BSON types (used as the app's default_response_class)."""
+
+    def render(self, content: Any) -> bytes:
+        if wants_msgpack():
+            self.media_type = MSGPACK_MEDIA_TYPE
+            return packb(content)
+        return dumps(content)
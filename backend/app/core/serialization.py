@@ -0,0 +1,129 @@
+"""Trusted read path for response models built from our own DB documents.
+
+``Model(**doc)`` re-runs every validator (PyObjectId, tag and location
+normalization, ...) on data the service layer has already normalized, and
+FastAPI then validates the returned model a second time against
+``response_model``. ``TrustedReader`` instead converts ObjectIds to strings
+once, maps aliases, applies the few per-field coercions a model declares and
+calls ``model_construct``; ``encode_json`` turns the result into response bytes
+through a cached ``TypeAdapter`` so routers can return it as-is. Responses
+switch to MessagePack when the request negotiated it (see ``negotiation``).
+
+Only use this for documents read back from MongoDB through a normalizing
+service method; request bodies must keep going through full validation.
+"""
+import typing
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type, TypeVar
+
+from bson import ObjectId
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_json
+
+from .negotiation import MSGPACK_MEDIA_TYPE, packb, wants_msgpack
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def stringify_ids(value: Any) -> Any:
+    """Recursively replace ObjectIds with their hex strings."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, dict):
+        return {k: stringify_ids(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [stringify_ids(v) for v in value]
+    return value
+
+
+def _nested_model(annotation) -> Optional[Type[BaseModel]]:
+    """The BaseModel class behind ``Model`` / ``Optional[Model]``, if any."""
+    candidates = typing.get_args(annotation) or (annotation,)
+    for candidate in candidates:
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
+
+
+class TrustedReader:
+    """Builds ``model_cls`` instances from normalized documents without validation.
+
+    ``coerce`` maps field names to converters for values whose DB representation
+    differs from the model type (e.g. Decimal128 hours). Documents missing a
+    required field fall back to regular validation so bad data still fails loudly.
+    """
+
+    def __init__(self, model_cls: Type[M], coerce: Optional[Dict[str, Callable[[Any], Any]]] = None):
+        self.model_cls = model_cls
+        self.coerce = coerce or {}
+        self._fields = []
+        self._required = set()
+        for name, field in model_cls.model_fields.items():
+            key = field.alias or name
+            nested = _nested_model(field.annotation)
+            self._fields.append((name, key, field, trusted_reader(nested) if nested else None))
+            if field.is_required():
+                self._required.add(key)
+
+    def build(self, doc: dict) -> M:
+        doc = stringify_ids(doc)
+        if not self._required.issubset(k for k, v in doc.items() if v is not None):
+            return self.model_cls.model_validate(doc)
+        values = {}
+        for name, key, field, nested in self._fields:
+            if key in doc:
+                value = doc[key]
+            elif name in doc:
+                value = doc[name]
+            else:
+                values[name] = field.get_default(call_default_factory=True)
+                continue
+            if name in self.coerce:
+                value = self.coerce[name](value)
+            elif nested is not None and isinstance(value, dict):
+                value = nested.build(value)
+            values[name] = value
+        return self.model_cls.model_construct(**values)
+
+    def build_many(self, docs: Iterable[dict]) -> List[M]:
+        return [self.build(doc) for doc in docs]
+
+
+@lru_cache(maxsize=None)
+def trusted_reader(model_cls: Type[BaseModel]) -> TrustedReader:
+    """Shared reader for models that need no per-field coercion."""
+    return TrustedReader(model_cls)
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+
+def encode_json(value: Any) -> bytes:
+    """Serialize a (trusted) model to JSON bytes the way response_model would (by alias)."""
+    return type_adapter(type(value)).dump_json(value, by_alias=True)
+
+
+def negotiated_media_type() -> str:
+    return MSGPACK_MEDIA_TYPE if wants_msgpack() else "application/json"
+
+
+def encode_response(value: Any) -> bytes:
+    """Encode a (trusted) model or plain data in the format negotiated for this request."""
+    if wants_msgpack():
+        return packb(value)
+    if isinstance(value, BaseModel):
+        return encode_json(value)
+    return to_json(value, fallback=str)
+
+
+def encoded_response(body: bytes) -> Response:
+    """Response for a body produced by ``encode_response`` during this request."""
+    return Response(content=body, media_type=negotiated_media_type())
+
+
+def trusted_response(value: Any) -> Response:
+    """Response for a trusted model, skipping FastAPI's response_model re-validation."""
+    return encoded_response(encode_response(value))
@@ -0,0 +1,22 @@
+"""Text normalisation for token indexes (in-room message search)."""
+import re
+import unicodedata
+from typing import List
+
+_WORD = re.compile(r"\w+")
+MIN_TOKEN_LENGTH = 2
+MAX_TOKENS = 200
+
+
+def normalize(text: str) -> str:
+    """Case-folded text without accents ("Çalışma" -> "calisma")."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).replace("ı", "i")
+
+
+def tokenize(text: str) -> List[str]:
+    """Distinct searchable tokens of ``text`` in order of first appearance."""
+    tokens = dict.fromkeys(
+        token for token in _WORD.findall(normalize(text or "")) if len(token) >= MIN_TOKEN_LENGTH
+    )
+    return list(tokens)[:MAX_TOKENS]
@@ -0,0 +1,207 @@
+"""Streaming image uploads.
+
+The multipart request body is parsed while it arrives, using
+python-multipart's push parser, so an upload never holds more than one
+network chunk in memory. The ``file`` part is written to a temporary file
+in its destination directory:
+
+- the size limit is checked per chunk, so an oversized upload is rejected
+  as soon as it passes the limit (or up front from Content-Length)
+- the type is sniffed from the file's first bytes; the Content-Type the
+  client declares is ignored
+- disk I/O runs in the threadpool, never on the event loop
+
+A complete upload is published with an atomic ``os.replace``, so readers
+never see a partial file. Rejected or interrupted uploads leave nothing
+behind. Errors are raised as ValueError for the router to map to 400.
+"""
+import os
+import tempfile
+from typing import List, Optional
+
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from .config import settings
+
+FILE_FIELD = "file"
+CONTENT_TYPE_EXT = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+# Bytes needed to tell every supported format apart
+SNIFF_BYTES = 12
+# Room for multipart boundaries and part headers when checking Content-Length
+MULTIPART_OVERHEAD = 16 * 1024
+
+INVALID_TYPE = "Invalid file type. Allowed: JPEG, PNG, WebP, GIF"
+
+# OpenAPI description of the multipart body the upload routes parse themselves
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": [FILE_FIELD],
+            "properties": {FILE_FIELD: {"type": "string", "format": "binary"}},
+        }}},
+    }
+}
+
+
+def sniff_image(head: bytes) -> Optional[str]:
+    """Content type of an image from its leading bytes (magic numbers); None when unsupported"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def max_upload_bytes() -> int:
+    return int(settings.max_upload_size_mb * 1024 * 1024)
+
+
+class _ImageSink:
+    """Receives the file part chunk by chunk and publishes it under ``stem`` plus the sniffed extension."""
+
+    def __init__(self, directory: str, stem: str, max_bytes: int):
+        self.directory = directory
+        self.stem = stem
+        self.max_bytes = max_bytes
+        self.received = 0
+        self.head = b""
+        self.content_type: Optional[str] = None
+        self._tmp = None
+
+    def _sniff(self) -> None:
+        self.content_type = sniff_image(self.head)
+        if self.content_type is None:
+            raise ValueError(INVALID_TYPE)
+
+    async def write(self, data: bytes) -> None:
+        self.received += len(data)
+        if self.received > self.max_bytes:
+            raise ValueError(f"File too large. Maximum size is {settings.max_upload_size_mb} MB")
+        if self.content_type is None:
+            self.head += data[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES:
+                self._sniff()
+        if self._tmp is None:
+            self._tmp = await run_in_threadpool(
+                tempfile.NamedTemporaryFile, dir=self.directory, prefix=".upload-", suffix=".part", delete=False
+            )
+        await run_in_threadpool(self._tmp.write, data)
+
+    async def publish(self) -> str:
+        """Move the complete file into place; returns its filename"""
+        if self.received == 0:
+            raise ValueError("Empty file is not allowed")
+        if self.content_type is None:
+            self._sniff()
+        filename = f"{self.stem}{CONTENT_TYPE_EXT[self.content_type]}"
+        tmp, self._tmp = self._tmp, None
+        await run_in_threadpool(_close_and_replace, tmp, os.path.join(self.directory, filename))
+        return filename
+
+    async def discard(self) -> None:
+        if self._tmp is not None:
+            tmp, self._tmp = self._tmp, None
+            await run_in_threadpool(_close_and_remove, tmp)
+
+
+def _close_and_replace(tmp, path: str) -> None:
+    tmp.close()
+    os.replace(tmp.name, path)
+
+
+def _close_and_remove(tmp) -> None:
+    tmp.close()
+    try:
+        os.unlink(tmp.name)
+    except FileNotFoundError:
+        pass
+
+
+def upload_directory(subdir: str) -> str:
+    base = os.path.abspath(settings.upload_dir)
+    directory = os.path.abspath(os.path.join(base, subdir))
+    # Prevent path traversal
+    if not directory.startswith(base + os.sep):
+        raise ValueError("Invalid path")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+async def receive_image(request: Request, subdir: str, stem: str) -> str:
+    """Stream the request's ``file`` part into upload_dir/subdir; returns its URL path (/uploads/...)"""
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise ValueError("Expected a multipart/form-data upload")
+    max_bytes = max_upload_bytes()
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes + MULTIPART_OVERHEAD:
+        raise ValueError(f"File too large. Maximum size is {settings.max_upload_size_mb} MB")
+
+    sink = _ImageSink(await run_in_threadpool(upload_directory, subdir), stem, max_bytes)
+    pending: List[bytes] = []
+    state = {"header_name": b"", "header_value": b"", "disposition": b"", "in_file": False, "seen_file": False}
+
+    def on_part_begin():
+        state.update(disposition=b"", in_file=False)
+
+    def on_header_field(data, start, end):
+        state["header_name"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        if state["header_name"].lower() == b"content-disposition":
+            state["disposition"] = state["header_value"]
+        state.update(header_name=b"", header_value=b"")
+
+    def on_headers_finished():
+        _, options = parse_options_header(state["disposition"])
+        # Only the first file part named "file" is kept; other fields are skipped
+        is_file = options.get(b"name") == FILE_FIELD.encode() and b"filename" in options
+        state["in_file"] = is_file and not state["seen_file"]
+        state["seen_file"] = state["seen_file"] or is_file
+
+    def on_part_data(data, start, end):
+        if state["in_file"]:
+            pending.append(data[start:end])
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+    })
+    try:
+        async for chunk in request.stream():
+            try:
+                parser.write(chunk)
+            except Exception:
+                raise ValueError("Invalid multipart body")
+            if pending:
+                data = b"".join(pending)
+                pending.clear()
+                await sink.write(data)
+        parser.finalize()
+        if not state["seen_file"]:
+            raise ValueError("No file uploaded")
+        filename = await sink.publish()
+    finally:
+        await sink.discard()
+    return f"/uploads/{subdir}/{filename}"
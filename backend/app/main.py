@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 from fastapi import FastAPI
@@ -6,8 +7,16 @@ from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 
 from .core.config import settings
-from .core.database import connect_to_mongo, close_mongo_connection
-from .api import auth, users, services, admin, comments, join_requests, transactions, chat, wikidata, ratings, forum, upload
+from .core.database import connect_to_mongo, close_mongo_connection, get_database
+from .core.cache import close_cache_backend
+from .core.pubsub import close_broker
+from .services.message_buffer import close_message_buffer
+from .services.message_archive_service import run_archiver
+from .services.image_service import close_image_pool
+from .core.compression import CompressionMiddleware
+from .core.negotiation import ContentNegotiationMiddleware
+from .core.responses import ORJSONResponse
+from .api import auth, users, services, admin, comments, join_requests, transactions, chat, wikidata, ratings, forum, upload, me, sync
 
 logging.basicConfig(
     level=logging.INFO,
@@ -25,17 +34,25 @@ async def lifespan(app: FastAPI):
     for sub in ("profile", "services"):
         path = os.path.join(upload_dir, sub)
         os.makedirs(path, exist_ok=True)
+    archiver = asyncio.create_task(run_archiver(get_database())) if settings.chat_archive_enabled else None
     logger.info("Application startup complete")
     yield
     # Shutdown
+    if archiver is not None:
+        archiver.cancel()
+    await close_message_buffer()
     await close_mongo_connection()
+    await close_cache_backend()
+    await close_broker()
+    close_image_pool()
     logger.info("Application shutdown complete")
 
 app = FastAPI(
     title=settings.app_name,
     description="A community-oriented service exchange platform",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
@@ -47,6 +64,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Serve MessagePack to clients that prefer it (Accept: application/msgpack)
+app.add_middleware(ContentNegotiationMiddleware)
+
+# Compress large textual responses for clients that accept it
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_min_size,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
+)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -60,6 +88,8 @@ app.include_router(wikidata.router)
 app.include_router(ratings.router)
 app.include_router(forum.router)
 app.include_router(upload.router)
+app.include_router(me.router)
+app.include_router(sync.router)
 
 # Ensure upload directory exists before mounting (StaticFiles requires it at init)
 upload_dir = settings.upload_dir
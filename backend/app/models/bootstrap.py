@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+from .user import UserResponse, TimeBankResponse
+from .chat import ChatRoomListResponse
+from .join_request import JoinRequestListResponse
+
+
+class BootstrapResponse(BaseModel):
+    """Everything the app loads at startup (GET /me/bootstrap)"""
+    user: UserResponse
+    timebank: TimeBankResponse
+    badges: dict
+    saved_service_ids: List[str] = Field(default_factory=list)
+    chat_rooms: ChatRoomListResponse
+    join_requests: JoinRequestListResponse
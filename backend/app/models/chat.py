@@ -49,6 +49,9 @@ class ChatRoomResponse(ChatRoomBase):
     services: Optional[List[dict]] = None  # Populated with service info (multiple services)
     service: Optional[dict] = None  # For backward compatibility (first service)
     transaction: Optional[dict] = None  # Populated with transaction info
+    last_message: Optional[dict] = None  # Denormalized preview of the latest message
+    unread_count: int = 0  # For the requesting user
+    last_read_message_id: Optional[str] = None  # For the requesting user
 
     class Config:
         populate_by_name = True
@@ -88,6 +91,7 @@ class MessageResponse(MessageBase):
     room_id: PyObjectId
     sender_id: PyObjectId
     reply_to_message_id: Optional[PyObjectId] = None
+    seq: Optional[int] = None  # Position in the room's message order
     is_edited: bool = False
     is_deleted: bool = False
     created_at: datetime
@@ -109,6 +113,36 @@ class MessageListResponse(BaseModel):
     limit: int
 
 
+class MessageSearchHit(BaseModel):
+    """Search hit: the message and how many distinct query words it contains"""
+    message: MessageResponse
+    score: int
+
+
+class MessageSearchResponse(BaseModel):
+    """In-room search results, best first"""
+    hits: List[MessageSearchHit]
+    next_cursor: Optional[str] = None
+
+
+class MarkReadRequest(BaseModel):
+    """Mark-read request model (omit message_id to read up to the latest message)"""
+    message_id: Optional[PyObjectId] = None
+
+
+class MarkReadResponse(BaseModel):
+    """Mark-read response model"""
+    room_id: str
+    unread_count: int
+
+
+class MessageCursorResponse(BaseModel):
+    """Message window around a before/after cursor, oldest first"""
+    messages: List[MessageResponse]
+    has_more: bool
+    limit: int
+
+
 class ChatRoomParticipant(BaseModel):
     """Chat room participant model"""
     user_id: PyObjectId
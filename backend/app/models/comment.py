@@ -15,6 +15,10 @@ def validate_object_id(v):
 PyObjectId = Annotated[str, BeforeValidator(validate_object_id)]
 
 
+# Author fields fetched for comment listings
+COMMENT_AUTHOR_PROJECTION = {"username": 1, "full_name": 1, "profile_picture": 1, "profile_picture_variants": 1}
+
+
 class CommentBase(BaseModel):
     content: str = Field(..., min_length=1, max_length=1000)
     service_id: PyObjectId
@@ -39,7 +43,7 @@ class CommentResponse(CommentBase):
     user_id: PyObjectId
     created_at: datetime
     updated_at: datetime
-    user: Optional[dict] = None  # Will be populated with user info
+    user: Optional[dict] = None  # Author summary: _id, username, full_name, profile_picture(_variants)
 
     class Config:
         populate_by_name = True
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, BeforeValidator, model_validator
-from typing import Optional, List, Annotated, Union
+from typing import Any, Dict, Optional, List, Annotated, Union
 from datetime import datetime
 from bson import ObjectId
 from enum import Enum
@@ -191,6 +191,8 @@ class ServiceResponse(ServiceBase):
     completed_at: Optional[datetime] = None
     matched_user_ids: List[PyObjectId] = Field(default_factory=list)
     receiver_confirmed_ids: Optional[List[PyObjectId]] = Field(default_factory=list)
+    # Per image_urls entry: thumb/card/full URLs (WebP + fallback) and a blur placeholder; None until processed
+    image_variants: List[Optional[dict]] = Field(default_factory=list)
 
     class Config:
         populate_by_name = True
@@ -208,6 +210,60 @@ class ServiceListResponse(BaseModel):
         json_encoders = {ObjectId: str}
 
 
+# Characters of description kept in the card view
+CARD_DESCRIPTION_LENGTH = 200
+
+# Fields fetched from MongoDB for the card view
+SERVICE_CARD_PROJECTION = {
+    "title": 1, "description": 1, "category": 1, "tags": 1, "service_type": 1, "status": 1,
+    "estimated_duration": 1, "location": 1, "is_remote": 1, "user_id": 1, "image_urls": 1,
+    "image_url": 1, "image_variants": 1, "deadline": 1, "max_participants": 1, "matched_user_ids": 1, "created_at": 1,
+}
+
+
+class ServiceCardResponse(BaseModel):
+    """Slim service for list cards (``view=card``): tag labels only, truncated description, first image"""
+    id: PyObjectId = Field(alias="_id")
+    title: str
+    description: str
+    category: Optional[str] = None
+    tags: List[str] = Field(default_factory=list)
+    service_type: ServiceType
+    status: ServiceStatus = ServiceStatus.ACTIVE
+    estimated_duration: float
+    location: Location
+    is_remote: Optional[bool] = False
+    user_id: PyObjectId
+    image_url: Optional[str] = None
+    image_variants: Optional[dict] = None  # Variants of image_url (see ServiceResponse.image_variants)
+    deadline: Optional[datetime] = None
+    max_participants: int = 1
+    participant_count: int = 0
+    created_at: datetime
+
+    class Config:
+        populate_by_name = True
+
+
+class ServiceCardListResponse(BaseModel):
+    services: List[ServiceCardResponse]
+    total: int
+    page: int
+    limit: int
+
+
+class ServiceSparseListResponse(BaseModel):
+    """``fields=`` listing: each service has ``_id`` plus the requested ServiceResponse fields"""
+    services: List[Dict[str, Any]]
+    total: int
+    page: int
+    limit: int
+
+
+# Shapes of GET /services and /services/saved: full (default), view=card or fields=
+ServiceListingResponse = Union[ServiceListResponse, ServiceCardListResponse, ServiceSparseListResponse]
+
+
 class ServiceFilters(BaseModel):
     service_type: Optional[ServiceType] = None
     category: Optional[str] = None
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+
+from .service import ServiceResponse
+from .comment import CommentResponse
+from .forum import ForumEventResponse
+from .join_request import JoinRequestResponse
+
+
+class ServiceDetailViewResponse(BaseModel):
+    """Everything the service detail screen renders (GET /services/{id}/view)"""
+    service: ServiceResponse
+    participants: List[dict] = Field(default_factory=list)
+    comments: List[CommentResponse] = Field(default_factory=list)
+    comment_total: int = 0
+    linked_events: List[ForumEventResponse] = Field(default_factory=list)
+    linked_event_total: int = 0
+    # Viewer-specific sections; None for anonymous requests
+    pending_request: Optional[JoinRequestResponse] = None
+    is_saved: Optional[bool] = None
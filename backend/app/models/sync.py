@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class SyncSection(BaseModel):
+    """Changes of one entity kind since the previous sync token"""
+    created: List[str] = Field(default_factory=list)
+    updated: List[str] = Field(default_factory=list)
+    deleted: List[str] = Field(default_factory=list)
+    items: List[dict] = Field(default_factory=list)  # Compact documents of created + updated entities
+
+
+class SyncResponse(BaseModel):
+    token: str  # Pass as ?since= on the next call
+    full: bool = False  # True when this is a full snapshot (no token, or token older than tombstone retention); its has_more pages are deltas
+    has_more: bool = False  # A section hit sync_max_items; call again with the new token right away
+    services: SyncSection = Field(default_factory=SyncSection)
+    saved_services: SyncSection = Field(default_factory=SyncSection)
+    chat_rooms: SyncSection = Field(default_factory=SyncSection)
+    messages: SyncSection = Field(default_factory=SyncSection)
+    transactions: SyncSection = Field(default_factory=SyncSection)
+    join_requests: SyncSection = Field(default_factory=SyncSection)
@@ -88,6 +88,8 @@ class UserLogin(BaseModel):
 
 class UserResponse(UserBase):
     id: PyObjectId = Field(alias="_id")
+    # thumb/card/full URLs (WebP + fallback) and a blur placeholder; None until processed
+    profile_picture_variants: Optional[dict] = None
     timebank_balance: float = 0.0
     created_at: datetime
     updated_at: datetime
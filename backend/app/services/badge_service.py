@@ -136,8 +136,10 @@ class BadgeService:
             "has_profile_picture": has_profile_picture,
         }
 
-    async def evaluate_badges(self, user_id: str) -> List[dict]:
-        user_doc = await self.db.users.find_one({"_id": ObjectId(user_id)})
+    async def evaluate_badges(self, user_id: str, user_doc: Optional[dict] = None) -> List[dict]:
+        """Badge progress for a user; pass ``user_doc`` when the caller already loaded it."""
+        if user_doc is None:
+            user_doc = await self.db.users.find_one({"_id": ObjectId(user_id)})
         if not user_doc:
             raise ValueError("User not found")
 
@@ -164,8 +166,8 @@ class BadgeService:
 
         return badges
 
-    async def get_badge_summary(self, user_id: str) -> dict:
-        badges = await self.evaluate_badges(user_id)
+    async def get_badge_summary(self, user_id: str, user_doc: Optional[dict] = None) -> dict:
+        badges = await self.evaluate_badges(user_id, user_doc)
         earned_count = sum(1 for b in badges if b["earned"])
         return {
             "badges": badges,
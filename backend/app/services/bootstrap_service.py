@@ -0,0 +1,53 @@
+"""Startup payload for the mobile app (GET /me/bootstrap).
+
+The app used to call /auth/me, /users/timebank, /users/badges,
+/services/saved/ids, /chat/rooms and /join-requests/my-requests on cold start,
+each repeating the token decode and user lookup. Here every section runs
+concurrently against the one user document resolved by the auth dependency.
+"""
+import asyncio
+
+from ..models.bootstrap import BootstrapResponse
+from ..models.chat import ChatRoomListResponse
+from ..models.join_request import JoinRequestListResponse
+from ..models.user import UserResponse
+from ..core.config import settings
+from .badge_service import BadgeService
+from .chat_service import ChatService
+from .join_request_service import JoinRequestService
+from .service_service import ServiceService
+from .user_service import UserService
+
+
+class BootstrapService:
+    def __init__(self, db):
+        self.db = db
+
+    async def _chat_rooms(self, user_id: str) -> ChatRoomListResponse:
+        limit = settings.bootstrap_chat_room_limit
+        rooms, total = await ChatService(self.db).get_user_chat_rooms(user_id, 1, limit)
+        return ChatRoomListResponse(rooms=rooms, total=total, page=1, limit=limit)
+
+    async def _join_requests(self, user_id: str) -> JoinRequestListResponse:
+        limit = settings.bootstrap_join_request_limit
+        requests, total = await JoinRequestService(self.db).get_user_requests(user_id, 1, limit)
+        return JoinRequestListResponse(requests=requests, total=total, page=1, limit=limit)
+
+    async def get_bootstrap(self, user: UserResponse) -> BootstrapResponse:
+        """All startup sections for an authenticated user (first page of rooms and requests)"""
+        user_id = str(user.id)
+        timebank, badges, saved_service_ids, chat_rooms, join_requests = await asyncio.gather(
+            UserService(self.db).get_timebank_balance(user_id, user),
+            BadgeService(self.db).get_badge_summary(user_id, user.model_dump()),
+            ServiceService(self.db).get_saved_service_ids(user_id),
+            self._chat_rooms(user_id),
+            self._join_requests(user_id),
+        )
+        return BootstrapResponse(
+            user=user,
+            timebank=timebank,
+            badges=badges,
+            saved_service_ids=saved_service_ids,
+            chat_rooms=chat_rooms,
+            join_requests=join_requests,
+        )
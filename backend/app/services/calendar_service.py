@@ -0,0 +1,207 @@
+"""iCalendar feeds: public forum events and a user's own schedule.
+
+Feeds are streamed straight from cursors ordered by an index: forum events
+by ``event_at``, services by ``specific_date`` (recurring services, which
+have none, come first). Each feed's ETag is derived from the count and
+latest ``updated_at`` of the documents in it, and for a user's feed also
+from their attendance records. Every write that adds an item to a feed
+stamps a new ``updated_at``, and every removal lowers a count, so an
+unchanged ETag means an unchanged feed. Those figures come from one
+aggregation per collection, so a poll answered with 304 renders nothing.
+
+Services with a specific date are single events. A date without a time is
+an all-day event. Recurring services become weekly RRULEs that start on the
+first matching day after the service was created and stop at its deadline.
+Service times have no time zone and are written as floating times. Forum
+events are stored in UTC.
+"""
+import hashlib
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Optional
+
+from bson import ObjectId
+
+from ..core import ical
+from ..core.config import settings
+
+SCHEDULED_STATUSES = ["active", "in_progress"]
+
+# Components per streamed chunk
+_CHUNK_SIZE = 50
+
+
+def _horizon() -> datetime:
+    return datetime.utcnow() - timedelta(days=settings.calendar_feed_past_days)
+
+
+def forum_event_component(doc: dict) -> str:
+    stamp = doc.get("updated_at") or doc.get("created_at") or doc["event_at"]
+    properties = [
+        ("UID", f"forum-event-{doc['_id']}@hive"),
+        ("DTSTAMP", ical.utc(stamp)),
+        ("LAST-MODIFIED", ical.utc(stamp)),
+        ("DTSTART", ical.utc(doc["event_at"])),
+        ("SUMMARY", ical.text(doc.get("title"))),
+        ("DESCRIPTION", ical.text(doc.get("description")) if doc.get("description") else None),
+        ("LOCATION", ical.text(doc.get("location")) if doc.get("location") else None),
+    ]
+    if doc.get("latitude") is not None and doc.get("longitude") is not None:
+        properties.append(("GEO", f"{doc['latitude']};{doc['longitude']}"))
+    labels = [ical.text(tag.get("label")) for tag in doc.get("tags") or [] if isinstance(tag, dict) and tag.get("label")]
+    if labels:
+        properties.append(("CATEGORIES", ",".join(labels)))
+    return ical.component("VEVENT", properties)
+
+
+def _service_start(doc: dict) -> Optional[tuple]:
+    """(DTSTART property, RRULE or None, whether it has a time); None when the schedule is unusable"""
+    try:
+        if doc.get("scheduling_type") == "specific":
+            start_day = datetime.strptime(doc.get("specific_date") or "", "%Y-%m-%d")
+            at, rule_days = doc.get("specific_time"), None
+        else:
+            pattern = doc.get("recurring_pattern") or {}
+            rule_days = pattern.get("days") or []
+            if not ical.weekly_rule(rule_days):
+                return None
+            created = doc.get("created_at") or datetime.utcnow()
+            start_day = datetime.combine(created.date(), datetime.min.time())
+            wanted = {ical.WEEKDAYS[d.lower()] for d in rule_days if isinstance(d, str) and d.lower() in ical.WEEKDAYS}
+            codes = list(ical.WEEKDAYS.values())
+            while codes[start_day.weekday()] not in wanted:
+                start_day += timedelta(days=1)
+            at = pattern.get("time")
+        if at:
+            start = datetime.combine(start_day.date(), datetime.strptime(at, "%H:%M").time())
+            dtstart = ("DTSTART", ical.floating(start))
+        else:
+            start = None
+            dtstart = ("DTSTART;VALUE=DATE", ical.day(start_day))
+    except ValueError:
+        return None
+
+    rule = None
+    if rule_days is not None:
+        until = None
+        if doc.get("deadline"):
+            # UNTIL takes the value type of DTSTART (floating or date)
+            until = ical.floating(doc["deadline"]) if start else ical.day(doc["deadline"])
+        rule = ical.weekly_rule(rule_days, until)
+    return dtstart, rule, start is not None
+
+
+def service_component(doc: dict) -> Optional[str]:
+    """VEVENT for a service with a specific date or weekly pattern (None for open scheduling)"""
+    schedule = _service_start(doc)
+    if schedule is None:
+        return None
+    dtstart, rule, timed = schedule
+    stamp = doc.get("updated_at") or doc.get("created_at") or datetime.utcnow()
+    location = doc.get("location") or {}
+    properties = [
+        ("UID", f"service-{doc['_id']}@hive"),
+        ("DTSTAMP", ical.utc(stamp)),
+        ("LAST-MODIFIED", ical.utc(stamp)),
+        dtstart,
+        ("DURATION", ical.duration(doc["estimated_duration"]) if timed and doc.get("estimated_duration") else None),
+        ("RRULE", rule),
+        ("SUMMARY", ical.text(doc.get("title"))),
+        ("DESCRIPTION", ical.text(doc.get("description")) if doc.get("description") else None),
+    ]
+    if doc.get("is_remote"):
+        properties.append(("LOCATION", "Remote"))
+    elif isinstance(location, dict) and location.get("address"):
+        properties.append(("LOCATION", ical.text(location["address"])))
+    return ical.component("VEVENT", properties)
+
+
+class CalendarService:
+    def __init__(self, db):
+        self.db = db
+        self.events = db.forum_events
+        self.attendance = db.event_attendance
+        self.services = db.services
+
+    async def _fingerprint(self, collection, query: dict, stamp_field: str = "updated_at") -> str:
+        rows = await collection.aggregate([
+            {"$match": query},
+            {"$group": {"_id": None, "count": {"$sum": 1}, "last": {"$max": f"${stamp_field}"}}},
+        ]).to_list(length=1)
+        if not rows:
+            return "0"
+        return f"{rows[0]['count']}@{rows[0]['last']}"
+
+    @staticmethod
+    def _etag(*parts: str) -> str:
+        return 'W/"' + hashlib.sha1("|".join(parts).encode()).hexdigest() + '"'
+
+    async def _stream(self, name: str, cursors: List[tuple]) -> AsyncIterator[str]:
+        """The calendar with one VEVENT per document of each (cursor, renderer), in order"""
+        yield ical.calendar_start(name)
+        chunk: List[str] = []
+        for cursor, render in cursors:
+            async for doc in cursor:
+                rendered = render(doc)
+                if rendered:
+                    chunk.append(rendered)
+                if len(chunk) >= _CHUNK_SIZE:
+                    yield "".join(chunk)
+                    chunk = []
+        chunk.append(ical.calendar_end())
+        yield "".join(chunk)
+
+    # ---- Forum events ----
+
+    def _forum_query(self) -> dict:
+        return {"event_at": {"$gte": _horizon()}}
+
+    async def forum_feed_etag(self) -> str:
+        return self._etag("forum", await self._fingerprint(self.events, self._forum_query()))
+
+    def stream_forum_feed(self) -> AsyncIterator[str]:
+        """Upcoming forum events (and those of the last ``calendar_feed_past_days``), soonest first"""
+        cursor = self.events.find(self._forum_query()).sort("event_at", 1)
+        return self._stream(f"{settings.app_name} events", [(cursor, forum_event_component)])
+
+    # ---- A user's calendar ----
+
+    async def _user_queries(self, user_id: str) -> tuple:
+        uid = ObjectId(user_id)
+        rows = await self.attendance.find({"user_id": uid}, {"event_id": 1}).to_list(length=None)
+        attending = [ObjectId(str(row["event_id"])) for row in rows]
+        event_query = {
+            "$or": [{"_id": {"$in": attending}}, {"user_id": uid}],
+            "event_at": {"$gte": _horizon()},
+        }
+        service_query = {
+            "$and": [
+                {"$or": [{"user_id": uid}, {"matched_user_ids": uid}]},
+                {"$or": [
+                    {"scheduling_type": "recurring"},
+                    {"scheduling_type": "specific", "specific_date": {"$gte": _horizon().strftime("%Y-%m-%d")}},
+                ]},
+            ],
+            "status": {"$in": SCHEDULED_STATUSES},
+        }
+        return event_query, service_query
+
+    async def user_feed_etag(self, user_id: str) -> str:
+        event_query, service_query = await self._user_queries(user_id)
+        return self._etag(
+            "user",
+            user_id,
+            await self._fingerprint(self.attendance, {"user_id": ObjectId(user_id)}, "created_at"),
+            await self._fingerprint(self.events, event_query),
+            await self._fingerprint(self.services, service_query),
+        )
+
+    async def stream_user_feed(self, user_id: str) -> AsyncIterator[str]:
+        """Forum events the user attends or organises, then their scheduled services"""
+        event_query, service_query = await self._user_queries(user_id)
+        events = self.events.find(event_query).sort("event_at", 1)
+        services = self.services.find(service_query).sort("specific_date", 1)
+        async for chunk in self._stream(
+            f"My {settings.app_name} calendar",
+            [(events, forum_event_component), (services, service_component)],
+        ):
+            yield chunk
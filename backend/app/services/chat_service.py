@@ -1,14 +1,53 @@
 from typing import List, Optional, Tuple
-from datetime import datetime
+import asyncio
+import base64
+from datetime import datetime, timedelta
 from bson import ObjectId
+from pymongo import ReturnDocument
+import orjson
 
 from ..models.chat import (
     ChatRoomCreate, ChatRoomUpdate, ChatRoomResponse, 
     MessageCreate, MessageUpdate, MessageResponse,
     ChatRoomParticipant
 )
+from ..core.config import settings
 from ..core.database import get_database
+from ..core.serialization import trusted_reader
+from ..core.text import tokenize
+from ..core.pubsub import get_broker, publish, room_channel, user_channel
 from .content_moderation_service import is_offensive
+from .message_archive_service import MessageArchiveService
+from .message_buffer import ACK_PERSISTED, get_message_buffer, room_touch_update
+
+# Attempts of mark_room_read while messages keep arriving
+_MARK_READ_ATTEMPTS = 5
+
+
+class MessageArchivedError(ValueError):
+    """The message has moved to the archive, where it can be deleted but not edited"""
+
+
+def apply_viewer_state(room_doc: dict, viewer_id: str) -> dict:
+    """Expose the viewer's own unread count and read marker from the per-user maps"""
+    room_doc["unread_count"] = (room_doc.get("unread_counts") or {}).get(viewer_id, 0)
+    marker = (room_doc.get("read_markers") or {}).get(viewer_id) or {}
+    if marker.get("message_id"):
+        room_doc["last_read_message_id"] = str(marker["message_id"])
+    return room_doc
+
+
+def _encode_search_cursor(score: int, message_id) -> str:
+    return base64.urlsafe_b64encode(f"{score}:{message_id}".encode()).decode().rstrip("=")
+
+
+def _decode_search_cursor(cursor: str) -> Tuple[int, ObjectId]:
+    try:
+        score, _, message_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().partition(":")
+        return int(score), ObjectId(message_id)
+    except Exception:
+        raise ValueError("Invalid search cursor")
+
 
 class ChatService:
     def __init__(self, db):
@@ -18,6 +57,7 @@ class ChatService:
         self.users_collection = db.users
         self.services_collection = db.services
         self.transactions_collection = db.transactions
+        self.archive_service = MessageArchiveService(db)
 
     async def create_chat_room(self, room_data: ChatRoomCreate, creator_id: str) -> ChatRoomResponse:
         """Create a new chat room"""
@@ -79,59 +119,81 @@ class ChatService:
             
             result = await self.chat_rooms_collection.insert_one(room_doc)
             room_doc["_id"] = result.inserted_id
+
+            # Open WebSocket connections of the participants subscribe to the new room
+            event = {"type": "room.created", "room_id": str(result.inserted_id)}
+            await asyncio.gather(*(publish(user_channel(pid), event) for pid in participant_ids))
             
             return await self._populate_room_response(room_doc)
         except Exception as e:
             raise ValueError(f"Error creating chat room: {str(e)}, {participant_ids}")
 
-    async def _populate_room_response(self, room_doc: dict) -> ChatRoomResponse:
+    async def _populate_room_response(self, room_doc: dict, viewer_id: Optional[str] = None) -> ChatRoomResponse:
         """Helper method to populate room response with participants, services, and transaction"""
-        # Populate participants
-        participants = []
-        for participant_id in room_doc.get("participant_ids", []):
-            user = await self.users_collection.find_one({"_id": participant_id})
-            if user:
-                participants.append({
+        return (await self._populate_room_responses([room_doc], viewer_id))[0]
+
+    async def _docs_by_id(self, collection, ids: set, projection: dict) -> dict:
+        if not ids:
+            return {}
+        cursor = collection.find({"_id": {"$in": list(ids)}}, projection)
+        return {str(doc["_id"]): doc async for doc in cursor}
+
+    async def _populate_room_responses(self, room_docs: List[dict], viewer_id: Optional[str] = None) -> List[ChatRoomResponse]:
+        """Populate a page of rooms, fetching participants, services and transactions once per collection"""
+        user_ids, service_ids, transaction_ids = set(), set(), set()
+        for room_doc in room_docs:
+            room_service_ids = room_doc.get("service_ids") or []
+            # Handle backward compatibility: if service_id exists but not in service_ids
+            if room_doc.get("service_id") and room_doc["service_id"] not in room_service_ids:
+                room_service_ids = [*room_service_ids, room_doc["service_id"]]
+            room_doc["service_ids"] = room_service_ids
+            user_ids.update(ObjectId(str(pid)) for pid in room_doc.get("participant_ids", []))
+            service_ids.update(ObjectId(str(sid)) for sid in room_service_ids)
+            if room_doc.get("transaction_id"):
+                transaction_ids.add(ObjectId(str(room_doc["transaction_id"])))
+
+        users, services, transactions = await asyncio.gather(
+            self._docs_by_id(self.users_collection, user_ids, {"username": 1, "full_name": 1, "bio": 1}),
+            self._docs_by_id(self.services_collection, service_ids, {"title": 1, "description": 1, "category": 1}),
+            self._docs_by_id(self.transactions_collection, transaction_ids, {"status": 1, "hours": 1}),
+        )
+
+        rooms = []
+        for room_doc in room_docs:
+            if viewer_id:
+                apply_viewer_state(room_doc, viewer_id)
+            room_doc["participants"] = [
+                {
                     "id": str(user["_id"]),
                     "username": user["username"],
                     "full_name": user.get("full_name"),
                     "bio": user.get("bio")
-                })
-        room_doc["participants"] = participants
-        
-        # Populate services (multiple services support)
-        services = []
-        service_ids = room_doc.get("service_ids", [])
-        # Handle backward compatibility: if service_id exists but not in service_ids
-        if room_doc.get("service_id") and room_doc["service_id"] not in service_ids:
-            service_ids.append(room_doc["service_id"])
-        
-        for service_id in service_ids:
-            service = await self.services_collection.find_one({"_id": service_id})
-            if service:
-                services.append({
+                }
+                for user in (users.get(str(pid)) for pid in room_doc.get("participant_ids", []))
+                if user
+            ]
+            room_doc["services"] = [
+                {
                     "id": str(service["_id"]),
                     "title": service["title"],
                     "description": service.get("description"),
                     "category": service.get("category")
-                })
-        
-        room_doc["services"] = services
-        # For backward compatibility, set first service as service
-        if services:
-            room_doc["service"] = services[0]
-        
-        # Populate transaction if exists
-        if room_doc.get("transaction_id"):
-            transaction = await self.transactions_collection.find_one({"_id": room_doc["transaction_id"]})
+                }
+                for service in (services.get(str(sid)) for sid in room_doc["service_ids"])
+                if service
+            ]
+            # For backward compatibility, set first service as service
+            if room_doc["services"]:
+                room_doc["service"] = room_doc["services"][0]
+            transaction = transactions.get(str(room_doc.get("transaction_id")))
             if transaction:
                 room_doc["transaction"] = {
                     "id": str(transaction["_id"]),
                     "status": transaction.get("status"),
                     "hours": transaction.get("hours")
                 }
-        
-        return ChatRoomResponse(**room_doc)
+            rooms.append(ChatRoomResponse(**room_doc))
+        return rooms
 
     async def get_user_chat_rooms(self, user_id: str, page: int = 1, limit: int = 20) -> Tuple[List[ChatRoomResponse], int]:
         """Get chat rooms for a specific user with pagination"""
@@ -145,9 +207,7 @@ class ChatService:
             skip = (page - 1) * limit
             cursor = self.chat_rooms_collection.find(query).skip(skip).limit(limit).sort("last_message_at", -1)
             
-            rooms = []
-            async for room_doc in cursor:
-                rooms.append(await self._populate_room_response(room_doc))
+            rooms = await self._populate_room_responses(await cursor.to_list(length=limit), user_id)
             
             return rooms, total
         except Exception as e:
@@ -165,7 +225,7 @@ class ChatService:
             if not room_doc:
                 return None
             
-            return await self._populate_room_response(room_doc)
+            return await self._populate_room_response(room_doc, user_id)
         except Exception:
             return None
 
@@ -199,49 +259,156 @@ class ChatService:
         except Exception as e:
             raise ValueError(f"Error updating chat room: {str(e)}")
 
-    async def send_message(self, message_data: MessageCreate, sender_id: str) -> MessageResponse:
-        """Send a message to a chat room"""
+    async def send_message(self, message_data: MessageCreate, sender_id: str, ack: str = ACK_PERSISTED) -> MessageResponse:
+        """Send a message to a chat room
+
+        ``ack`` only matters with write-behind enabled (see message_buffer):
+        "persisted" returns after the batched write, "accepted" once queued.
+        """
         try:
-            # Verify sender is a participant in the room
-            room = await self.chat_rooms_collection.find_one({
-                "_id": ObjectId(message_data.room_id),
-                "participant_ids": ObjectId(sender_id),
-                "is_active": True
-            })
+            if message_data.message_type == "text" and is_offensive(message_data.content):
+                raise ValueError("Message contains offensive language")
+
+            room_filter = {"_id": ObjectId(message_data.room_id), "participant_ids": ObjectId(sender_id), "is_active": True}
+            buffer = get_message_buffer()
+            if buffer is not None:
+                # Verify sender is a participant; the buffer numbers the message when it flushes
+                room = await self.chat_rooms_collection.find_one(room_filter, {"participant_ids": 1})
+            else:
+                # Verify sender is a participant and take the message's place in the room's order
+                room = await self.chat_rooms_collection.find_one_and_update(
+                    room_filter,
+                    {"$inc": {"message_seq": 1}},
+                    projection={"participant_ids": 1, "message_seq": 1},
+                    return_document=ReturnDocument.AFTER,
+                )
             
             if not room:
                 raise ValueError("Chat room not found or user not authorized")
 
-            if message_data.message_type == "text" and is_offensive(message_data.content):
-                raise ValueError("Message contains offensive language")
-
-            # Create message document
+            # Create message document (created before its seq is taken only with write-behind, see _stop_at_pending)
             message_doc = {
                 **message_data.dict(),
                 "room_id": ObjectId(message_data.room_id),
                 "sender_id": ObjectId(sender_id),
+                "seq": room.get("message_seq"),
                 "reply_to_message_id": ObjectId(message_data.reply_to_message_id) if message_data.reply_to_message_id else None,
                 "is_edited": False,
                 "is_deleted": False,
+                "search_tokens": tokenize(message_data.content),
                 "created_at": datetime.utcnow(),
                 "updated_at": datetime.utcnow()
             }
             
+            if buffer is not None:
+                # Write-behind: the id is assigned now, the seq and insert come with the room's next batch.
+                # message.created goes out once the message is stored, even with ack=accepted.
+                message_doc["_id"] = ObjectId()
+                await buffer.add(
+                    self.messages_collection, self.chat_rooms_collection, room, message_doc, ack,
+                    on_written=lambda: self._publish_message_event("message.created", MessageResponse(**message_doc)),
+                )
+                # Numbered once persisted; an accepted message has no seq yet
+                return MessageResponse(**message_doc)
+
             result = await self.messages_collection.insert_one(message_doc)
             message_doc["_id"] = result.inserted_id
-            
-            # Update room's last_message_at
+            # Denormalize the preview and bump the other participants' unread counters
             await self.chat_rooms_collection.update_one(
                 {"_id": ObjectId(message_data.room_id)},
-                {"$set": {"last_message_at": datetime.utcnow(), "updated_at": datetime.utcnow()}}
+                room_touch_update(room.get("participant_ids", []), [message_doc])
             )
             
-            return MessageResponse(**message_doc)
+            message = MessageResponse(**message_doc)
+            await self._publish_message_event("message.created", message)
+            return message
         except Exception as e:
             raise ValueError(f"Error sending message: {str(e)}")
 
+    async def _publish_message_event(self, event_type: str, message: MessageResponse) -> None:
+        """Push a message to the room's WebSocket subscribers"""
+        await publish(room_channel(message.room_id), {
+            "type": event_type,
+            "room_id": message.room_id,
+            "message": message.model_dump(mode="json", by_alias=True),
+        })
+
+    async def get_active_room_ids(self, user_id: str) -> List[str]:
+        """IDs of the active rooms a user participates in"""
+        cursor = self.chat_rooms_collection.find(
+            {"participant_ids": ObjectId(user_id), "is_active": True}, {"_id": 1}
+        )
+        return [str(doc["_id"]) async for doc in cursor]
+
+    async def is_room_participant(self, room_id: str, user_id: str) -> bool:
+        room = await self.chat_rooms_collection.find_one(
+            {"_id": ObjectId(room_id), "participant_ids": ObjectId(user_id), "is_active": True}, {"_id": 1}
+        )
+        return room is not None
+
+    async def mark_room_read(self, room_id: str, user_id: str, message_id: Optional[str] = None) -> int:
+        """Move the user's read marker and return the room's remaining unread count.
+
+        Without ``message_id`` everything up to the latest message is read. An
+        older ``message_id`` leaves the messages after it from others unread.
+        The update only applies if no message arrived since the room was read
+        (its unread ``$inc`` would be overwritten); otherwise the count is redone
+        with those messages left unread.
+        """
+        if message_id is not None and not ObjectId.is_valid(message_id):
+            raise ValueError("Invalid message id")
+        if not ObjectId.is_valid(room_id):
+            raise ValueError("Chat room not found or user not authorized")
+        room_oid = ObjectId(room_id)
+        marker_doc = None
+        for _ in range(_MARK_READ_ATTEMPTS):
+            room = await self.chat_rooms_collection.find_one(
+                {"_id": room_oid, "participant_ids": ObjectId(user_id), "is_active": True},
+                {"last_message": 1}
+            )
+            if not room:
+                raise ValueError("Chat room not found or user not authorized")
+
+            last_message_id = (room.get("last_message") or {}).get("id")
+            if message_id is None and last_message_id:
+                # "Everything" is what the room held when the request arrived; later messages stay unread
+                message_id = str(last_message_id)
+            if message_id is None or str(message_id) == str(last_message_id):
+                marker, unread = last_message_id, 0
+            else:
+                marker = ObjectId(message_id)
+                if marker_doc is None:
+                    marker_doc = await self.messages_collection.find_one({"_id": marker, "room_id": room_oid}, {"seq": 1})
+                    if not marker_doc:
+                        raise ValueError("Message not found in this room")
+                unread = await self.messages_collection.count_documents({
+                    "room_id": room_oid,
+                    "seq": {"$gt": marker_doc["seq"]},
+                    "sender_id": {"$ne": ObjectId(user_id)},
+                    "is_deleted": False,
+                })
+
+            now = datetime.utcnow()
+            result = await self.chat_rooms_collection.update_one(
+                # Unchanged since read: a message sent meanwhile moves last_message with its $inc
+                {"_id": room_oid, "last_message.id": last_message_id},
+                {"$set": {
+                    f"unread_counts.{user_id}": unread,
+                    f"read_markers.{user_id}": {"message_id": ObjectId(str(marker)) if marker else None, "read_at": now},
+                    # Delta sync (/sync) delivers the new read state to the user's other devices
+                    "updated_at": now,
+                }}
+            )
+            if result.matched_count:
+                break
+        else:
+            raise ValueError("Chat room is busy, please try again")
+        # The user's other connected devices clear their badge
+        await publish(user_channel(user_id), {"type": "room.read", "room_id": room_id, "unread_count": unread})
+        return unread
+
     async def get_room_messages(self, room_id: str, user_id: str, page: int = 1, limit: int = 50) -> Tuple[List[MessageResponse], int]:
-        """Get messages for a chat room (only if user is a participant)"""
+        """Get a page of a room's messages, newest first, archived ones included (only if user is a participant)"""
         try:
             # Verify user is a participant
             room = await self.chat_rooms_collection.find_one({
@@ -253,39 +420,237 @@ class ChatService:
             if not room:
                 raise ValueError("Chat room not found or user not authorized")
             
-            query = {"room_id": ObjectId(room_id), "is_deleted": False}
-            total = await self.messages_collection.count_documents(query)
+            # Archived messages are all older than the hot ones and continue the pages after them
+            room_oid = ObjectId(room_id)
+            query = {"room_id": room_oid, "is_deleted": False}
+            hot_total = await self.messages_collection.count_documents(query)
+            total = hot_total + await self.archive_service.count(room_oid)
             
             skip = (page - 1) * limit
-            cursor = self.messages_collection.find(query).skip(skip).limit(limit).sort("created_at", -1)
-            
-            messages = []
-            async for message_doc in cursor:
-                # Populate sender info
-                sender = await self.users_collection.find_one({"_id": message_doc["sender_id"]})
-                if sender:
-                    message_doc["sender"] = {
-                        "id": str(sender["_id"]),
-                        "username": sender["username"],
-                        "full_name": sender.get("full_name")
-                    }
-                
-                # Populate reply to message if exists
-                if message_doc.get("reply_to_message_id"):
-                    reply_message = await self.messages_collection.find_one({"_id": message_doc["reply_to_message_id"]})
-                    if reply_message:
-                        message_doc["reply_to_message"] = {
-                            "id": str(reply_message["_id"]),
-                            "content": reply_message["content"][:100] + "..." if len(reply_message["content"]) > 100 else reply_message["content"],
-                            "sender": message_doc.get("sender", {}).get("username", "Unknown")
-                        }
-                
-                messages.append(MessageResponse(**message_doc))
+            docs = []
+            if skip < hot_total:
+                cursor = self.messages_collection.find(query).sort("seq", -1).skip(skip).limit(limit)
+                docs = await cursor.to_list(length=limit)
+            if len(docs) < limit:
+                docs += await self.archive_service.read_page(room_oid, max(skip - hot_total, 0), limit - len(docs))
+            messages = await self._hydrate_messages(docs)
             
             return messages, total
         except Exception as e:
             raise ValueError(f"Error fetching room messages: {str(e)}")
 
+    async def _hydrate_messages(self, message_docs: List[dict]) -> List[MessageResponse]:
+        """Attach sender and reply previews, resolving users and replies with one query each"""
+        sender_ids = {ObjectId(str(doc["sender_id"])) for doc in message_docs}
+        reply_ids = {ObjectId(str(doc["reply_to_message_id"])) for doc in message_docs if doc.get("reply_to_message_id")}
+        senders = {}
+        if sender_ids:
+            cursor = self.users_collection.find(
+                {"_id": {"$in": list(sender_ids)}}, {"username": 1, "full_name": 1}
+            )
+            senders = {str(user["_id"]): user async for user in cursor}
+        replies = {}
+        if reply_ids:
+            cursor = self.messages_collection.find({"_id": {"$in": list(reply_ids)}}, {"content": 1})
+            replies = {str(reply["_id"]): reply async for reply in cursor}
+            missing = {rid for rid in reply_ids if str(rid) not in replies}
+            if missing:
+                replies.update(await self.archive_service.get_messages_by_ids(missing))
+
+        messages = []
+        for message_doc in message_docs:
+            sender = senders.get(str(message_doc["sender_id"]))
+            if sender:
+                message_doc["sender"] = {
+                    "id": str(sender["_id"]),
+                    "username": sender["username"],
+                    "full_name": sender.get("full_name")
+                }
+            reply_message = replies.get(str(message_doc.get("reply_to_message_id")))
+            if reply_message:
+                message_doc["reply_to_message"] = {
+                    "id": str(reply_message["_id"]),
+                    "content": reply_message["content"][:100] + "..." if len(reply_message["content"]) > 100 else reply_message["content"],
+                    "sender": message_doc.get("sender", {}).get("username", "Unknown")
+                }
+            messages.append(trusted_reader(MessageResponse).build(message_doc))
+        return messages
+
+    async def _cursor_seq(self, room_id: ObjectId, message_id: str) -> int:
+        """Position in the room's order of the message a cursor names"""
+        message_doc = await self.messages_collection.find_one({"_id": ObjectId(message_id), "room_id": room_id}, {"seq": 1})
+        if message_doc is None:
+            message_doc = (await self.archive_service.get_messages_by_ids([message_id])).get(message_id)
+            if message_doc is not None and str(message_doc["room_id"]) != str(room_id):
+                message_doc = None
+        if message_doc is None or message_doc.get("seq") is None:
+            raise ValueError("Invalid message cursor")
+        return message_doc["seq"]
+
+    async def _stop_at_pending(self, room_id: ObjectId, docs: List[dict], floor: Optional[int]) -> List[dict]:
+        """``docs`` (oldest first) up to the first seq above ``floor`` that is taken but not written yet.
+
+        A seq is taken before its message is written (with write-behind, when the
+        batch is flushed, at most a flush interval after the message was created),
+        so a newer message can become readable before an older one. A client that moved its cursor past the newer one would never
+        see the older. Every seq below a message created more than
+        ``chat_sequence_grace_seconds`` ago is written or lost for good, so only
+        the recent end of a window is checked, with one query on seqs alone
+        (deleted messages fill their place too).
+        """
+        settled_before = datetime.utcnow() - timedelta(seconds=settings.chat_sequence_grace_seconds)
+        for doc in docs:
+            if doc["created_at"] <= settled_before:
+                floor = doc["seq"] if floor is None else max(floor, doc["seq"])
+        if floor is None:
+            floor = docs[0]["seq"]
+        if docs[-1]["seq"] <= floor:
+            return docs
+        high = docs[-1]["seq"]
+        cursor = self.messages_collection.find({"room_id": room_id, "seq": {"$gt": floor, "$lte": high}}, {"seq": 1})
+        written = {doc["seq"] async for doc in cursor}
+        pending = next((seq for seq in range(floor + 1, high + 1) if seq not in written), None)
+        if pending is None:
+            return docs
+        return [doc for doc in docs if doc["seq"] < pending]
+
+    async def _message_window(
+        self, room_id: ObjectId, before: Optional[int], after: Optional[int], limit: int
+    ) -> Tuple[List[dict], bool]:
+        """Up to ``limit`` messages next to a seq cursor, oldest first, and whether more lie beyond them"""
+        query = {"room_id": room_id, "is_deleted": False}
+        if after is not None:
+            query["seq"] = {"$gt": after}
+            direction = 1
+        else:
+            if before is not None:
+                query["seq"] = {"$lt": before}
+            direction = -1
+        docs = await self.messages_collection.find(query).sort("seq", direction).limit(limit + 1).to_list(length=limit + 1)
+        # Archived messages are all older than the hot ones: they come first going forward,
+        # and going back they continue where the hot tier runs out
+        if after is not None:
+            archived = await self.archive_service.read_window(room_id, after=after, limit=limit + 1)
+            docs = archived + docs
+        elif len(docs) <= limit:
+            archived = await self.archive_service.read_window(room_id, before=before, limit=limit + 1 - len(docs))
+            docs = docs + archived
+        docs = list({doc["seq"]: doc for doc in docs}.values())[:limit + 1]
+        has_more = len(docs) > limit
+        docs = docs[:limit]
+        if direction == -1:
+            docs.reverse()
+        if before is None and docs:
+            # The window reaches the newest messages: hold back those behind a pending write
+            settled = await self._stop_at_pending(room_id, docs, after)
+            if len(settled) < len(docs) and after is not None:
+                has_more = True
+            docs = settled
+        return docs, has_more
+
+    async def get_messages_by_cursor(
+        self,
+        room_id: str,
+        user_id: str,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: int = 50,
+        wait: float = 0.0,
+    ) -> Tuple[List[MessageResponse], bool]:
+        """Messages around a message-id cursor, oldest first, with a ``has_more`` flag and no count.
+
+        Messages are ordered by their per-room ``seq``, not by id, so the order
+        is the order in which they took their place in the room. ``before``
+        pages back through history (``has_more``: older messages exist),
+        ``after`` fetches what is new since the last message the client read
+        (``has_more``: call again with the last returned id). Without either
+        the latest messages are returned. With ``after`` and ``wait`` > 0 the
+        call waits up to ``wait`` seconds for a new message when there is none
+        yet. Messages are only returned once every older one is written, so the
+        last message of a read is always a safe ``after`` cursor (the message
+        returned by a send is not).
+        """
+        if before and after:
+            raise ValueError("Use either before or after, not both")
+        for cursor_id in (before, after):
+            if cursor_id is not None and not ObjectId.is_valid(cursor_id):
+                raise ValueError("Invalid message cursor")
+        if not ObjectId.is_valid(room_id) or not await self.is_room_participant(room_id, user_id):
+            raise ValueError("Chat room not found or user not authorized")
+
+        room_oid = ObjectId(room_id)
+        before_seq = await self._cursor_seq(room_oid, before) if before else None
+        after_seq = await self._cursor_seq(room_oid, after) if after else None
+        if after_seq is None or wait <= 0:
+            docs, has_more = await self._message_window(room_oid, before_seq, after_seq, limit)
+            return await self._hydrate_messages(docs), has_more
+
+        # Long poll: subscribe before the first read so a message sent in between is not missed
+        subscription = get_broker().subscription()
+        try:
+            await subscription.subscribe(room_channel(room_id))
+            docs, has_more = await self._message_window(room_oid, None, after_seq, limit)
+            if not docs:
+                await self._wait_for_new_message(subscription, wait)
+                docs, has_more = await self._message_window(room_oid, None, after_seq, limit)
+        finally:
+            await subscription.close()
+        return await self._hydrate_messages(docs), has_more
+
+    async def search_room_messages(
+        self, room_id: str, user_id: str, q: str, limit: int = 20, cursor: Optional[str] = None
+    ) -> Tuple[List[Tuple[MessageResponse, int]], Optional[str]]:
+        """Messages of a room matching words of ``q``, best first, with the cursor of the next page.
+
+        A message scores one point per distinct query word it contains; ties
+        go to the newer message. Matching uses the (room_id, search_tokens)
+        index, so only hits are read. Archived messages are not searched.
+        """
+        tokens = tokenize(q)
+        if not tokens:
+            raise ValueError("Search query has no searchable words")
+        after = _decode_search_cursor(cursor) if cursor else None
+        if not ObjectId.is_valid(room_id) or not await self.is_room_participant(room_id, user_id):
+            raise ValueError("Chat room not found or user not authorized")
+
+        pipeline = [
+            {"$match": {"room_id": ObjectId(room_id), "search_tokens": {"$in": tokens}}},
+            {"$addFields": {"score": {"$size": {"$filter": {
+                "input": "$search_tokens", "as": "token", "cond": {"$in": ["$$token", tokens]}
+            }}}}},
+        ]
+        if after:
+            score, last_id = after
+            pipeline.append({"$match": {"$or": [
+                {"score": {"$lt": score}},
+                {"score": score, "_id": {"$lt": last_id}},
+            ]}})
+        pipeline += [
+            {"$sort": {"score": -1, "_id": -1}},
+            {"$limit": limit + 1},
+            {"$project": {"search_tokens": 0}},
+        ]
+        docs = await self.messages_collection.aggregate(pipeline).to_list(length=limit + 1)
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = _encode_search_cursor(docs[-1]["score"], docs[-1]["_id"])
+        scores = [doc.pop("score") for doc in docs]
+        messages = await self._hydrate_messages(docs)
+        return list(zip(messages, scores)), next_cursor
+
+    async def _wait_for_new_message(self, subscription, timeout: float) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                item = await asyncio.wait_for(subscription.get(), remaining)
+            except asyncio.TimeoutError:
+                return
+            # None: the subscription overflowed, so something surely happened
+            if item is None or orjson.loads(item[1]).get("type") == "message.created":
+                return
+
     async def update_message(self, message_id: str, update_data: MessageUpdate, user_id: str) -> Optional[MessageResponse]:
         """Update a message (only if user is the sender)"""
         try:
@@ -297,6 +662,9 @@ class ChatService:
             })
             
             if not message:
+                archived = (await self.archive_service.get_messages_by_ids([message_id])).get(message_id)
+                if archived and str(archived["sender_id"]) == user_id:
+                    raise MessageArchivedError("Archived messages cannot be edited")
                 raise ValueError("Message not found or user not authorized")
 
             if update_data.content is not None and is_offensive(update_data.content):
@@ -307,6 +675,8 @@ class ChatService:
                 return await self.get_message_by_id(message_id, user_id)
             
             update_doc["updated_at"] = datetime.utcnow()
+            if "content" in update_doc:
+                update_doc["search_tokens"] = tokenize(update_doc["content"])
             
             result = await self.messages_collection.update_one(
                 {"_id": ObjectId(message_id)},
@@ -314,13 +684,22 @@ class ChatService:
             )
             
             if result.modified_count > 0:
-                return await self.get_message_by_id(message_id, user_id)
+                updated = await self.get_message_by_id(message_id, user_id)
+                if updated:
+                    await self._publish_message_event("message.updated", updated)
+                return updated
             return None
+        except MessageArchivedError:
+            raise
         except Exception as e:
             raise ValueError(f"Error updating message: {str(e)}")
 
     async def delete_message(self, message_id: str, user_id: str) -> bool:
-        """Delete a message (soft delete, only if user is the sender)"""
+        """Delete a message (soft delete, only if user is the sender).
+
+        An archived message is removed from its bucket instead; a sync tombstone
+        tells the room's other devices, since no hot document is left to report it.
+        """
         try:
             # Verify user is the sender
             message = await self.messages_collection.find_one({
@@ -330,14 +709,32 @@ class ChatService:
             })
             
             if not message:
-                raise ValueError("Message not found or user not authorized")
-            
-            result = await self.messages_collection.update_one(
-                {"_id": ObjectId(message_id)},
-                {"$set": {"is_deleted": True, "updated_at": datetime.utcnow()}}
+                message = await self.archive_service.remove_message(message_id, user_id)
+                if not message:
+                    raise ValueError("Message not found or user not authorized")
+                from .sync_service import record_tombstone
+                room = await self.chat_rooms_collection.find_one({"_id": message["room_id"]}, {"participant_ids": 1})
+                await record_tombstone(self.db, "message", message_id, (room or {}).get("participant_ids", []))
+            else:
+                result = await self.messages_collection.update_one(
+                    {"_id": ObjectId(message_id)},
+                    # Deleted messages leave the search index
+                    {"$set": {"is_deleted": True, "updated_at": datetime.utcnow()}, "$unset": {"search_tokens": ""}}
+                )
+                if not result.modified_count:
+                    return False
+
+            # Blank the room preview if it showed this message
+            await self.chat_rooms_collection.update_one(
+                {"_id": ObjectId(str(message["room_id"])), "last_message.id": message_id},
+                {"$set": {"last_message.content": None, "last_message.is_deleted": True}}
             )
-            
-            return result.modified_count > 0
+            await publish(room_channel(message["room_id"]), {
+                "type": "message.deleted",
+                "room_id": str(message["room_id"]),
+                "message_id": message_id,
+            })
+            return True
         except Exception as e:
             raise ValueError(f"Error deleting message: {str(e)}")
 
@@ -348,6 +745,8 @@ class ChatService:
                 "_id": ObjectId(message_id),
                 "is_deleted": False
             })
+            if not message_doc:
+                message_doc = (await self.archive_service.get_messages_by_ids([message_id])).get(message_id)
             
             if not message_doc:
                 return None
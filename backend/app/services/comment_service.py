@@ -1,11 +1,33 @@
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from bson import ObjectId
 
-from ..models.comment import CommentCreate, CommentUpdate, CommentResponse
+from ..models.comment import CommentCreate, CommentUpdate, CommentResponse, COMMENT_AUTHOR_PROJECTION
 from ..core.database import get_database
 from .content_moderation_service import is_offensive
-from ..models.user import UserResponse
+
+
+def _service_comments_query(service_id: str) -> dict:
+    # service_id is stored as ObjectId by create_comment but as a string in older documents
+    return {
+        "$or": [
+            {"service_id": ObjectId(service_id)},
+            {"service_id": service_id}
+        ]
+    }
+
+
+def comment_author(user: dict) -> dict:
+    """Compact author summary embedded in each comment"""
+    return {
+        "_id": str(user["_id"]),
+        "username": user.get("username"),
+        "full_name": user.get("full_name"),
+        "profile_picture": user.get("profile_picture"),
+        "profile_picture_variants": user.get("profile_picture_variants"),
+    }
+
+
 class CommentService:
     def __init__(self, db):
         self.db = db
@@ -34,12 +56,7 @@ class CommentService:
             result = await self.comments_collection.insert_one(comment_doc)
             comment_doc["_id"] = result.inserted_id
             
-            # Get user info for the response (CommentResponse expects user as dict)
-            user = await self.users_collection.find_one({"_id": ObjectId(user_id)})
-            if user:
-                comment_doc["user"] = UserResponse(**user).model_dump()
-            
-            return CommentResponse(**comment_doc)
+            return (await self._hydrate([comment_doc]))[0]
         except Exception as e:
             raise ValueError(f"Error creating comment: {str(e)}")
 
@@ -47,12 +64,7 @@ class CommentService:
         """Get comments for a service with pagination"""
         try:
             # Build query - try both ObjectId and string formats
-            query = {
-                "$or": [
-                    {"service_id": ObjectId(service_id)},
-                    {"service_id": service_id}
-                ]
-            }
+            query = _service_comments_query(service_id)
 
             # Get total count
             total = await self.comments_collection.count_documents(query)
@@ -60,37 +72,50 @@ class CommentService:
             # Get comments with pagination
             skip = (page - 1) * limit
             cursor = self.comments_collection.find(query).skip(skip).limit(limit).sort("created_at", -1)
-            
+            comments = await self._hydrate(await cursor.to_list(length=limit))
 
-            print("Query:", {"service_id": ObjectId(service_id)})
-            print("Total:", total, "Page:", page, "Limit:", limit, "Skip:", skip, "Cursor:", cursor)
-
-            comments = []
-
-
-            async for comment_doc in cursor:
-                # Get user info for each comment (CommentResponse expects user as dict)
-                user = await self.users_collection.find_one({"_id": comment_doc["user_id"]})
-                if user:
-                    comment_doc["user"] = UserResponse(**user).model_dump()
-                
-                comments.append(CommentResponse(**comment_doc))
-            
             return comments, total
         except Exception as e:
             raise ValueError(f"Error fetching comments: {str(e)}")
 
+    async def find_service_comment_docs(self, service_id: str, limit: int) -> Tuple[List[dict], int]:
+        """Newest comment documents of a service (unenriched) and the total count"""
+        query = _service_comments_query(service_id)
+        docs = []
+        if limit:
+            cursor = self.comments_collection.find(query).sort("created_at", -1).limit(limit)
+            docs = await cursor.to_list(length=limit)
+        total = await self.comments_collection.count_documents(query)
+        return docs, total
+
+    async def _authors(self, user_ids) -> Dict[str, dict]:
+        """Author fields (COMMENT_AUTHOR_PROJECTION) of many users with one query, keyed by string id"""
+        object_ids = {ObjectId(str(uid)) for uid in user_ids if uid and ObjectId.is_valid(str(uid))}
+        if not object_ids:
+            return {}
+        cursor = self.users_collection.find({"_id": {"$in": list(object_ids)}}, COMMENT_AUTHOR_PROJECTION)
+        return {str(doc["_id"]): doc async for doc in cursor}
+
+    async def _hydrate(self, comment_docs: List[dict]) -> List[CommentResponse]:
+        users = await self._authors({doc.get("user_id") for doc in comment_docs})
+        return self.hydrate_comments(comment_docs, users)
+
+    def hydrate_comments(self, comment_docs: List[dict], users: Dict[str, dict]) -> List[CommentResponse]:
+        """CommentResponses with author summaries taken from prefetched user documents keyed by id"""
+        comments = []
+        for comment_doc in comment_docs:
+            user = users.get(str(comment_doc["user_id"]))
+            if user:
+                comment_doc["user"] = comment_author(user)
+            comments.append(CommentResponse(**comment_doc))
+        return comments
+
     async def get_comment_by_id(self, comment_id: str) -> Optional[CommentResponse]:
         """Get comment by ID"""
         try:
             comment_doc = await self.comments_collection.find_one({"_id": ObjectId(comment_id)})
             if comment_doc:
-                # Get user info (CommentResponse expects user as dict)
-                user = await self.users_collection.find_one({"_id": comment_doc["user_id"]})
-                if user:
-                    comment_doc["user"] = UserResponse(**user).model_dump()
-                
-                return CommentResponse(**comment_doc)
+                return (await self._hydrate([comment_doc]))[0]
             return None
         except Exception:
             return None
@@ -150,16 +175,8 @@ class CommentService:
             # Get comments with pagination
             skip = (page - 1) * limit
             cursor = self.comments_collection.find(query).skip(skip).limit(limit).sort("created_at", -1)
-            
-            comments = []
-            async for comment_doc in cursor:
-                # Get user info for each comment (CommentResponse expects user as dict)
-                user = await self.users_collection.find_one({"_id": comment_doc["user_id"]})
-                if user:
-                    comment_doc["user"] = UserResponse(**user).model_dump()
-                
-                comments.append(CommentResponse(**comment_doc))
-            
+            comments = await self._hydrate(await cursor.to_list(length=limit))
+
             return comments, total
         except Exception as e:
             raise ValueError(f"Error fetching user comments: {str(e)}")
@@ -1,7 +1,11 @@
-from typing import List, Optional, Tuple
+import asyncio
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
+from ..core import geo
+from ..models.comment import COMMENT_AUTHOR_PROJECTION
 from ..models.forum import (
     ForumDiscussionCreate, ForumDiscussionUpdate, ForumDiscussionResponse,
     ForumEventCreate, ForumEventUpdate, ForumEventResponse,
@@ -9,12 +13,74 @@ from ..models.forum import (
 )
 
 
+def _user_summary(user: dict) -> dict:
+    return {
+        "id": str(user["_id"]),
+        "username": user["username"],
+        "full_name": user.get("full_name"),
+        "profile_picture": user.get("profile_picture"),
+        "profile_picture_variants": user.get("profile_picture_variants"),
+    }
+
+
+SERVICE_SUMMARY_PROJECTION = {"title": 1, "service_type": 1}
+
+
+def _service_summary(svc: dict) -> dict:
+    return {
+        "id": str(svc["_id"]),
+        "title": svc.get("title"),
+        "service_type": svc.get("service_type"),
+    }
+
+
+def _object_ids(values) -> List[ObjectId]:
+    return list({v if isinstance(v, ObjectId) else ObjectId(str(v)) for v in values if v})
+
+
+def event_list_query(
+    tag: Optional[str] = None,
+    q: Optional[str] = None,
+    has_location: bool = False,
+    near: Optional[Tuple[float, float]] = None,
+    radius_km: Optional[float] = None,
+    bbox: Optional[geo.BoundingBox] = None,
+    upcoming: bool = False,
+) -> dict:
+    """Filter for the event list; the area and time filters are served by the (geo, event_at) index."""
+    if near is not None and bbox is not None:
+        raise ValueError("Use either near or bbox, not both")
+    query: dict = {}
+    if tag:
+        query["tags.label"] = tag
+    if q:
+        query["$or"] = [
+            {"title": {"$regex": q, "$options": "i"}},
+            {"description": {"$regex": q, "$options": "i"}},
+        ]
+    if near is not None:
+        if not radius_km or radius_km <= 0:
+            raise ValueError("radius_km is required with near")
+        query["geo"] = {"$geoWithin": geo.within_radius(near[0], near[1], radius_km)}
+    elif bbox is not None:
+        lat_min, lat_max, lon_min, lon_max = bbox
+        if lat_min >= lat_max or lon_min >= lon_max:
+            raise ValueError("Invalid bounding box")
+        query["geo"] = {"$geoWithin": geo.within_box(bbox)}
+    elif has_location:
+        query["geo"] = {"$ne": None}
+    if upcoming:
+        query["event_at"] = {"$gte": datetime.utcnow()}
+    return query
+
+
 class ForumService:
     def __init__(self, db):
         self.db = db
         self.discussions = db.forum_discussions
         self.events = db.forum_events
         self.forum_comments = db.forum_comments
+        self.attendance = db.event_attendance
         self.users = db.users
         self.services = db.services
 
@@ -26,12 +92,7 @@ class ForumService:
         if uid:
             user = await self.users.find_one({"_id": uid if isinstance(uid, ObjectId) else ObjectId(uid)})
             if user:
-                doc["user"] = {
-                    "id": str(user["_id"]),
-                    "username": user["username"],
-                    "full_name": user.get("full_name"),
-                    "profile_picture": user.get("profile_picture"),
-                }
+                doc["user"] = _user_summary(user)
         return doc
 
     async def _enrich_service(self, doc: dict) -> dict:
@@ -41,19 +102,53 @@ class ForumService:
             oid = sid if isinstance(sid, ObjectId) else ObjectId(sid)
             svc = await self.services.find_one({"_id": oid})
             if svc:
-                doc["service"] = {
-                    "id": str(svc["_id"]),
-                    "title": svc.get("title"),
-                    "service_type": svc.get("service_type"),
-                }
+                doc["service"] = _service_summary(svc)
         return doc
 
-    async def _comment_count(self, target_type: str, target_id) -> int:
-        oid = target_id if isinstance(target_id, ObjectId) else ObjectId(str(target_id))
-        return await self.forum_comments.count_documents({
-            "target_type": target_type,
-            "$or": [{"target_id": oid}, {"target_id": str(oid)}],
-        })
+    async def _comment_counts(self, target_type: str, target_ids) -> Dict[str, int]:
+        """Comment counts for many targets with a single aggregation, keyed by string id."""
+        oids = _object_ids(target_ids)
+        if not oids:
+            return {}
+        pipeline = [
+            {"$match": {"target_type": target_type, "target_id": {"$in": oids + [str(o) for o in oids]}}},
+            {"$group": {"_id": "$target_id", "count": {"$sum": 1}}},
+        ]
+        counts: Dict[str, int] = {}
+        async for row in self.forum_comments.aggregate(pipeline):
+            key = str(row["_id"])
+            counts[key] = counts.get(key, 0) + row["count"]
+        return counts
+
+    def _target_collection(self, target_type: str):
+        return self.discussions if target_type == "discussion" else self.events
+
+    async def _bump_comment_count(self, target_type: str, target_id: ObjectId, delta: int) -> None:
+        """Apply a comment added/removed to the target's ``comment_count``.
+
+        Targets written before the counter existed have none; ``$inc`` would
+        create it from zero, so they get a recount instead.
+        """
+        collection = self._target_collection(target_type)
+        counted = {"_id": target_id, "comment_count": {"$exists": True}}
+        if delta < 0:
+            counted["comment_count"] = {"$gt": 0}
+        result = await collection.update_one(counted, {"$inc": {"comment_count": delta}})
+        if result.matched_count:
+            return
+        count = (await self._comment_counts(target_type, [target_id])).get(str(target_id), 0)
+        result = await collection.update_one(
+            {"_id": target_id, "comment_count": {"$exists": False}}, {"$set": {"comment_count": count}}
+        )
+        if not result.matched_count and delta > 0:
+            # Another request set the counter meanwhile
+            await collection.update_one({"_id": target_id}, {"$inc": {"comment_count": delta}})
+
+    async def _docs_by_id(self, collection, ids, projection: Optional[dict] = None) -> Dict[str, dict]:
+        oids = _object_ids(ids)
+        if not oids:
+            return {}
+        return {str(doc["_id"]): doc async for doc in collection.find({"_id": {"$in": oids}}, projection)}
 
     # ---- Discussions ----
 
@@ -61,13 +156,13 @@ class ForumService:
         doc = {
             **data.dict(),
             "user_id": ObjectId(user_id),
+            "comment_count": 0,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
         }
         result = await self.discussions.insert_one(doc)
         doc["_id"] = result.inserted_id
         doc = await self._enrich_user(doc)
-        doc["comment_count"] = 0
         return ForumDiscussionResponse(**doc)
 
     async def get_discussions(
@@ -86,20 +181,13 @@ class ForumService:
         skip = (page - 1) * limit
         cursor = self.discussions.find(query).sort("created_at", -1).skip(skip).limit(limit)
 
-        results = []
-        async for doc in cursor:
-            doc = await self._enrich_user(doc)
-            doc["comment_count"] = await self._comment_count("discussion", doc["_id"])
-            results.append(ForumDiscussionResponse(**doc))
-        return results, total
+        return await self.hydrate_discussions(await cursor.to_list(length=limit)), total
 
     async def get_discussion_by_id(self, discussion_id: str) -> Optional[ForumDiscussionResponse]:
         doc = await self.discussions.find_one({"_id": ObjectId(discussion_id)})
         if not doc:
             return None
-        doc = await self._enrich_user(doc)
-        doc["comment_count"] = await self._comment_count("discussion", doc["_id"])
-        return ForumDiscussionResponse(**doc)
+        return (await self.hydrate_discussions([doc]))[0]
 
     async def update_discussion(
         self, discussion_id: str, data: ForumDiscussionUpdate, user_id: str
@@ -131,11 +219,16 @@ class ForumService:
 
     # ---- Events ----
 
-    def _populate_attendee_fields(self, doc: dict) -> dict:
-        """Ensure attendee_ids / attendee_count are present on event docs."""
-        raw = doc.get("attendee_ids") or []
-        doc["attendee_ids"] = [str(aid) for aid in raw]
-        doc["attendee_count"] = len(doc["attendee_ids"])
+    def _populate_attendee_fields(self, doc: dict, attending: Optional[set] = None) -> dict:
+        """Fill attendee_count (and is_attending when the viewer is known) on an event doc.
+
+        Events written before the attendance collection kept an
+        ``attendee_ids`` array instead of a stored count.
+        """
+        if doc.get("attendee_count") is None:
+            doc["attendee_count"] = len(doc.get("attendee_ids") or [])
+        if attending is not None:
+            doc["is_attending"] = str(doc["_id"]) in attending
         return doc
 
     async def create_event(self, data: ForumEventCreate, user_id: str) -> ForumEventResponse:
@@ -148,7 +241,9 @@ class ForumService:
             doc["service_id"] = ObjectId(doc["service_id"])
         else:
             doc["service_id"] = None
-        doc["attendee_ids"] = []
+        doc["geo"] = geo.geojson_point(doc.get("latitude"), doc.get("longitude"))
+        doc["attendee_count"] = 0
+        doc["comment_count"] = 0
         doc["created_at"] = datetime.utcnow()
         doc["updated_at"] = datetime.utcnow()
 
@@ -156,8 +251,7 @@ class ForumService:
         doc["_id"] = result.inserted_id
         doc = await self._enrich_user(doc)
         doc = await self._enrich_service(doc)
-        doc["comment_count"] = 0
-        doc = self._populate_attendee_fields(doc)
+        doc = self._populate_attendee_fields(doc, attending=set())
         return ForumEventResponse(**doc)
 
     async def get_events(
@@ -167,41 +261,28 @@ class ForumService:
         tag: Optional[str] = None,
         q: Optional[str] = None,
         has_location: bool = False,
+        near: Optional[Tuple[float, float]] = None,
+        radius_km: Optional[float] = None,
+        bbox: Optional[geo.BoundingBox] = None,
+        upcoming: bool = False,
     ) -> Tuple[List[ForumEventResponse], int]:
-        query: dict = {}
-        if tag:
-            query["tags.label"] = tag
-        if q:
-            query["$or"] = [
-                {"title": {"$regex": q, "$options": "i"}},
-                {"description": {"$regex": q, "$options": "i"}},
-            ]
-        if has_location:
-            query["latitude"] = {"$ne": None}
-            query["longitude"] = {"$ne": None}
+        """Events, newest first; upcoming-only lists are soonest first.
 
+        ``near`` (latitude, longitude) with ``radius_km`` or ``bbox`` restrict
+        the list to events whose location lies in the area.
+        """
+        query = event_list_query(tag, q, has_location, near, radius_km, bbox, upcoming)
         total = await self.events.count_documents(query)
         skip = (page - 1) * limit
-        cursor = self.events.find(query).sort("event_at", -1).skip(skip).limit(limit)
+        cursor = self.events.find(query).sort("event_at", 1 if upcoming else -1).skip(skip).limit(limit)
 
-        results = []
-        async for doc in cursor:
-            doc = await self._enrich_user(doc)
-            doc = await self._enrich_service(doc)
-            doc["comment_count"] = await self._comment_count("event", doc["_id"])
-            doc = self._populate_attendee_fields(doc)
-            results.append(ForumEventResponse(**doc))
-        return results, total
+        return await self.hydrate_events(await cursor.to_list(length=limit)), total
 
-    async def get_event_by_id(self, event_id: str) -> Optional[ForumEventResponse]:
+    async def get_event_by_id(self, event_id: str, viewer_id: Optional[str] = None) -> Optional[ForumEventResponse]:
         doc = await self.events.find_one({"_id": ObjectId(event_id)})
         if not doc:
             return None
-        doc = await self._enrich_user(doc)
-        doc = await self._enrich_service(doc)
-        doc["comment_count"] = await self._comment_count("event", doc["_id"])
-        doc = self._populate_attendee_fields(doc)
-        return ForumEventResponse(**doc)
+        return (await self.hydrate_events([doc], viewer_id=viewer_id))[0]
 
     async def update_event(
         self, event_id: str, data: ForumEventUpdate, user_id: str
@@ -218,6 +299,11 @@ class ForumService:
             if not svc:
                 raise ValueError("Linked service not found")
             update_data["service_id"] = ObjectId(update_data["service_id"])
+        if "latitude" in update_data or "longitude" in update_data:
+            update_data["geo"] = geo.geojson_point(
+                update_data.get("latitude", existing.get("latitude")),
+                update_data.get("longitude", existing.get("longitude")),
+            )
         update_data["updated_at"] = datetime.utcnow()
         await self.events.update_one({"_id": ObjectId(event_id)}, {"$set": update_data})
         return await self.get_event_by_id(event_id)
@@ -234,10 +320,11 @@ class ForumService:
                 "target_type": "event",
                 "$or": [{"target_id": ObjectId(event_id)}, {"target_id": event_id}],
             })
+            await self.attendance.delete_many({"event_id": ObjectId(event_id)})
         return result.deleted_count > 0
 
-    async def get_events_for_service(self, service_id: str) -> List[ForumEventResponse]:
-        """Return all events linked to a given service (for ServiceDetail)."""
+    async def find_service_event_docs(self, service_id: str, limit: Optional[int] = None) -> Tuple[List[dict], int]:
+        """Raw events linked to a service, newest first (all of them when ``limit`` is None), and the total."""
         query = {
             "$or": [
                 {"service_id": ObjectId(service_id)},
@@ -245,53 +332,159 @@ class ForumService:
             ]
         }
         cursor = self.events.find(query).sort("event_at", -1)
-        results = []
-        async for doc in cursor:
-            doc = await self._enrich_user(doc)
-            doc = await self._enrich_service(doc)
-            doc["comment_count"] = await self._comment_count("event", doc["_id"])
-            doc = self._populate_attendee_fields(doc)
-            results.append(ForumEventResponse(**doc))
-        return results
+        if limit is None:
+            docs = await cursor.to_list(length=None)
+            return docs, len(docs)
+        docs = await cursor.limit(limit).to_list(length=limit) if limit else []
+        return docs, await self.events.count_documents(query)
+
+    async def _hydrate(
+        self,
+        docs: List[dict],
+        target_type: str,
+        users: Optional[Dict[str, dict]] = None,
+        services: Optional[Dict[str, dict]] = None,
+    ) -> List[dict]:
+        """Attach author/service summaries and comment counts with at most one query per kind.
+
+        Callers that already hold the user or service documents pass them in
+        (keyed by string id); only the missing ones are fetched. Comment counts
+        come from the stored ``comment_count``; documents written before it
+        existed are counted with one aggregation.
+        """
+        users = dict(users or {})
+        services = dict(services or {})
+        missing_users = {str(d["user_id"]) for d in docs if d.get("user_id")} - users.keys()
+        missing_services = {str(d["service_id"]) for d in docs if d.get("service_id")} - services.keys()
+        uncounted = [d["_id"] for d in docs if d.get("comment_count") is None]
+        fetched_users, fetched_services, counts = await asyncio.gather(
+            self._docs_by_id(self.users, missing_users, COMMENT_AUTHOR_PROJECTION),
+            self._docs_by_id(self.services, missing_services, SERVICE_SUMMARY_PROJECTION),
+            self._comment_counts(target_type, uncounted),
+        )
+        users.update(fetched_users)
+        services.update(fetched_services)
+
+        for doc in docs:
+            user = users.get(str(doc.get("user_id")))
+            if user:
+                doc["user"] = _user_summary(user)
+            svc = services.get(str(doc.get("service_id")))
+            if svc:
+                doc["service"] = _service_summary(svc)
+            if doc.get("comment_count") is None:
+                doc["comment_count"] = counts.get(str(doc["_id"]), 0)
+        return docs
+
+    async def hydrate_discussions(self, docs: List[dict]) -> List[ForumDiscussionResponse]:
+        return [ForumDiscussionResponse(**doc) for doc in await self._hydrate(docs, "discussion")]
+
+    async def hydrate_events(
+        self,
+        docs: List[dict],
+        users: Optional[Dict[str, dict]] = None,
+        services: Optional[Dict[str, dict]] = None,
+        viewer_id: Optional[str] = None,
+    ) -> List[ForumEventResponse]:
+        """Events with author/service summaries and comment counts (see ``_hydrate``).
+
+        With ``viewer_id`` each event also says whether that user attends it.
+        """
+        attending = None
+        if viewer_id:
+            attending = await self._attending_event_ids(viewer_id, [doc["_id"] for doc in docs])
+        docs = await self._hydrate(docs, "event", users, services)
+        return [ForumEventResponse(**self._populate_attendee_fields(doc, attending)) for doc in docs]
+
+    async def get_events_for_service(self, service_id: str) -> List[ForumEventResponse]:
+        """Return all events linked to a given service (for ServiceDetail)."""
+        docs, _ = await self.find_service_event_docs(service_id)
+        return await self.hydrate_events(docs)
 
     # ---- Attendance ----
 
+    async def _attending_event_ids(self, user_id: str, event_ids) -> set:
+        """String ids of the given events that the user attends."""
+        oids = _object_ids(event_ids)
+        if not oids:
+            return set()
+        cursor = self.attendance.find({"user_id": ObjectId(user_id), "event_id": {"$in": oids}}, {"event_id": 1})
+        return {str(doc["event_id"]) async for doc in cursor}
+
+    async def _load_attendance_event(self, oid: ObjectId) -> None:
+        """Check the event exists and move a not yet migrated ``attendee_ids`` array to event_attendance.
+
+        Events from before event_attendance (see migrations/migrate_event_attendance.py)
+        have no ``attendee_count``; an ``$inc`` would start it from zero and a
+        legacy attendee could not leave, so they are migrated on first change.
+        """
+        event = await self.events.find_one({"_id": oid}, {"attendee_ids": 1})
+        if not event:
+            raise ValueError("Event not found")
+        if "attendee_ids" not in event:
+            return
+        now = datetime.utcnow()
+        for uid in dict.fromkeys(ObjectId(str(uid)) for uid in event.get("attendee_ids") or []):
+            await self.attendance.update_one(
+                {"event_id": oid, "user_id": uid},
+                {"$setOnInsert": {"event_id": oid, "user_id": uid, "created_at": now}},
+                upsert=True,
+            )
+        count = await self.attendance.count_documents({"event_id": oid})
+        # A concurrent request that migrated first already stored the count
+        await self.events.update_one(
+            {"_id": oid, "attendee_ids": {"$exists": True}},
+            {"$set": {"attendee_count": count}, "$unset": {"attendee_ids": ""}},
+        )
+
     async def attend_event(self, event_id: str, user_id: str) -> ForumEventResponse:
         oid = ObjectId(event_id)
         uid = ObjectId(user_id)
-        doc = await self.events.find_one({"_id": oid})
-        if not doc:
-            raise ValueError("Event not found")
-        existing = [str(a) for a in (doc.get("attendee_ids") or [])]
-        if user_id in existing:
+        await self._load_attendance_event(oid)
+        try:
+            result = await self.attendance.update_one(
+                {"event_id": oid, "user_id": uid},
+                {"$setOnInsert": {"event_id": oid, "user_id": uid, "created_at": datetime.utcnow()}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # A concurrent request inserted the same (event_id, user_id) first
             raise ValueError("Already attending this event")
-        await self.events.update_one({"_id": oid}, {"$push": {"attendee_ids": uid}})
-        return await self.get_event_by_id(event_id)
+        if result.matched_count:
+            raise ValueError("Already attending this event")
+        await self.events.update_one({"_id": oid}, {"$inc": {"attendee_count": 1}})
+        return await self.get_event_by_id(event_id, viewer_id=user_id)
 
     async def unattend_event(self, event_id: str, user_id: str) -> ForumEventResponse:
         oid = ObjectId(event_id)
-        uid = ObjectId(user_id)
-        doc = await self.events.find_one({"_id": oid})
-        if not doc:
-            raise ValueError("Event not found")
-        await self.events.update_one({"_id": oid}, {"$pull": {"attendee_ids": uid}})
-        return await self.get_event_by_id(event_id)
+        await self._load_attendance_event(oid)
+        result = await self.attendance.delete_one({"event_id": oid, "user_id": ObjectId(user_id)})
+        if result.deleted_count:
+            await self.events.update_one(
+                {"_id": oid, "attendee_count": {"$gt": 0}}, {"$inc": {"attendee_count": -1}}
+            )
+        return await self.get_event_by_id(event_id, viewer_id=user_id)
 
-    async def get_event_attendees(self, event_id: str) -> list:
-        doc = await self.events.find_one({"_id": ObjectId(event_id)})
-        if not doc:
+    async def get_event_attendees(self, event_id: str, page: int = 1, limit: int = 50) -> list:
+        """One page of an event's attendees in the order they signed up."""
+        oid = ObjectId(event_id)
+        if not await self.events.find_one({"_id": oid}, {"_id": 1}):
             raise ValueError("Event not found")
-        attendee_ids = doc.get("attendee_ids") or []
+        cursor = self.attendance.find({"event_id": oid}, {"user_id": 1}).sort("created_at", 1)
+        rows = await cursor.skip((page - 1) * limit).limit(limit).to_list(length=limit)
+        users = await self._docs_by_id(
+            self.users, [row["user_id"] for row in rows], COMMENT_AUTHOR_PROJECTION
+        )
         attendees = []
-        for aid in attendee_ids:
-            uid = aid if isinstance(aid, ObjectId) else ObjectId(aid)
-            user = await self.users.find_one({"_id": uid})
+        for row in rows:
+            user = users.get(str(row["user_id"]))
             if user:
                 attendees.append({
                     "_id": str(user["_id"]),
                     "username": user["username"],
                     "full_name": user.get("full_name"),
                     "profile_picture": user.get("profile_picture"),
+                    "profile_picture_variants": user.get("profile_picture_variants"),
                 })
         return attendees
 
@@ -299,10 +492,7 @@ class ForumService:
 
     async def create_comment(self, data: ForumCommentCreate, user_id: str) -> ForumCommentResponse:
         target_id = ObjectId(data.target_id)
-        if data.target_type == "discussion":
-            target = await self.discussions.find_one({"_id": target_id})
-        else:
-            target = await self.events.find_one({"_id": target_id})
+        target = await self._target_collection(data.target_type).find_one({"_id": target_id}, {"_id": 1})
         if not target:
             raise ValueError(f"{data.target_type.capitalize()} not found")
 
@@ -316,6 +506,7 @@ class ForumService:
         }
         result = await self.forum_comments.insert_one(doc)
         doc["_id"] = result.inserted_id
+        await self._bump_comment_count(data.target_type, target_id, 1)
         doc = await self._enrich_user(doc)
         return ForumCommentResponse(**doc)
 
@@ -331,9 +522,15 @@ class ForumService:
         skip = (page - 1) * limit
         cursor = self.forum_comments.find(query).sort("created_at", -1).skip(skip).limit(limit)
 
+        docs = await cursor.to_list(length=limit)
+        users = await self._docs_by_id(
+            self.users, [doc.get("user_id") for doc in docs], COMMENT_AUTHOR_PROJECTION
+        )
         results = []
-        async for doc in cursor:
-            doc = await self._enrich_user(doc)
+        for doc in docs:
+            user = users.get(str(doc.get("user_id")))
+            if user:
+                doc["user"] = _user_summary(user)
             results.append(ForumCommentResponse(**doc))
         return results, total
 
@@ -361,4 +558,34 @@ class ForumService:
         if str(existing["user_id"]) != user_id:
             raise ValueError("Not authorized to delete this comment")
         result = await self.forum_comments.delete_one({"_id": ObjectId(comment_id)})
+        if result.deleted_count:
+            await self._bump_comment_count(existing["target_type"], ObjectId(str(existing["target_id"])), -1)
         return result.deleted_count > 0
+
+    async def reconcile_comment_counts(self) -> Dict[str, int]:
+        """Recount comments and fix drifted ``comment_count`` fields; returns fixes per target type.
+
+        The counters are maintained with ``$inc`` on comment create/delete (older
+        documents get a recount on their first comment change); this job repairs
+        them after partial failures and backfills the rest.
+        """
+        fixed: Dict[str, int] = {}
+        for target_type in ("discussion", "event"):
+            collection = self._target_collection(target_type)
+            counts: Dict[str, int] = {}
+            pipeline = [
+                {"$match": {"target_type": target_type}},
+                {"$group": {"_id": "$target_id", "count": {"$sum": 1}}},
+            ]
+            async for row in self.forum_comments.aggregate(pipeline):
+                key = str(row["_id"])
+                counts[key] = counts.get(key, 0) + row["count"]
+            fixed[target_type] = 0
+            async for doc in collection.find({}, {"comment_count": 1}):
+                actual = counts.get(str(doc["_id"]), 0)
+                if doc.get("comment_count") != actual:
+                    await collection.update_one(
+                        {"_id": ObjectId(str(doc["_id"]))}, {"$set": {"comment_count": actual}}
+                    )
+                    fixed[target_type] += 1
+        return fixed
@@ -0,0 +1,195 @@
+"""Image derivatives for uploaded profile pictures and service images.
+
+After an upload, a worker pool re-encodes the image into fixed sizes next
+to the original:
+
+- ``thumb``: 160 px square crop (avatars, map info windows)
+- ``card``: fits in 480 px (list cards)
+- ``full``: fits in 1280 px (detail pages)
+
+Each size is written as WebP, plus a JPEG fallback (PNG for images with
+transparency). The orientation is applied and metadata (EXIF, ICC) is not
+carried over. The manifest also holds a blurred ~16 px placeholder as a
+WebP data URI, for display until the real image loads.
+
+Manifests are kept in ``image_variants`` keyed by the original URL and
+copied onto the documents that show the image: ``image_variants`` on
+services, aligned with ``image_urls``, and ``profile_picture_variants`` on
+users. Reads therefore need no extra query. An image that is processed after
+it was attached is pushed to the documents that use it. Derivatives need the
+optional Pillow package. Without it (or with ``image_variants_enabled`` off)
+uploads are served at their original size, as before.
+"""
+import asyncio
+import base64
+import io
+import logging
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from bson import ObjectId
+
+from ..core.config import settings
+
+try:
+    from PIL import Image, ImageFilter, ImageOps
+except ImportError:  # optional dependency
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# name -> (edge in px, square crop)
+VARIANTS = {
+    "thumb": (160, True),
+    "card": (480, False),
+    "full": (1280, False),
+}
+PLACEHOLDER_EDGE = 16
+
+
+def _encode(image, path: str, fmt: str, quality: int) -> None:
+    if fmt == "WEBP":
+        image.save(path, fmt, quality=quality, method=4)
+    elif fmt == "JPEG":
+        image.save(path, fmt, quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(path, fmt, optimize=True)
+
+
+def derive_variants(path: str, quality: int) -> dict:
+    """Write the variants of the image at ``path`` beside it; returns sizes and file names (runs in a worker)"""
+    stem = os.path.splitext(path)[0]
+    with Image.open(path) as source:
+        source.seek(0)  # first frame of an animation
+        image = ImageOps.exif_transpose(source)
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    image.info = {}
+    fallback_format, fallback_ext = ("PNG", ".png") if has_alpha else ("JPEG", ".jpg")
+
+    derived = {"width": image.width, "height": image.height}
+    for name, (edge, square) in VARIANTS.items():
+        if square:
+            variant = ImageOps.fit(image, (edge, edge), Image.LANCZOS)
+        else:
+            variant = image.copy()
+            variant.thumbnail((edge, edge), Image.LANCZOS)
+        webp, fallback = f"{stem}_{name}.webp", f"{stem}_{name}{fallback_ext}"
+        _encode(variant, webp, "WEBP", quality)
+        _encode(variant, fallback, fallback_format, quality)
+        derived[name] = {
+            "webp": os.path.basename(webp),
+            "fallback": os.path.basename(fallback),
+            "width": variant.width,
+            "height": variant.height,
+        }
+
+    tiny = image.copy()
+    tiny.thumbnail((PLACEHOLDER_EDGE, PLACEHOLDER_EDGE))
+    buffer = io.BytesIO()
+    tiny.filter(ImageFilter.GaussianBlur(1)).save(buffer, "WEBP", quality=30)
+    derived["placeholder"] = "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode()
+    return derived
+
+
+def _manifest(url: str, derived: dict) -> dict:
+    """Derived file names turned into URLs beside ``url``"""
+    base = url.rsplit("/", 1)[0]
+    manifest = {"url": url, "width": derived["width"], "height": derived["height"], "placeholder": derived["placeholder"]}
+    for name in VARIANTS:
+        variant = derived[name]
+        manifest[name] = {
+            "webp": f"{base}/{variant['webp']}",
+            "fallback": f"{base}/{variant['fallback']}",
+            "width": variant["width"],
+            "height": variant["height"],
+        }
+    return manifest
+
+
+def upload_path(url: str) -> Optional[str]:
+    """Local file behind an /uploads/... URL (None for anything else)"""
+    prefix = "/uploads/"
+    if not url or not url.startswith(prefix):
+        return None
+    base = os.path.abspath(settings.upload_dir)
+    path = os.path.abspath(os.path.join(base, url[len(prefix):]))
+    return path if path.startswith(base + os.sep) else None
+
+
+_pool: Optional[Executor] = None
+
+
+def get_image_pool() -> Executor:
+    """Shared worker pool (processes; a single thread with image_worker_processes = 0)"""
+    global _pool
+    if _pool is None:
+        if settings.image_worker_processes > 0:
+            _pool = ProcessPoolExecutor(max_workers=settings.image_worker_processes)
+        else:
+            _pool = ThreadPoolExecutor(max_workers=1)
+    return _pool
+
+
+def close_image_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+class ImageService:
+    def __init__(self, db):
+        self.db = db
+        self.variants_collection = db.image_variants
+        self.services_collection = db.services
+        self.users_collection = db.users
+
+    async def process_upload(self, url: str) -> Optional[dict]:
+        """Derive the variants of an uploaded image and publish its manifest; None when skipped or failed"""
+        path = upload_path(url)
+        if Image is None or not settings.image_variants_enabled or path is None:
+            return None
+        loop = asyncio.get_running_loop()
+        try:
+            derived = await loop.run_in_executor(get_image_pool(), derive_variants, path, settings.image_webp_quality)
+        except Exception as e:
+            logger.error(f"Deriving image variants for {url} failed: {e}")
+            return None
+        manifest = _manifest(url, derived)
+        await self.variants_collection.update_one(
+            {"url": url}, {"$set": {**manifest, "created_at": datetime.utcnow()}}, upsert=True
+        )
+        await self.refresh_references(url, manifest)
+        return manifest
+
+    async def variants_by_url(self, urls: Iterable[str]) -> Dict[str, dict]:
+        """Manifests of the given image URLs with one query (unprocessed ones are left out)"""
+        wanted = list({url for url in urls if url})
+        if not wanted:
+            return {}
+        cursor = self.variants_collection.find({"url": {"$in": wanted}}, {"_id": 0, "created_at": 0})
+        return {doc["url"]: doc async for doc in cursor}
+
+    async def service_image_variants(self, image_urls: List[str]) -> List[Optional[dict]]:
+        """Manifests aligned with a service's image_urls (None where not processed yet)"""
+        manifests = await self.variants_by_url(image_urls or [])
+        return [manifests.get(url) for url in image_urls or []]
+
+    async def refresh_references(self, url: str, manifest: dict) -> None:
+        """Copy a new manifest onto the services and users already showing ``url``"""
+        from .service_service import invalidate_service_cache
+
+        now = datetime.utcnow()
+        async for service in self.services_collection.find({"image_urls": url}, {"image_urls": 1}):
+            variants = await self.service_image_variants(service["image_urls"])
+            service_id = ObjectId(str(service["_id"]))
+            await self.services_collection.update_one(
+                {"_id": service_id}, {"$set": {"image_variants": variants, "updated_at": now}}
+            )
+            await invalidate_service_cache(service_id)
+        await self.users_collection.update_many(
+            {"profile_picture": url}, {"$set": {"profile_picture_variants": manifest, "updated_at": now}}
+        )
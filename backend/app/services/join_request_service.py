@@ -214,6 +214,8 @@ class JoinRequestService:
                         "$set": {"updated_at": datetime.utcnow()}
                     }
                 )
+                from .service_service import invalidate_service_cache
+                await invalidate_service_cache(request_doc["service_id"])
                 
                 # Fetch updated service to verify the change
                 updated_service = await self.services_collection.find_one({"_id": request_doc["service_id"]})
@@ -0,0 +1,250 @@
+"""Cold archive of old chat messages.
+
+The ``messages`` collection is the hot tier: one document per message. Once
+messages are older than ``chat_archive_after_days``, the archiver packs them
+into ``message_archive`` buckets and removes them from the hot tier. A bucket
+holds at most ``chat_archive_bucket_size`` messages of one room from one UTC
+day, consecutive in the room's ``seq`` order. Its messages are stored as
+zlib-compressed BSON, so types round-trip exactly. The hot tier, its indexes and the working set then stay proportional
+to recent traffic instead of to the history of every room.
+
+Archived messages are served by the page and cursor reads of ChatService,
+which continue into the archive past the oldest hot message, and by message
+lookups by id. They cannot be edited, but their sender can still delete them:
+the bucket is rewritten without the message, guarded by a per-bucket
+``revision``. Soft-deleted messages are dropped when archived. A room is archived in ``_id``-ordered batches of a few buckets, so
+memory stays bounded however long its backlog. Archiving is idempotent:
+buckets are keyed by (room_id, first_id), their lowest message id, so a run interrupted between
+writing buckets and deleting the hot copies rewrites the same buckets next
+time.
+"""
+import asyncio
+import logging
+import zlib
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional
+
+import bson
+from bson import Binary, ObjectId
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CODEC = "bson+zlib"
+# Buckets' worth of hot messages read per archiving batch
+_BATCH_BUCKETS = 10
+# Rewrites of a bucket that lost a race with another rewrite before giving up
+_REWRITE_ATTEMPTS = 5
+
+
+def pack_messages(message_docs: List[dict]) -> Binary:
+    return Binary(zlib.compress(bson.encode({"m": message_docs})))
+
+
+def unpack_messages(bucket: dict) -> List[dict]:
+    """Messages of a bucket, oldest first"""
+    return bson.decode(zlib.decompress(bytes(bucket["payload"])))["m"]
+
+
+class MessageArchiveService:
+    def __init__(self, db):
+        self.db = db
+        self.messages_collection = db.messages
+        self.archive_collection = db.message_archive
+
+    async def archive_room(self, room_id, cutoff: datetime) -> int:
+        """Move a room's messages created before ``cutoff`` into archive buckets; returns how many were archived"""
+        room_oid = ObjectId(str(room_id))
+        query = {"room_id": room_oid, "created_at": {"$lt": cutoff}}
+        size = settings.chat_archive_bucket_size
+        batch_size = size * _BATCH_BUCKETS
+        archived = 0
+        while True:
+            docs = await self.messages_collection.find(query).sort("seq", 1).limit(batch_size).to_list(length=batch_size)
+            if not docs:
+                break
+            for doc in docs:
+                # Documents come back with the driver's types; normalise ids for BSON encoding
+                for key in ("_id", "room_id", "sender_id", "reply_to_message_id"):
+                    if doc.get(key) is not None:
+                        doc[key] = ObjectId(str(doc[key]))
+
+            full = len(docs) == batch_size
+            buckets = []
+            live = [doc for doc in docs if not doc.get("is_deleted")]
+            for _, day_docs in groupby(live, key=lambda doc: doc["created_at"].date()):
+                day_docs = list(day_docs)
+                buckets.extend(day_docs[start:start + size] for start in range(0, len(day_docs), size))
+            held = set()
+            if full and buckets and len(buckets[-1]) < size:
+                # The batch may have cut the last bucket short: leave it for the next batch
+                held = {doc["_id"] for doc in buckets.pop()}
+            for bucket in buckets:
+                await self._write_bucket(room_oid, bucket)
+
+            await self.messages_collection.delete_many({"_id": {"$in": [doc["_id"] for doc in docs if doc["_id"] not in held]}})
+            archived += sum(len(bucket) for bucket in buckets)
+            if not full:
+                break
+        return archived
+
+    @staticmethod
+    def _bucket_fields(message_docs: List[dict]) -> dict:
+        first, last = message_docs[0], message_docs[-1]
+        # Ids are not in seq order: the bucket records their range for lookups by id
+        ids = [doc["_id"] for doc in message_docs]
+        return {
+            "first_id": min(ids),
+            "last_id": max(ids),
+            "first_seq": first.get("seq"),
+            "last_seq": last.get("seq"),
+            "bucket_date": datetime.combine(first["created_at"].date(), datetime.min.time()),
+            "first_at": first["created_at"],
+            "last_at": last["created_at"],
+            "count": len(message_docs),
+            "codec": CODEC,
+            "payload": pack_messages(message_docs),
+        }
+
+    async def _write_bucket(self, room_id: ObjectId, message_docs: List[dict]) -> None:
+        fields = self._bucket_fields(message_docs)
+        first_id = fields.pop("first_id")
+        await self.archive_collection.update_one(
+            {"room_id": room_id, "first_id": first_id},
+            {"$set": {**fields, "archived_at": datetime.utcnow()}},
+            upsert=True,
+        )
+
+    async def remove_message(self, message_id, sender_id) -> Optional[dict]:
+        """Take a sender's archived message out of its bucket and return it (None if there is no such message)"""
+        mid, sender = ObjectId(str(message_id)), ObjectId(str(sender_id))
+        for _ in range(_REWRITE_ATTEMPTS):
+            cursor = self.archive_collection.find({"first_id": {"$lte": mid}, "last_id": {"$gte": mid}})
+            async for bucket in cursor:
+                message_docs = unpack_messages(bucket)
+                message = next((doc for doc in message_docs if doc["_id"] == mid), None)
+                if message is not None:
+                    break
+            else:
+                return None
+            if message["sender_id"] != sender:
+                return None
+
+            remaining = [doc for doc in message_docs if doc["_id"] != mid]
+            unchanged = {"_id": ObjectId(str(bucket["_id"])), "revision": bucket.get("revision")}
+            if remaining:
+                result = await self.archive_collection.update_one(
+                    unchanged, {"$set": self._bucket_fields(remaining), "$inc": {"revision": 1}}
+                )
+                done = result.matched_count
+            else:
+                done = (await self.archive_collection.delete_one(unchanged)).deleted_count
+            if done:
+                return message
+        raise ValueError("Archived messages are busy, please try again")
+
+    async def archive_old_messages(self, older_than_days: Optional[float] = None) -> int:
+        """Archive every room's messages older than ``older_than_days`` (default from settings)"""
+        if older_than_days is None:
+            older_than_days = settings.chat_archive_after_days
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        rooms = await self.messages_collection.aggregate([
+            {"$match": {"created_at": {"$lt": cutoff}}},
+            {"$group": {"_id": "$room_id"}},
+        ]).to_list(length=None)
+        archived = 0
+        for room in rooms:
+            archived += await self.archive_room(room["_id"], cutoff)
+        if archived:
+            logger.info(f"Archived {archived} chat messages from {len(rooms)} rooms")
+        return archived
+
+    async def count(self, room_id: ObjectId) -> int:
+        """Number of archived messages of a room"""
+        rows = await self.archive_collection.aggregate([
+            {"$match": {"room_id": room_id}},
+            {"$group": {"_id": None, "count": {"$sum": "$count"}}},
+        ]).to_list(length=1)
+        return rows[0]["count"] if rows else 0
+
+    async def read_page(self, room_id: ObjectId, skip: int, limit: int) -> List[dict]:
+        """Up to ``limit`` archived messages, newest first, after the ``skip`` newest ones.
+
+        Buckets before the page are skipped by their counts, without reading their payloads.
+        """
+        start, offset = None, skip
+        cursor = self.archive_collection.find({"room_id": room_id}, {"first_seq": 1, "count": 1}).sort("first_seq", -1)
+        async for bucket in cursor:
+            if offset < bucket["count"]:
+                start = bucket["first_seq"]
+                break
+            offset -= bucket["count"]
+        if start is None:
+            return []
+
+        messages: List[dict] = []
+        cursor = self.archive_collection.find({"room_id": room_id, "first_seq": {"$lte": start}}).sort("first_seq", -1)
+        async for bucket in cursor:
+            messages.extend(reversed(unpack_messages(bucket)))
+            if len(messages) >= offset + limit:
+                break
+        return messages[offset:offset + limit]
+
+    async def read_window(
+        self, room_id: ObjectId, before: Optional[int] = None, after: Optional[int] = None, limit: int = 50
+    ) -> List[dict]:
+        """Up to ``limit`` archived messages next to a seq cursor, nearest first.
+
+        With ``after`` that is ascending from the cursor, otherwise descending
+        from ``before`` (or from the newest archived message).
+        """
+        query: Dict = {"room_id": room_id}
+        if after is not None:
+            query["last_seq"] = {"$gt": after}
+            direction = 1
+        else:
+            if before is not None:
+                query["first_seq"] = {"$lt": before}
+            direction = -1
+
+        messages: List[dict] = []
+        cursor = self.archive_collection.find(query).sort("first_seq", direction)
+        async for bucket in cursor:
+            bucket_messages = unpack_messages(bucket)
+            if direction == 1:
+                messages.extend(doc for doc in bucket_messages if doc["seq"] > after)
+            else:
+                messages.extend(
+                    doc for doc in reversed(bucket_messages) if before is None or doc["seq"] < before
+                )
+            if len(messages) >= limit:
+                break
+        return messages[:limit]
+
+    async def get_messages_by_ids(self, message_ids: Iterable) -> Dict[str, dict]:
+        """Archived messages keyed by string id (missing ids are left out)"""
+        wanted = {ObjectId(str(mid)) for mid in message_ids if mid and ObjectId.is_valid(str(mid))}
+        if not wanted:
+            return {}
+        cursor = self.archive_collection.find({"$or": [
+            {"first_id": {"$lte": mid}, "last_id": {"$gte": mid}} for mid in wanted
+        ]})
+        found = {}
+        async for bucket in cursor:
+            for doc in unpack_messages(bucket):
+                if doc["_id"] in wanted:
+                    found[str(doc["_id"])] = doc
+        return found
+
+
+async def run_archiver(db) -> None:
+    """Archive old messages every ``chat_archive_interval_minutes`` until cancelled"""
+    service = MessageArchiveService(db)
+    while True:
+        try:
+            await service.archive_old_messages()
+        except Exception as e:
+            logger.error(f"Message archiving failed: {e}")
+        await asyncio.sleep(settings.chat_archive_interval_minutes * 60)
@@ -0,0 +1,270 @@
+"""Write-behind buffering of chat message inserts.
+
+With ``settings.chat_write_behind_enabled`` messages are not inserted one by
+one. They are queued per room and flushed together: one ordered
+``insert_many`` per room plus a single room update (last-message preview,
+unread counters, read markers) instead of one per message. A flush happens
+after at most ``chat_write_behind_max_delay_ms`` or once
+``chat_write_behind_max_batch`` messages are waiting. Those flushes can
+overlap, so a room's batches are written one after another: the room update
+overwrites the preview and the senders' counters, and an older batch landing
+last would undo a newer one.
+
+Ids are assigned before a message is queued, so the message can be
+returned right away. Its ``seq`` is assigned when the batch is flushed: one
+``$inc`` of the room's ``message_seq`` by the batch size reserves a range
+for the whole batch, so a busy room's document is written once per flush
+rather than once per message. Cursor reads hold back messages that follow a
+seq not yet written (see ChatService._stop_at_pending), so a flush that
+lands late is not skipped. The sender picks the acknowledgement:
+
+- ``persisted`` (default): the call returns once the batch is written.
+- ``accepted``: the call returns as soon as the message is queued, before
+  the message has a seq. It may be lost if the process dies before the
+  flush, and write errors are only logged.
+
+Either way a message's ``on_written`` callback (ChatService publishes
+``message.created`` with it) runs only once the message is stored, so
+subscribers never see a message that is later lost.
+
+A batch is one ordered ``insert_many``. When a document fails (a
+BulkWriteError), the ones before it are stored. Their senders get success,
+and the room update covers them. The failing document's sender gets the
+error. The documents after it were never attempted, so they are retried
+in the same flush. An error without per-document details (e.g. a lost
+connection) leaves the outcome unknown, and every remaining sender gets it.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ACK_PERSISTED = "persisted"
+ACK_ACCEPTED = "accepted"
+
+
+def message_preview(message_doc: dict) -> dict:
+    """Room-list preview of a message, stored on the room document as-is for display"""
+    content = message_doc.get("content") or ""
+    return {
+        "id": str(message_doc["_id"]),
+        "sender_id": str(message_doc["sender_id"]),
+        "content": content[:100] + "..." if len(content) > 100 else content,
+        "message_type": message_doc.get("message_type", "text"),
+        "created_at": message_doc["created_at"],
+    }
+
+
+def room_touch_update(participant_ids: Iterable, message_docs: List[dict]) -> dict:
+    """Room update for newly written messages (oldest first).
+
+    Each participant's unread counter grows by the messages others sent after
+    that participant's own last message in the batch; someone who wrote in the
+    batch has read everything up to their own message.
+    """
+    now = datetime.utcnow()
+    last = message_docs[-1]
+    update = {
+        "$set": {
+            "last_message_at": now,
+            "updated_at": now,
+            "last_message": message_preview(last),
+        },
+    }
+    increments = {}
+    senders = [str(doc["sender_id"]) for doc in message_docs]
+    for pid in {str(pid) for pid in participant_ids} | set(senders):
+        if pid in senders:
+            own_last = len(senders) - 1 - senders[::-1].index(pid)
+            update["$set"][f"unread_counts.{pid}"] = len(senders) - 1 - own_last
+            update["$set"][f"read_markers.{pid}"] = {"message_id": message_docs[own_last]["_id"], "read_at": now}
+        else:
+            increments[f"unread_counts.{pid}"] = len(senders)
+    if increments:
+        update["$inc"] = increments
+    return update
+
+
+class _RoomBatch:
+    def __init__(self, messages_collection, rooms_collection, participant_ids):
+        self.messages_collection = messages_collection
+        self.rooms_collection = rooms_collection
+        self.participant_ids = participant_ids
+        self.entries: List[Tuple[dict, asyncio.Future, Optional[Callable[[], Awaitable[None]]]]] = []
+
+
+class MessageWriteBuffer:
+    """Per-room queues of message documents flushed with insert_many."""
+
+    def __init__(self, max_delay_ms: float = 50.0, max_batch: int = 100):
+        self.max_delay = max_delay_ms / 1000.0
+        self.max_batch = max_batch
+        self._pending: Dict[str, _RoomBatch] = {}
+        self._size = 0
+        self._timer: Optional[asyncio.Task] = None
+        # Completion of the last batch started per room; the next one for that room waits on it
+        self._room_tails: Dict[str, asyncio.Future] = {}
+        self.flushes = 0
+        self.written = 0
+
+    async def add(
+        self, messages_collection, rooms_collection, room_doc: dict, message_doc: dict, ack: str = ACK_PERSISTED,
+        on_written: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> None:
+        """Queue a message (with its ``_id`` already set); waits for the write when ``ack`` is persisted"""
+        room_id = str(room_doc["_id"])
+        batch = self._pending.get(room_id)
+        if batch is None:
+            batch = self._pending[room_id] = _RoomBatch(
+                messages_collection, rooms_collection, room_doc.get("participant_ids", [])
+            )
+        future = asyncio.get_running_loop().create_future()
+        batch.entries.append((message_doc, future, on_written))
+        self._size += 1
+
+        if self._size >= self.max_batch:
+            asyncio.ensure_future(self.flush())
+        elif self._timer is None or self._timer.done():
+            self._timer = asyncio.ensure_future(self._flush_later())
+
+        if ack == ACK_ACCEPTED:
+            future.add_done_callback(_log_failure)
+            return
+        await asyncio.shield(future)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.max_delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write everything queued so far"""
+        pending, self._pending, self._size = self._pending, {}, 0
+        if pending:
+            await asyncio.gather(*(self._write(room_id, batch) for room_id, batch in pending.items()))
+
+    async def _number(self, batch: _RoomBatch, entries: list) -> None:
+        """Give the queued messages consecutive seqs, in queue order, from one reserved range"""
+        room = await batch.rooms_collection.find_one_and_update(
+            {"_id": entries[0][0]["room_id"]},
+            {"$inc": {"message_seq": len(entries)}},
+            projection={"message_seq": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if room is None:
+            raise ValueError("Chat room not found")
+        first = room["message_seq"] - len(entries) + 1
+        for offset, (doc, _, _) in enumerate(entries):
+            doc["seq"] = first + offset
+
+    async def _write(self, room_id: str, batch: _RoomBatch) -> None:
+        previous = self._room_tails.get(room_id)
+        done = self._room_tails[room_id] = asyncio.get_running_loop().create_future()
+        try:
+            if previous is not None:
+                await asyncio.shield(previous)
+            await self._write_batch(room_id, batch)
+        finally:
+            done.set_result(None)
+            if self._room_tails.get(room_id) is done:
+                del self._room_tails[room_id]
+
+    async def _write_batch(self, room_id: str, batch: _RoomBatch) -> None:
+        entries = list(batch.entries)
+        try:
+            await self._number(batch, entries)
+        except Exception as e:
+            logger.error(f"Write-behind seq reservation for room {room_id} failed: {e}")
+            for _, future, _ in entries:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        written = []
+        while entries:
+            try:
+                await batch.messages_collection.insert_many([doc for doc, _, _ in entries], ordered=True)
+            except BulkWriteError as e:
+                inserted = e.details.get("nInserted", 0)
+                written.extend(entries[:inserted])
+                failed = entries[inserted]
+                logger.error(f"Write-behind insert of message {failed[0]['_id']} in room {room_id} failed: {e}")
+                if not failed[1].done():
+                    failed[1].set_exception(ValueError("Message could not be stored"))
+                entries = entries[inserted + 1:]
+                continue
+            except Exception as e:
+                logger.error(f"Write-behind flush for room {room_id} failed: {e}")
+                for _, future, _ in entries:
+                    if not future.done():
+                        future.set_exception(e)
+                break
+            written.extend(entries)
+            break
+        if not written:
+            return
+
+        docs = [doc for doc, _, _ in written]
+        try:
+            await batch.rooms_collection.update_one(
+                {"_id": docs[0]["room_id"]}, room_touch_update(batch.participant_ids, docs)
+            )
+        except Exception as e:
+            # The messages are stored: their senders must not retry, only the preview/counters lag
+            logger.error(f"Write-behind room update for room {room_id} failed: {e}")
+        self.flushes += 1
+        self.written += len(docs)
+        for doc, _, on_written in written:
+            if on_written is not None:
+                try:
+                    await on_written()
+                except Exception as e:
+                    logger.error(f"Write-behind callback for message {doc['_id']} failed: {e}")
+        for _, future, _ in written:
+            if not future.done():
+                future.set_result(None)
+
+    async def close(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        await self.flush()
+
+
+def _log_failure(future: asyncio.Future) -> None:
+    # Retrieve the exception so an unacknowledged failure is not reported as "never retrieved"
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning("Message accepted with ack=accepted was not persisted")
+
+
+_buffer: Optional[MessageWriteBuffer] = None
+
+
+def get_message_buffer() -> Optional[MessageWriteBuffer]:
+    """The shared buffer, or None when write-behind is disabled"""
+    global _buffer
+    if not settings.chat_write_behind_enabled:
+        return None
+    if _buffer is None:
+        _buffer = MessageWriteBuffer(
+            max_delay_ms=settings.chat_write_behind_max_delay_ms,
+            max_batch=settings.chat_write_behind_max_batch,
+        )
+    return _buffer
+
+
+def set_message_buffer(buffer: Optional[MessageWriteBuffer]) -> None:
+    global _buffer
+    _buffer = buffer
+
+
+async def close_message_buffer() -> None:
+    """Flush and drop the shared buffer (application shutdown)"""
+    global _buffer
+    if _buffer is not None:
+        await _buffer.close()
+        _buffer = None
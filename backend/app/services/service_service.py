@@ -1,12 +1,196 @@
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from datetime import datetime
+import hashlib
+import json
 import math
+import uuid
 from bson import ObjectId
 
-from ..models.service import ServiceCreate, ServiceUpdate, ServiceResponse, ServiceFilters, ServiceStatus
+from ..models.service import (
+    ServiceCreate, ServiceUpdate, ServiceResponse, ServiceListResponse, ServiceFilters, ServiceStatus,
+    ServiceCardResponse, ServiceCardListResponse, CARD_DESCRIPTION_LENGTH, SERVICE_CARD_PROJECTION,
+)
 from ..models.user import UserResponse
 from ..core.database import get_database
+from ..core.cache import get_cache, invalidate_tags
+from ..core.config import settings
+from ..core import geo
+from ..core.serialization import encode_response, negotiated_media_type, trusted_reader
 from .content_moderation_service import is_offensive
+from .image_service import ImageService
+
+# Normalized service documents keyed by service id (see get_service_by_id)
+service_cache = get_cache("service_detail", ttl=settings.service_cache_ttl_seconds)
+
+# Serialized GET /services pages keyed by listing version + normalized filters.
+# Any service write deletes the version key; pages under the old version are never read again.
+service_list_cache = get_cache("service_list", ttl=settings.service_list_cache_ttl_seconds)
+SERVICE_LIST_VERSION_KEY = "version"
+SERVICE_LIST_VERSION_TTL = 24 * 3600
+
+# Unfiltered candidate services around a geo cell (see app/core/geo.py); the exact
+# radius, filters and paging of each near-me query are applied in memory.
+nearby_cache = get_cache("service_nearby", ttl=settings.geo_cache_ttl_seconds)
+
+
+def service_cache_tag(service_id) -> str:
+    """Tag carried by every cache entry derived from a single service."""
+    return f"service:{service_id}"
+
+
+async def invalidate_service_cache(service_id) -> None:
+    """Drop cached data for a service after any write to it."""
+    await invalidate_tags(service_cache_tag(service_id))
+    await bump_service_list_version()
+
+
+async def invalidate_service_geo_cells(location) -> None:
+    """Drop near-me candidate sets that could now include a service at ``location``."""
+    if hasattr(location, "model_dump"):
+        location = location.model_dump()
+    point = geo.point_of(location)
+    if point:
+        await invalidate_tags(*geo.cell_tags_for_point(*point))
+
+
+def _service_matches_filters(service_doc: dict, filters: ServiceFilters) -> bool:
+    """In-memory equivalent of the non-geo part of the get_services query"""
+    if filters.service_type and service_doc.get("service_type") != filters.service_type:
+        return False
+    if filters.category and service_doc.get("category") != filters.category:
+        return False
+    if filters.tags:
+        labels = {t.get("label") if isinstance(t, dict) else t for t in service_doc.get("tags", [])}
+        if not labels.intersection(filters.tags):
+            return False
+    if filters.status and service_doc.get("status") != filters.status:
+        return False
+    if filters.user_id and str(service_doc.get("user_id")) != str(filters.user_id):
+        return False
+    if filters.is_remote is not None and service_doc.get("is_remote") != filters.is_remote:
+        return False
+    return True
+
+
+async def bump_service_list_version() -> None:
+    """Retire every cached listing page (next reader mints a new version)."""
+    await service_list_cache.delete(SERVICE_LIST_VERSION_KEY)
+
+
+async def _new_service_list_version() -> str:
+    return uuid.uuid4().hex
+
+
+def service_list_cache_key(
+    filters: ServiceFilters, page: int, limit: int, view: str = "full", fields: Optional[List[str]] = None
+) -> str:
+    """Stable digest of the listing query, independent of tag order."""
+    normalized = filters.model_dump(mode="json", exclude_none=True)
+    if "tags" in normalized:
+        normalized["tags"] = sorted(set(normalized["tags"]))
+    normalized.update(
+        page=page, limit=limit, view=view, fields=sorted(fields) if fields else None,
+        media_type=negotiated_media_type(),
+    )
+    raw = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def parse_service_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a ``fields=`` query value into ServiceResponse field names"""
+    if not fields:
+        return None
+    requested = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in ServiceResponse.model_fields]
+    if unknown:
+        raise ValueError(f"Unknown service fields: {', '.join(unknown)}")
+    return requested
+
+
+def truncate_description(text: str, length: int = CARD_DESCRIPTION_LENGTH) -> str:
+    """Cut ``text`` at a word boundary so it fits in ``length`` characters plus an ellipsis"""
+    if len(text) <= length:
+        return text
+    cut = text[:length].rsplit(" ", 1)[0] or text[:length]
+    return cut.rstrip() + "…"
+
+
+def _listing_projection(view: str, fields: Optional[List[str]]) -> Optional[dict]:
+    if fields:
+        projection = {("_id" if f == "id" else f): 1 for f in fields}
+        if "image_urls" in projection:
+            # Legacy single image_url is normalized into image_urls, as for cards
+            projection["image_url"] = 1
+        return projection
+    if view == "card":
+        return SERVICE_CARD_PROJECTION
+    return None
+
+
+def _service_card(service_doc: dict) -> ServiceCardResponse:
+    images = service_doc.get("image_urls") or []
+    return trusted_reader(ServiceCardResponse).build({
+        "_id": service_doc["_id"],
+        "title": service_doc["title"],
+        "description": truncate_description(service_doc.get("description") or ""),
+        "category": service_doc.get("category"),
+        "tags": [t.get("label", "") if isinstance(t, dict) else str(t) for t in service_doc.get("tags", [])],
+        "service_type": service_doc["service_type"],
+        "status": service_doc.get("status", ServiceStatus.ACTIVE),
+        "estimated_duration": service_doc["estimated_duration"],
+        "location": service_doc["location"],
+        "is_remote": service_doc.get("is_remote", False),
+        "user_id": service_doc["user_id"],
+        "image_url": images[0] if images else None,
+        "image_variants": (service_doc.get("image_variants") or [None])[0] if images else None,
+        "deadline": service_doc.get("deadline"),
+        "max_participants": service_doc.get("max_participants", 1),
+        "participant_count": len(service_doc.get("matched_user_ids") or []),
+        "created_at": service_doc["created_at"],
+    })
+
+
+def _sparse_service(service_doc: dict, fields: List[str]) -> dict:
+    sparse = {"_id": service_doc["_id"]}
+    for field in fields:
+        if field != "id":
+            sparse[field] = service_doc.get(field)
+    return sparse
+
+
+def _encode_listing(service_docs: List[dict], total: int, page: int, limit: int,
+                    view: str = "full", fields: Optional[List[str]] = None) -> bytes:
+    """Serialize a page of normalized service documents in the requested shape"""
+    if fields:
+        services = [_sparse_service(doc, fields) for doc in service_docs]
+        return encode_response({"services": services, "total": total, "page": page, "limit": limit})
+    if view == "card":
+        listing = ServiceCardListResponse.model_construct(
+            services=[_service_card(doc) for doc in service_docs], total=total, page=page, limit=limit
+        )
+    else:
+        listing = ServiceListResponse.model_construct(
+            services=trusted_reader(ServiceResponse).build_many(service_docs), total=total, page=page, limit=limit
+        )
+    return encode_response(listing)
+
+
+def service_participants(service: ServiceResponse, users: Dict[str, dict]) -> List[dict]:
+    """Provider and matched users of a service, from user documents keyed by id."""
+    participants = []
+    for user_id, role in [(service.user_id, "provider")] + [
+        (matched_id, "participant") for matched_id in service.matched_user_ids or []
+    ]:
+        user = users.get(str(user_id))
+        if user:
+            participants.append({
+                "id": str(user["_id"]),
+                "username": user["username"],
+                "full_name": user.get("full_name"),
+                "role": role,
+            })
+    return participants
+
 
 def _ensure_non_offensive(value: Optional[str], field_name: str) -> None:
     if isinstance(value, str) and value.strip() and is_offensive(value):
@@ -112,20 +296,39 @@ class ServiceService:
             # Ensure scheduling_type is always set (defaults to "open" if not provided)
             if "scheduling_type" not in service_doc or not service_doc["scheduling_type"]:
                 service_doc["scheduling_type"] = "open"
+            service_doc["image_variants"] = await ImageService(self.db).service_image_variants(
+                service_doc.get("image_urls") or []
+            )
             
             result = await self.services_collection.insert_one(service_doc)
             service_doc["_id"] = result.inserted_id
+            await bump_service_list_version()
+            await invalidate_service_geo_cells(service_doc.get("location"))
             
             return ServiceResponse(**service_doc)
         except Exception as e:
             raise ValueError(f"Error creating service: {str(e)}")
 
+    async def _load_service_doc(self, service_id: str) -> Optional[dict]:
+        service_doc = await self.services_collection.find_one({"_id": ObjectId(service_id)})
+        if service_doc:
+            return self._normalize_service_doc(service_doc)
+        return None
+
+    async def _get_service_doc(self, service_id: str) -> Optional[dict]:
+        """Normalized service document (read-through cached; writes must call invalidate_service_cache)"""
+        service_id = str(service_id)
+        return await service_cache.get_or_set(
+            service_id,
+            lambda: self._load_service_doc(service_id),
+            tags=[service_cache_tag(service_id)],
+        )
+
     async def get_service_by_id(self, service_id: str) -> Optional[ServiceResponse]:
         """Get service by ID"""
         try:
-            service_doc = await self.services_collection.find_one({"_id": ObjectId(service_id)})
+            service_doc = await self._get_service_doc(service_id)
             if service_doc:
-                service_doc = self._normalize_service_doc(service_doc)
                 return ServiceResponse(**service_doc)
             return None
         except Exception:
@@ -133,6 +336,13 @@ class ServiceService:
 
     async def get_services(self, filters: ServiceFilters, page: int, limit: int) -> Tuple[List[ServiceResponse], int]:
         """Get services with filters and pagination"""
+        service_docs, total = await self._find_service_docs(filters, page, limit)
+        return [ServiceResponse(**doc) for doc in service_docs], total
+
+    async def _find_service_docs(
+        self, filters: ServiceFilters, page: int, limit: int, projection: Optional[dict] = None
+    ) -> Tuple[List[dict], int]:
+        """Normalized service documents for a filtered page, optionally projected"""
         try:
             # Build MongoDB query
             query = {}
@@ -160,6 +370,10 @@ class ServiceService:
             
             # Handle location-based filtering
             if filters.location and filters.radius:
+                nearby = await self._get_nearby_services(filters, page, limit)
+                if nearby is not None:
+                    return nearby
+
                 # For location-based queries, we need to use aggregation pipeline
                 pipeline = [
                     {
@@ -210,6 +424,8 @@ class ServiceService:
                 # Get total count with the same filters
                 count_pipeline = pipeline[:-2]  # Remove skip and limit
                 count_pipeline.append({"$count": "total"})
+                if projection:
+                    pipeline.append({"$project": projection})
                 
                 # Execute queries
                 services_cursor = self.services_collection.aggregate(pipeline)
@@ -220,8 +436,7 @@ class ServiceService:
                     # Remove the distance field added by geoNear
                     service_doc.pop("distance", None)
                     # Normalize service document
-                    service_doc = self._normalize_service_doc(service_doc)
-                    services.append(ServiceResponse(**service_doc))
+                    services.append(self._normalize_service_doc(service_doc))
                 
                 # Get total count
                 total = 0
@@ -236,18 +451,155 @@ class ServiceService:
                 
                 # Get services with pagination
                 skip = (page - 1) * limit
-                cursor = self.services_collection.find(query).skip(skip).limit(limit).sort("created_at", -1)
+                cursor = self.services_collection.find(query, projection).skip(skip).limit(limit).sort("created_at", -1)
                 
                 services = []
                 async for service_doc in cursor:
                     # Normalize service document
-                    service_doc = self._normalize_service_doc(service_doc)
-                    services.append(ServiceResponse(**service_doc))
+                    services.append(self._normalize_service_doc(service_doc))
                 
                 return services, total
         except Exception as e:
             raise ValueError(f"Error fetching services: {str(e)}")
 
+    async def _load_nearby_candidates(self, box: geo.BoundingBox) -> dict:
+        lat_min, lat_max, lon_min, lon_max = box
+        query = {"$or": [
+            {
+                "location.latitude": {"$gte": lat_min, "$lte": lat_max},
+                "location.longitude": {"$gte": lon_min, "$lte": lon_max},
+            },
+            {  # GeoJSON points: coordinates are [longitude, latitude]
+                "location.coordinates.1": {"$gte": lat_min, "$lte": lat_max},
+                "location.coordinates.0": {"$gte": lon_min, "$lte": lon_max},
+            },
+        ]}
+        max_candidates = settings.geo_cache_max_candidates
+        docs = await self.services_collection.find(query).limit(max_candidates + 1).to_list(
+            length=max_candidates + 1
+        )
+        if len(docs) > max_candidates:
+            # Too dense to hold in memory; remembered so the query falls back to $geoNear
+            return {"overflow": True, "services": []}
+        return {"overflow": False, "services": [self._normalize_service_doc(d) for d in docs]}
+
+    async def _get_nearby_services(
+        self, filters: ServiceFilters, page: int, limit: int
+    ) -> Optional[Tuple[List[dict], int]]:
+        """Answer a near-me query from the cached candidates of its geo cell.
+
+        Returns None when the query cannot be served from the grid (radius above
+        the largest bucket, polar/antimeridian cells, too many candidates).
+        """
+        bucket = geo.radius_bucket(filters.radius)
+        if not nearby_cache.enabled or bucket is None:
+            return None
+        latitude, longitude = filters.location.latitude, filters.location.longitude
+        cell = geo.cell_for(latitude, longitude, bucket)
+        box = geo.coverage_box(cell, bucket)
+        if box is None:
+            return None
+        cell_tags = [geo.cell_tag(bucket, c) for c in geo.cells_in_box(box, bucket)]
+
+        candidates = await nearby_cache.get_or_set(
+            geo.cell_tag(bucket, cell),
+            lambda: self._load_nearby_candidates(box),
+            tags=lambda entry: cell_tags + [service_cache_tag(d["_id"]) for d in entry["services"]],
+        )
+        if candidates["overflow"]:
+            return None
+
+        matches = []
+        for service_doc in candidates["services"]:
+            point = geo.point_of(service_doc.get("location"))
+            if point is None or not _service_matches_filters(service_doc, filters):
+                continue
+            if self.calculate_distance(latitude, longitude, *point) <= filters.radius:
+                matches.append(service_doc)
+        # Same ordering as the $geoNear pipeline: newest first
+        matches.sort(key=lambda d: d.get("created_at") or datetime.min, reverse=True)
+        skip = (page - 1) * limit
+        return matches[skip:skip + limit], len(matches)
+
+    async def _render_services_page(
+        self, filters: ServiceFilters, page: int, limit: int, view: str, fields: Optional[List[str]]
+    ) -> bytes:
+        service_docs, total = await self._find_service_docs(
+            filters, page, limit, projection=_listing_projection(view, fields)
+        )
+        return _encode_listing(service_docs, total, page, limit, view, fields)
+
+    async def get_services_page(
+        self,
+        filters: ServiceFilters,
+        page: int,
+        limit: int,
+        view: str = "full",
+        fields: Optional[List[str]] = None,
+    ) -> bytes:
+        """Get a serialized service listing, cached for the first few pages of non-geo queries.
+
+        The body is JSON or MessagePack depending on the request's negotiated format.
+
+        ``view="card"`` returns ServiceCardListResponse; ``fields`` limits each service to
+        the named ServiceResponse fields (plus ``_id``). Both fetch only what they need.
+        """
+        cacheable = (
+            service_list_cache.enabled
+            and page <= settings.service_list_cache_max_page
+            and not (filters.location and filters.radius)
+        )
+        if not cacheable:
+            return await self._render_services_page(filters, page, limit, view, fields)
+
+        version = await service_list_cache.get_or_set(
+            SERVICE_LIST_VERSION_KEY, _new_service_list_version, ttl=SERVICE_LIST_VERSION_TTL
+        )
+        return await service_list_cache.get_or_set(
+            f"{version}:{service_list_cache_key(filters, page, limit, view, fields)}",
+            lambda: self._render_services_page(filters, page, limit, view, fields),
+        )
+
+    async def get_services_by_ids_page(
+        self,
+        service_ids: List[str],
+        total: int,
+        page: int,
+        limit: int,
+        view: str = "full",
+        fields: Optional[List[str]] = None,
+    ) -> bytes:
+        """Serialize the given services (in the given order) as a listing page; missing ids are skipped"""
+        if view == "full" and not fields:
+            service_docs = []
+            for service_id in service_ids:
+                try:
+                    service_doc = await self._get_service_doc(service_id)
+                except Exception:
+                    continue
+                if service_doc:
+                    service_docs.append(service_doc)
+        else:
+            object_ids = [ObjectId(i) for i in service_ids if ObjectId.is_valid(i)]
+            cursor = self.services_collection.find(
+                {"_id": {"$in": object_ids}}, _listing_projection(view, fields)
+            )
+            by_id = {}
+            async for service_doc in cursor:
+                by_id[str(service_doc["_id"])] = self._normalize_service_doc(service_doc)
+            service_docs = [by_id[i] for i in service_ids if i in by_id]
+        return _encode_listing(service_docs, total, page, limit, view, fields)
+
+    def to_card(self, service_doc: dict) -> ServiceCardResponse:
+        """Card view of a raw service document"""
+        return _service_card(self._normalize_service_doc(service_doc))
+
+    async def get_saved_service_ids(self, user_id: str, limit: int = 500) -> List[str]:
+        """IDs of services saved by a user"""
+        cursor = self.db.saved_services.find({"user_id": user_id}, {"service_id": 1, "_id": 0})
+        docs = await cursor.to_list(length=limit)
+        return [doc["service_id"] for doc in docs]
+
     async def update_service(self, service_id: str, service_update: ServiceUpdate, user_id: Optional[str] = None) -> Optional[ServiceResponse]:
         """Update service"""
         try:
@@ -295,6 +647,10 @@ class ServiceService:
             # Normalize tags if they're being updated
             if "tags" in update_data:
                 update_data["tags"] = self._normalize_tags(update_data["tags"])
+            if "image_urls" in update_data:
+                update_data["image_variants"] = await ImageService(self.db).service_image_variants(
+                    update_data["image_urls"]
+                )
             
             update_data["updated_at"] = datetime.utcnow()
             
@@ -302,6 +658,9 @@ class ServiceService:
                 {"_id": ObjectId(service_id)},
                 {"$set": update_data}
             )
+            await invalidate_service_cache(service_id)
+            if "location" in update_data:
+                await invalidate_service_geo_cells(update_data["location"])
             
             if result.modified_count:
                 updated_service = await self.get_service_by_id(service_id)
@@ -328,7 +687,16 @@ class ServiceService:
     async def delete_service(self, service_id: str) -> bool:
         """Delete service"""
         try:
+            from .sync_service import record_tombstone
+            service_doc = await self.services_collection.find_one({"_id": ObjectId(service_id)}, {"user_id": 1})
             result = await self.services_collection.delete_one({"_id": ObjectId(service_id)})
+            await invalidate_service_cache(service_id)
+            if result.deleted_count and service_doc:
+                savers = await self.db.saved_services.find(
+                    {"service_id": str(service_id)}, {"user_id": 1}
+                ).to_list(length=None)
+                await record_tombstone(self.db, "service", service_id, [service_doc["user_id"]])
+                await record_tombstone(self.db, "saved_service", service_id, [doc["user_id"] for doc in savers])
             return result.deleted_count > 0
         except Exception as e:
             raise ValueError(f"Error deleting service: {str(e)}")
@@ -357,6 +725,7 @@ class ServiceService:
                     }
                 }
             )
+            await invalidate_service_cache(service_id)
             
             return result.modified_count > 0
         except Exception as e:
@@ -395,6 +764,7 @@ class ServiceService:
                     }
                 }
             )
+            await invalidate_service_cache(service_id)
             
             # Reject all pending join requests for this service
             from .join_request_service import JoinRequestService
@@ -456,6 +826,7 @@ class ServiceService:
                     }
                 }
             )
+            await invalidate_service_cache(service_id)
             
             return result.modified_count > 0
         except Exception as e:
@@ -467,39 +838,12 @@ class ServiceService:
             service = await self.get_service_by_id(service_id)
             if not service:
                 raise ValueError("Service not found")
-            
-            participants = []
-            
-            # Get provider info - convert user_id to ObjectId if it's a string
-            provider_id = ObjectId(service.user_id) if isinstance(service.user_id, str) else service.user_id
-            provider = await self.users_collection.find_one({"_id": provider_id})
-            if provider:
-                # Handle ObjectId conversion
-                provider_id_str = str(provider["_id"]) if isinstance(provider["_id"], ObjectId) else provider["_id"]
-                participants.append({
-                    "id": provider_id_str,
-                    "username": provider["username"],
-                    "full_name": provider.get("full_name"),
-                    "role": "provider"
-                })
-            
-            # Get matched users info if exists
-            if service.matched_user_ids:
-                for matched_user_id in service.matched_user_ids:
-                    # Convert to ObjectId if it's a string
-                    matched_id = ObjectId(matched_user_id) if isinstance(matched_user_id, str) else matched_user_id
-                    matched_user = await self.users_collection.find_one({"_id": matched_id})
-                    if matched_user:
-                        # Handle ObjectId conversion
-                        matched_id_str = str(matched_user["_id"]) if isinstance(matched_user["_id"], ObjectId) else matched_user["_id"]
-                        participants.append({
-                            "id": matched_id_str,
-                            "username": matched_user["username"],
-                            "full_name": matched_user.get("full_name"),
-                            "role": "participant"
-                        })
-            
-            return participants
+
+            from .user_service import UserService
+            users = await UserService(self.db).get_user_docs_by_ids(
+                [service.user_id, *(service.matched_user_ids or [])]
+            )
+            return service_participants(service, users)
         except Exception as e:
             raise ValueError(f"Error fetching participants: {str(e)}")
 
@@ -531,6 +875,7 @@ class ServiceService:
                             }
                         }
                     )
+                    await invalidate_service_cache(service["_id"])
                 
                 # Reject all pending requests
                 try:
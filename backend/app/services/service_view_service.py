@@ -0,0 +1,94 @@
+"""Composite read for the service detail screen (GET /services/{id}/view).
+
+ServiceDetail used to issue six requests, each with its own auth lookup and
+per-row user queries. Here the sections are loaded concurrently and every user
+they reference (provider, matched users, comment and event authors) is
+resolved with a single ``$in`` query.
+"""
+import asyncio
+from typing import Optional
+
+from bson import ObjectId
+
+from ..models.service_view import ServiceDetailViewResponse
+from ..core.config import settings
+from .comment_service import CommentService
+from .forum_service import ForumService
+from .join_request_service import JoinRequestService
+from .service_service import ServiceService, service_participants
+from .user_service import UserService
+
+
+class ServiceViewService:
+    def __init__(self, db):
+        self.db = db
+        self.service_service = ServiceService(db)
+        self.comment_service = CommentService(db)
+        self.forum_service = ForumService(db)
+        self.join_request_service = JoinRequestService(db)
+        self.user_service = UserService(db)
+
+    async def _pending_request(self, service_id: str, viewer_id: Optional[str]):
+        if not viewer_id:
+            return None
+        return await self.join_request_service.get_pending_request_for_service(service_id, viewer_id)
+
+    async def _is_saved(self, service_id: str, viewer_id: Optional[str]) -> Optional[bool]:
+        if not viewer_id:
+            return None
+        saved = await self.db.saved_services.find_one({"user_id": viewer_id, "service_id": service_id})
+        return saved is not None
+
+    async def get_service_view(
+        self,
+        service_id: str,
+        viewer_id: Optional[str] = None,
+        comment_limit: Optional[int] = None,
+        event_limit: Optional[int] = None,
+    ) -> Optional[ServiceDetailViewResponse]:
+        """All ServiceDetail sections for a service (None when it does not exist).
+
+        ``viewer_id`` enables the viewer-specific sections (pending join request,
+        saved flag). Section sizes default to the ``service_view_*_limit`` settings.
+        """
+        if not ObjectId.is_valid(service_id):
+            return None
+        if comment_limit is None:
+            comment_limit = settings.service_view_comment_limit
+        if event_limit is None:
+            event_limit = settings.service_view_event_limit
+
+        service, (comment_docs, comment_total), (event_docs, event_total), pending_request, is_saved = (
+            await asyncio.gather(
+                self.service_service.get_service_by_id(service_id),
+                self.comment_service.find_service_comment_docs(service_id, comment_limit),
+                self.forum_service.find_service_event_docs(service_id, event_limit),
+                self._pending_request(service_id, viewer_id),
+                self._is_saved(service_id, viewer_id),
+            )
+        )
+        if not service:
+            return None
+
+        users = await self.user_service.get_user_docs_by_ids({
+            service.user_id,
+            *(service.matched_user_ids or []),
+            *(doc.get("user_id") for doc in comment_docs),
+            *(doc.get("user_id") for doc in event_docs),
+        })
+        service_summary = {"_id": service.id, "title": service.title, "service_type": service.service_type}
+        linked_events = await self.forum_service.hydrate_events(
+            event_docs, users=users, services={service.id: service_summary}
+        )
+
+        return ServiceDetailViewResponse(
+            service=service,
+            participants=service_participants(service, users),
+            comments=self.comment_service.hydrate_comments(comment_docs, users),
+            comment_total=comment_total,
+            linked_events=linked_events,
+            linked_event_total=event_total,
+            pending_request=pending_request,
+            is_saved=is_saved,
+        )
+
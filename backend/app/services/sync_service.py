@@ -0,0 +1,243 @@
+"""Delta sync for the mobile app (GET /sync?since=<token>).
+
+A sync token is an opaque encoding of a server timestamp. Every section is a
+single range scan over ``updated_at`` backed by an (owner, updated_at) index
+(see create_indexes). Hard deletes leave a tombstone in ``sync_tombstones``
+naming the users who must hear about it. Soft-deleted messages and deactivated
+rooms come through their own ``updated_at`` and are reported as deleted.
+
+Tokens trail the server clock by ``sync_overlap_seconds``, so a write that
+commits while a sync is running is not missed. Clients may therefore receive
+the same item twice and must upsert by id. A token older than the tombstone
+retention gets a full snapshot (``full: true``) instead of a delta. A snapshot
+capped by ``sync_max_items`` continues through deltas whose token remembers when
+the snapshot started, so old documents can be paged through.
+"""
+import asyncio
+import base64
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+
+from ..models.chat import ChatRoomResponse, MessageResponse
+from ..models.join_request import JoinRequestResponse
+from ..models.service import SERVICE_CARD_PROJECTION
+from ..models.sync import SyncResponse, SyncSection
+from ..core.config import settings
+from ..core.serialization import trusted_reader
+from .chat_service import apply_viewer_state
+from .service_service import ServiceService
+from .transaction_service import transaction_reader
+
+_TOKEN_PREFIX = "v1:"
+_EPOCH = datetime(1970, 1, 1)
+_MILLISECOND = timedelta(milliseconds=1)
+
+
+def _millis(moment: datetime) -> int:
+    return (moment - _EPOCH) // _MILLISECOND
+
+
+def encode_sync_token(moment: datetime, snapshot_started: Optional[datetime] = None) -> str:
+    raw = f"{_TOKEN_PREFIX}{_millis(moment)}"
+    if snapshot_started is not None:
+        raw += f":{_millis(snapshot_started)}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def parse_sync_token(token: str) -> Tuple[datetime, Optional[datetime]]:
+    """``(since, snapshot_started)``; the latter is set while a capped full snapshot is paged through"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        if not raw.startswith(_TOKEN_PREFIX):
+            raise ValueError(raw)
+        moments = [_EPOCH + int(part) * _MILLISECOND for part in raw[len(_TOKEN_PREFIX):].split(":")]
+        if len(moments) > 2:
+            raise ValueError(raw)
+        return moments[0], (moments[1] if len(moments) == 2 else None)
+    except ValueError:
+        raise ValueError("Invalid sync token")
+
+
+def decode_sync_token(token: str) -> datetime:
+    return parse_sync_token(token)[0]
+
+
+async def record_tombstone(db, entity: str, entity_id, user_ids: Iterable) -> None:
+    """Remember a hard delete so the given users' next sync reports it."""
+    audience = list({ObjectId(str(uid)) for uid in user_ids if uid})
+    if not audience:
+        return
+    await db.sync_tombstones.insert_one({
+        "entity": entity,
+        "entity_id": str(entity_id),
+        "user_ids": audience,
+        "deleted_at": datetime.utcnow(),
+    })
+
+
+def _compact(model) -> dict:
+    return model.model_dump(by_alias=True, exclude_none=True)
+
+
+def _section(
+    docs: List[dict],
+    since: datetime,
+    build: Callable[[dict], dict],
+    is_deleted: Callable[[dict], bool] = lambda doc: False,
+    tombstones: Iterable[str] = (),
+    is_created: Optional[Callable[[dict], bool]] = None,
+) -> SyncSection:
+    if is_created is None:
+        is_created = lambda doc: bool(doc.get("created_at")) and doc["created_at"] > since
+    section = SyncSection()
+    for doc in docs:
+        doc_id = str(doc["_id"])
+        if is_deleted(doc):
+            section.deleted.append(doc_id)
+            continue
+        (section.created if is_created(doc) else section.updated).append(doc_id)
+        section.items.append(build(doc))
+    # Current state wins over a tombstone for an entity that was re-created since
+    present = set(section.created) | set(section.updated) | set(section.deleted)
+    section.deleted.extend(entity_id for entity_id in dict.fromkeys(tombstones) if entity_id not in present)
+    return section
+
+
+class SyncService:
+    def __init__(self, db):
+        self.db = db
+        self.service_service = ServiceService(db)
+
+    async def _scan(
+        self, collection, query: dict, since: datetime, projection: Optional[dict] = None
+    ) -> Tuple[List[dict], Optional[datetime]]:
+        """Documents changed after ``since``, oldest first and capped at ``sync_max_items``.
+
+        When the cap is hit, every document sharing the last ``updated_at`` is
+        included too (bulk updates stamp many documents alike) and that timestamp
+        is returned as the point the next sync resumes after; otherwise None.
+        """
+        limit = settings.sync_max_items
+        cursor = collection.find({**query, "updated_at": {"$gt": since}}, projection)
+        docs = await cursor.sort("updated_at", 1).limit(limit + 1).to_list(length=limit + 1)
+        if len(docs) <= limit:
+            return docs, None
+        docs = docs[:limit]
+        boundary = docs[-1]["updated_at"]
+        seen = {str(doc["_id"]) for doc in docs}
+        ties = await collection.find({**query, "updated_at": boundary}, projection).to_list(length=None)
+        docs.extend(doc for doc in ties if str(doc["_id"]) not in seen)
+        return docs, boundary
+
+    async def _ids(self, collection, query: dict) -> List[ObjectId]:
+        docs = await collection.find(query, {"_id": 1}).to_list(length=None)
+        return [ObjectId(str(doc["_id"])) for doc in docs]
+
+    async def _tombstones(self, user_id: ObjectId, since: datetime, full: bool) -> dict:
+        """Deleted entity ids per entity kind (none for a full snapshot)"""
+        by_entity: dict = {}
+        if full:
+            return by_entity
+        cursor = self.db.sync_tombstones.find({"user_ids": user_id, "deleted_at": {"$gt": since}})
+        async for doc in cursor:
+            by_entity.setdefault(doc["entity"], []).append(doc["entity_id"])
+        return by_entity
+
+    async def _saved_services(self, user_id: str, since: datetime) -> Tuple[List[dict], set]:
+        """Saved services that were saved or changed after ``since``, and the ids of the newly saved ones."""
+        saved_ids = await self.service_service.get_saved_service_ids(user_id)
+        newly_saved = await self.db.saved_services.find(
+            {"user_id": user_id, "created_at": {"$gt": since}}, {"service_id": 1}
+        ).to_list(length=None)
+        oids = [ObjectId(sid) for sid in saved_ids if ObjectId.is_valid(sid)]
+        newly_saved_ids = {doc["service_id"] for doc in newly_saved}
+        if not oids:
+            return [], newly_saved_ids
+        projection = {**SERVICE_CARD_PROJECTION, "updated_at": 1}
+        query = {"_id": {"$in": oids}, "updated_at": {"$gt": since}}
+        if newly_saved:
+            query = {"_id": {"$in": oids}, "$or": [
+                {"updated_at": {"$gt": since}},
+                {"_id": {"$in": [ObjectId(doc["service_id"]) for doc in newly_saved]}},
+            ]}
+        docs = await self.db.services.find(query, projection).to_list(length=None)
+        return docs, newly_saved_ids
+
+    async def get_changes(self, user_id: str, since_token: Optional[str] = None) -> SyncResponse:
+        """Everything relevant to a user that changed since ``since_token`` (full snapshot without one)"""
+        now = datetime.utcnow()
+        since, snapshot_started = (_EPOCH, None) if since_token is None else parse_sync_token(since_token)
+        retention = timedelta(days=settings.sync_tombstone_retention_days)
+        # The next page of a snapshot resumes at an old boundary; only the snapshot's start must be recent
+        full = since_token is None or (snapshot_started or since) < now - retention
+        if full:
+            since = _EPOCH
+            snapshot_started = now
+        uid = ObjectId(user_id)
+
+        own_service_ids, active_room_ids = await asyncio.gather(
+            self._ids(self.db.services, {"user_id": uid}),
+            self._ids(self.db.chat_rooms, {"participant_ids": uid, "is_active": True}),
+        )
+        (
+            (services, services_cap),
+            (rooms, rooms_cap),
+            (messages, messages_cap),
+            (transactions, transactions_cap),
+            (join_requests, join_requests_cap),
+            (saved_services, newly_saved_ids),
+            tombstones,
+        ) = await asyncio.gather(
+            self._scan(self.db.services, {"user_id": uid}, since, {**SERVICE_CARD_PROJECTION, "updated_at": 1}),
+            self._scan(self.db.chat_rooms, {"participant_ids": uid}, since),
+            self._scan(self.db.messages, {"room_id": {"$in": active_room_ids}}, since),
+            self._scan(self.db.transactions, {"$or": [{"provider_id": uid}, {"requester_id": uid}]}, since),
+            self._scan(
+                self.db.join_requests,
+                {"$or": [{"user_id": uid}, {"service_id": {"$in": own_service_ids}}]},
+                since,
+            ),
+            self._saved_services(user_id, since),
+            self._tombstones(uid, since, full),
+        )
+
+        service_card = lambda doc: _compact(self.service_service.to_card(doc))
+        response = SyncResponse(
+            token="",
+            full=full,
+            services=_section(services, since, service_card, tombstones=tombstones.get("service", ())),
+            saved_services=_section(
+                saved_services, since, service_card,
+                tombstones=tombstones.get("saved_service", ()),
+                # "created" here means newly saved
+                is_created=lambda doc: str(doc["_id"]) in newly_saved_ids,
+            ),
+            chat_rooms=_section(
+                rooms, since, lambda doc: _compact(trusted_reader(ChatRoomResponse).build(apply_viewer_state(doc, user_id))),
+                is_deleted=lambda doc: not doc.get("is_active", True),
+            ),
+            messages=_section(
+                messages, since, lambda doc: _compact(trusted_reader(MessageResponse).build(doc)),
+                is_deleted=lambda doc: doc.get("is_deleted", False),
+                # Archived messages are deleted without a hot document to carry it
+                tombstones=tombstones.get("message", ()),
+            ),
+            transactions=_section(transactions, since, lambda doc: _compact(transaction_reader.build(doc))),
+            join_requests=_section(
+                join_requests, since, lambda doc: _compact(trusted_reader(JoinRequestResponse).build(doc))
+            ),
+        )
+
+        next_since = now - timedelta(seconds=settings.sync_overlap_seconds)
+        caps = [cap for cap in (services_cap, rooms_cap, messages_cap, transactions_cap, join_requests_cap) if cap]
+        if caps:
+            # Resume right after the earliest truncated section; the overlap window does not
+            # apply here or a burst larger than the cap inside it could never be paged through
+            next_since = min(caps)
+            response.has_more = True
+        else:
+            snapshot_started = None
+        response.token = encode_sync_token(max(next_since, since), snapshot_started)
+        return response
@@ -2,9 +2,17 @@ from typing import List, Optional, Tuple
 from datetime import datetime
 from bson import ObjectId
 
-from ..models.transaction import TransactionCreate, TransactionUpdate, TransactionResponse, TransactionStatus
+from ..models.transaction import (
+    TransactionBase, TransactionCreate, TransactionUpdate, TransactionResponse, TransactionStatus
+)
 from ..models.service import ServiceStatus
 from ..core.database import get_database
+from ..core.serialization import TrustedReader
+
+# List endpoints build responses from DB documents without re-validation
+transaction_reader = TrustedReader(
+    TransactionResponse, coerce={"timebank_hours": TransactionBase.validate_timebank_hours}
+)
 
 
 class TransactionService:
@@ -136,7 +144,7 @@ class TransactionService:
                     transaction_doc["status"] = TransactionStatus.COMPLETED
                     if not transaction_doc.get("completed_at"):
                         transaction_doc["completed_at"] = datetime.utcnow()
-                transactions.append(TransactionResponse(**transaction_doc))
+                transactions.append(transaction_reader.build(transaction_doc))
             
             return transactions, total
         except Exception as e:
@@ -195,7 +203,7 @@ class TransactionService:
                     transaction_doc["status"] = TransactionStatus.COMPLETED
                     if not transaction_doc.get("completed_at"):
                         transaction_doc["completed_at"] = datetime.utcnow()
-                transactions.append(TransactionResponse(**transaction_doc))
+                transactions.append(transaction_reader.build(transaction_doc))
             
             return transactions, total
         except Exception as e:
@@ -358,6 +366,8 @@ class TransactionService:
                         "updated_at": datetime.utcnow(),
                     }},
                 )
+                from .service_service import invalidate_service_cache
+                await invalidate_service_cache(transaction["service_id"])
 
             await self.transactions_collection.update_one(
                 {"_id": ObjectId(transaction_id)},
@@ -621,7 +631,7 @@ class TransactionService:
                     transaction_doc["status"] = TransactionStatus.COMPLETED
                     if not transaction_doc.get("completed_at"):
                         transaction_doc["completed_at"] = datetime.utcnow()
-                transactions.append(TransactionResponse(**transaction_doc))
+                transactions.append(transaction_reader.build(transaction_doc))
             
             return transactions, total
         except Exception as e:
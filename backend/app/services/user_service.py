@@ -1,10 +1,12 @@
-from typing import Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple
 from datetime import datetime
 from bson import ObjectId
 
+from ..models.comment import COMMENT_AUTHOR_PROJECTION
 from ..models.user import UserResponse, UserUpdate, TimeBankTransaction, TimeBankResponse, UserRole, UserRoleUpdate, UserSettingsUpdate, PasswordChange
 from ..core.security import verify_password, get_password_hash
 from ..core.database import get_database
+from .image_service import ImageService
 
 
 class UserService:
@@ -56,6 +58,10 @@ class UserService:
                     k: v for k, v in update_data["social_links"].items()
                 }
             
+            if "profile_picture" in update_data:
+                manifests = await ImageService(self.db).variants_by_url([update_data["profile_picture"]])
+                update_data["profile_picture_variants"] = manifests.get(update_data["profile_picture"])
+            
             update_data["updated_at"] = datetime.utcnow()
             
             result = await self.users_collection.update_one(
@@ -69,11 +75,12 @@ class UserService:
         except Exception:
             return None
 
-    async def get_timebank_balance(self, user_id: str) -> TimeBankResponse:
-        """Get user's TimeBank balance and transaction history"""
+    async def get_timebank_balance(self, user_id: str, user: Optional[UserResponse] = None) -> TimeBankResponse:
+        """Get user's TimeBank balance and transaction history (``user`` skips the profile lookup)"""
         try:
             # Get user's current balance
-            user = await self.get_user_by_id(user_id)
+            if user is None:
+                user = await self.get_user_by_id(user_id)
             if not user:
                 raise ValueError("User not found")
             
@@ -343,6 +350,19 @@ class UserService:
         except Exception:
             return []
 
+    async def get_user_docs_by_ids(self, user_ids, projection: Optional[dict] = None) -> Dict[str, dict]:
+        """User summary fields keyed by string id, fetched with a single ``$in`` query.
+
+        Only ``projection`` (default: username, names and picture) is read, never whole documents.
+        """
+        object_ids = {ObjectId(str(uid)) for uid in user_ids if uid and ObjectId.is_valid(str(uid))}
+        if not object_ids:
+            return {}
+        cursor = self.users_collection.find(
+            {"_id": {"$in": list(object_ids)}}, projection or COMMENT_AUTHOR_PROJECTION
+        )
+        return {str(doc["_id"]): doc async for doc in cursor}
+
     async def is_admin(self, user_id: str) -> bool:
         """Check if user is an admin"""
         try:
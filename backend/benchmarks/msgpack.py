@@ -0,0 +1,81 @@
+"""
+Benchmark: payload size and encode time of list responses, JSON vs MessagePack.
+
+Uses the same trusted models the list routes return (services, messages,
+transactions) and the same encoders the API negotiates between.
+
+    cd backend && python -m benchmarks.msgpack [items] [repeats]
+"""
+import gzip
+import sys
+import timeit
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.core.negotiation import packb
+from app.core.serialization import encode_json, trusted_reader
+from app.models.chat import MessageListResponse, MessageResponse
+from app.models.service import ServiceListResponse, ServiceResponse
+from app.models.transaction import TransactionListResponse, TransactionResponse
+from benchmarks.serialization import make_docs as make_service_docs
+
+
+def make_message_docs(n: int):
+    now = datetime.utcnow()
+    room_id = ObjectId()
+    return [
+        {
+            "_id": ObjectId(), "room_id": room_id, "sender_id": ObjectId(), "content": f"Message {i} " * 5,
+            "message_type": "text", "created_at": now, "updated_at": now,
+            "sender": {"id": str(ObjectId()), "username": "someone", "full_name": "Some One"},
+        }
+        for i in range(n)
+    ]
+
+
+def make_transaction_docs(n: int):
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(), "service_id": ObjectId(), "provider_id": ObjectId(), "requester_id": ObjectId(),
+            "timebank_hours": 2.0, "status": "completed", "created_at": now, "updated_at": now,
+            "completed_at": now, "provider_confirmed": True, "requester_confirmed": True,
+        }
+        for _ in range(n)
+    ]
+
+
+def listings(items: int):
+    return {
+        "services": ServiceListResponse.model_construct(
+            services=trusted_reader(ServiceResponse).build_many(make_service_docs(items)),
+            total=items, page=1, limit=items,
+        ),
+        "messages": MessageListResponse.model_construct(
+            messages=trusted_reader(MessageResponse).build_many(make_message_docs(items)),
+            total=items, page=1, limit=items,
+        ),
+        "transactions": TransactionListResponse.model_construct(
+            transactions=trusted_reader(TransactionResponse).build_many(make_transaction_docs(items)),
+            total=items, page=1, limit=items,
+        ),
+    }
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    print(f"{'payload':>12} {'format':>8} {'bytes':>8} {'gzip':>8} {'us/item':>9}")
+    for name, listing in listings(items).items():
+        for fmt, encode in (("json", encode_json), ("msgpack", packb)):
+            body = encode(listing)
+            best = min(timeit.repeat(lambda: encode(listing), number=repeats, repeat=5))
+            print(
+                f"{name:>12} {fmt:>8} {len(body):>8} {len(gzip.compress(body)):>8} "
+                f"{best / repeats / items * 1e6:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Micro-benchmark: per-item cost of building and encoding list responses.
+
+Compares the validated path (``Model(**doc)`` + FastAPI-style re-validation and
+encoding) with the trusted path (``TrustedReader`` + cached TypeAdapter bytes).
+
+    cd backend && python -m benchmarks.serialization [items] [repeats]
+"""
+import json
+import sys
+import timeit
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from app.core.serialization import encode_json, trusted_reader
+from app.models.service import ServiceResponse, ServiceListResponse
+
+
+def make_docs(n: int):
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(), "title": f"Service {i}", "description": "Help with things " * 20,
+            "category": "general", "tags": [{"label": "help", "entityId": "Q1", "description": None, "aliases": None}] * 3,
+            "estimated_duration": 2.0, "location": {"latitude": 41.0, "longitude": 29.0, "address": "Istanbul"},
+            "is_remote": False, "service_type": "offer", "max_participants": 2, "user_id": ObjectId(),
+            "status": "active", "created_at": now, "updated_at": now, "matched_user_ids": [ObjectId()],
+            "receiver_confirmed_ids": [], "image_urls": ["/uploads/services/a.jpg"], "scheduling_type": "open",
+        }
+        for i in range(n)
+    ]
+
+
+def validated(docs):
+    listing = ServiceListResponse(
+        services=[ServiceResponse(**doc) for doc in docs], total=len(docs), page=1, limit=len(docs)
+    )
+    # What FastAPI does with response_model: validate again, then jsonable_encoder + json.dumps
+    listing = ServiceListResponse.model_validate(listing.model_dump(by_alias=True))
+    return json.dumps(jsonable_encoder(listing), separators=(",", ":")).encode()
+
+
+def trusted(docs):
+    listing = ServiceListResponse.model_construct(
+        services=trusted_reader(ServiceResponse).build_many(docs), total=len(docs), page=1, limit=len(docs)
+    )
+    return encode_json(listing)
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    docs = make_docs(items)
+    assert json.loads(validated(docs)) == json.loads(trusted(docs))
+
+    for name, fn in (("validated", validated), ("trusted", trusted)):
+        best = min(timeit.repeat(lambda: fn(docs), number=repeats, repeat=5))
+        print(f"{name:>10}: {best / repeats / items * 1e6:8.2f} us/item")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Migration script to add the GeoJSON geo field to existing forum events.
+Run once so events created before it existed show up in near-me and map queries.
+"""
+import asyncio
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGODB_URI") or os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "hive_platform")
+MONGO_USERNAME = os.getenv("MONGO_ROOT_USERNAME")
+MONGO_PASSWORD = os.getenv("MONGO_ROOT_PASSWORD")
+
+
+async def backfill_forum_event_geo():
+    uri = MONGO_URI
+    if MONGO_USERNAME and MONGO_PASSWORD and "@" not in MONGO_URI.split("://", 1)[1]:
+        protocol, rest = MONGO_URI.split("://", 1)
+        uri = f"{protocol}://{MONGO_USERNAME}:{MONGO_PASSWORD}@{rest}"
+
+    client = AsyncIOMotorClient(uri)
+    db = client[DATABASE_NAME]
+    events = db.forum_events
+
+    updates = []
+    async for event in events.find({"geo": {"$exists": False}}, {"latitude": 1, "longitude": 1}):
+        latitude, longitude = event.get("latitude"), event.get("longitude")
+        point = None
+        if latitude is not None and longitude is not None:
+            point = {"type": "Point", "coordinates": [longitude, latitude]}
+        updates.append(UpdateOne({"_id": event["_id"]}, {"$set": {"geo": point}}))
+
+    modified = 0
+    if updates:
+        modified = (await events.bulk_write(updates, ordered=False)).modified_count
+    print(f"✅ Set geo on {modified} forum event(s).")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_forum_event_geo())
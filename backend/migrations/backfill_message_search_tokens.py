@@ -0,0 +1,56 @@
+"""
+Migration script to add search_tokens to existing chat messages.
+Run once so messages sent before in-room search existed can be found by it.
+"""
+import asyncio
+import os
+import sys
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.core.text import tokenize  # noqa: E402
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGODB_URI") or os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "hive_platform")
+MONGO_USERNAME = os.getenv("MONGO_ROOT_USERNAME")
+MONGO_PASSWORD = os.getenv("MONGO_ROOT_PASSWORD")
+BATCH_SIZE = 1000
+
+
+async def backfill_message_search_tokens():
+    uri = MONGO_URI
+    if MONGO_USERNAME and MONGO_PASSWORD and "@" not in MONGO_URI.split("://", 1)[1]:
+        protocol, rest = MONGO_URI.split("://", 1)
+        uri = f"{protocol}://{MONGO_USERNAME}:{MONGO_PASSWORD}@{rest}"
+
+    client = AsyncIOMotorClient(uri)
+    db = client[DATABASE_NAME]
+    messages = db.messages
+
+    updated = 0
+    batch = []
+    cursor = messages.find(
+        {"search_tokens": {"$exists": False}, "is_deleted": {"$ne": True}},
+        {"content": 1},
+    )
+    async for message in cursor:
+        batch.append(UpdateOne(
+            {"_id": message["_id"]},
+            {"$set": {"search_tokens": tokenize(message.get("content", ""))}},
+        ))
+        if len(batch) >= BATCH_SIZE:
+            updated += (await messages.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        updated += (await messages.bulk_write(batch, ordered=False)).modified_count
+
+    print(f"✅ Added search_tokens to {updated} message(s).")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_message_search_tokens())
@@ -0,0 +1,77 @@
+"""
+Migration script to number existing chat messages with the per-room seq.
+Run once, with chat writes stopped, before deploying the version that orders
+messages by seq: archived buckets first, then hot messages, each in _id order.
+"""
+import asyncio
+import os
+import sys
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.services.message_archive_service import pack_messages, unpack_messages  # noqa: E402
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGODB_URI") or os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "hive_platform")
+MONGO_USERNAME = os.getenv("MONGO_ROOT_USERNAME")
+MONGO_PASSWORD = os.getenv("MONGO_ROOT_PASSWORD")
+BATCH_SIZE = 1000
+
+
+async def backfill_message_seq():
+    uri = MONGO_URI
+    if MONGO_USERNAME and MONGO_PASSWORD and "@" not in MONGO_URI.split("://", 1)[1]:
+        protocol, rest = MONGO_URI.split("://", 1)
+        uri = f"{protocol}://{MONGO_USERNAME}:{MONGO_PASSWORD}@{rest}"
+
+    client = AsyncIOMotorClient(uri)
+    db = client[DATABASE_NAME]
+    messages = db.messages
+    archive = db.message_archive
+
+    room_ids = set(await messages.distinct("room_id", {"seq": {"$exists": False}}))
+    room_ids |= set(await archive.distinct("room_id", {"first_seq": {"$exists": False}}))
+
+    numbered = 0
+    for room_id in room_ids:
+        seq = 0
+        async for bucket in archive.find({"room_id": room_id}).sort("first_id", 1):
+            if bucket.get("first_seq") is not None:
+                seq = max(seq, bucket["last_seq"])
+                continue
+            docs = unpack_messages(bucket)
+            for doc in docs:
+                seq += 1
+                doc["seq"] = seq
+            await archive.update_one({"_id": bucket["_id"]}, {"$set": {
+                "payload": pack_messages(docs),
+                "first_seq": docs[0]["seq"],
+                "last_seq": docs[-1]["seq"],
+            }})
+            numbered += len(docs)
+
+        batch = []
+        async for message in messages.find({"room_id": room_id}, {"seq": 1}).sort("_id", 1):
+            if message.get("seq") is not None:
+                seq = max(seq, message["seq"])
+                continue
+            seq += 1
+            batch.append(UpdateOne({"_id": message["_id"]}, {"$set": {"seq": seq}}))
+            if len(batch) >= BATCH_SIZE:
+                numbered += (await messages.bulk_write(batch, ordered=False)).modified_count
+                batch = []
+        if batch:
+            numbered += (await messages.bulk_write(batch, ordered=False)).modified_count
+
+        await db.chat_rooms.update_one({"_id": room_id}, {"$max": {"message_seq": seq}})
+
+    print(f"✅ Numbered {numbered} message(s) in {len(room_ids)} room(s).")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_message_seq())
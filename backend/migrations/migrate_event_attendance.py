@@ -0,0 +1,57 @@
+"""
+Migration script to move forum event attendees from the attendee_ids array
+into the event_attendance collection and store attendee_count on the event.
+"""
+import asyncio
+import os
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from bson import ObjectId
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGODB_URI") or os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "hive_platform")
+MONGO_USERNAME = os.getenv("MONGO_ROOT_USERNAME")
+MONGO_PASSWORD = os.getenv("MONGO_ROOT_PASSWORD")
+
+
+async def migrate_event_attendance():
+    uri = MONGO_URI
+    if MONGO_USERNAME and MONGO_PASSWORD and "@" not in MONGO_URI.split("://", 1)[1]:
+        protocol, rest = MONGO_URI.split("://", 1)
+        uri = f"{protocol}://{MONGO_USERNAME}:{MONGO_PASSWORD}@{rest}"
+
+    client = AsyncIOMotorClient(uri)
+    db = client[DATABASE_NAME]
+    events = db.forum_events
+    attendance = db.event_attendance
+
+    migrated_events = 0
+    async for event in events.find({"attendee_ids": {"$exists": True}}, {"attendee_ids": 1}):
+        user_ids = list(dict.fromkeys(ObjectId(str(uid)) for uid in event.get("attendee_ids") or []))
+        now = datetime.utcnow()
+        if user_ids:
+            await attendance.bulk_write([
+                UpdateOne(
+                    {"event_id": event["_id"], "user_id": uid},
+                    {"$setOnInsert": {"event_id": event["_id"], "user_id": uid, "created_at": now}},
+                    upsert=True,
+                )
+                for uid in user_ids
+            ], ordered=False)
+        count = await attendance.count_documents({"event_id": event["_id"]})
+        await events.update_one(
+            {"_id": event["_id"]},
+            {"$set": {"attendee_count": count}, "$unset": {"attendee_ids": ""}},
+        )
+        migrated_events += 1
+
+    print(f"✅ Moved attendees of {migrated_events} forum event(s) to event_attendance.")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate_event_attendance())
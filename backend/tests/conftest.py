@@ -8,6 +8,7 @@ from typing import AsyncGenerator
 
 from app.main import app
 from app.core.database import get_database
+from app.core.cache import clear_all_caches
 from app.core.security import create_access_token
 from app.models.user import UserResponse, UserRole
 
@@ -45,6 +46,10 @@ class AsyncMockCollection:
         result = self._sync_collection.insert_one(document, *args, **kwargs)
         return type('Result', (), {'inserted_id': result.inserted_id})()
     
+    async def insert_many(self, documents, *args, **kwargs):
+        result = self._sync_collection.insert_many(documents, *args, **kwargs)
+        return type('Result', (), {'inserted_ids': result.inserted_ids})()
+    
     async def update_one(self, filter, update, *args, **kwargs):
         result = self._sync_collection.update_one(filter, update, *args, **kwargs)
         return type('Result', (), {
@@ -52,6 +57,12 @@ class AsyncMockCollection:
             'matched_count': result.matched_count
         })()
 
+    async def find_one_and_update(self, filter, update, *args, **kwargs):
+        result = self._sync_collection.find_one_and_update(filter, update, *args, **kwargs)
+        if result:
+            return convert_objectid_to_str(result)
+        return result
+
     async def update_many(self, filter, update, *args, **kwargs):
         result = self._sync_collection.update_many(filter, update, *args, **kwargs)
         return type('Result', (), {
@@ -63,6 +74,10 @@ class AsyncMockCollection:
         result = self._sync_collection.delete_one(filter, *args, **kwargs)
         return type('Result', (), {'deleted_count': result.deleted_count})()
     
+    async def delete_many(self, filter, *args, **kwargs):
+        result = self._sync_collection.delete_many(filter, *args, **kwargs)
+        return type('Result', (), {'deleted_count': result.deleted_count})()
+    
     async def count_documents(self, filter, *args, **kwargs):
         return self._sync_collection.count_documents(filter, *args, **kwargs)
     
@@ -214,12 +229,14 @@ async def mock_db() -> AsyncGenerator[AsyncIOMotorDatabase, None]:
         return db
     
     app.dependency_overrides[get_database] = override_get_database
+    await clear_all_caches()
     
     yield db
     
     # Cleanup
     sync_client.close()
     app.dependency_overrides.clear()
+    await clear_all_caches()
 
 
 @pytest.fixture
@@ -330,3 +347,10 @@ async def second_user(mock_db, second_user_data):
     user_create = UserCreate(**second_user_data)
     user = await auth_service.create_user(user_create)
     return user
+
+
+@pytest.fixture
+def second_auth_headers(second_user):
+    """Create authentication headers for the second test user"""
+    token = create_access_token(data={"sub": str(second_user.id)})
+    return {"Authorization": f"Bearer {token}"}
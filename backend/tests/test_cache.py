@@ -0,0 +1,247 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+import fakeredis
+import fakeredis.aioredis
+from bson import ObjectId
+
+from app.core.cache import Cache, CacheBackend, MemoryBackend, RedisBackend
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    """Run each test against the in-process and the Redis-compatible backend"""
+    if request.param == "memory":
+        return MemoryBackend(maxsize=100)
+    return RedisBackend(
+        client=fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer()), prefix="test"
+    )
+
+
+class TestCacheAPI:
+    """Test the shared async cache API on every backend"""
+
+    @pytest.mark.asyncio
+    async def test_set_get_delete(self, backend):
+        cache = Cache("ns", backend=backend, ttl=60)
+        await cache.set("a", {"x": 1})
+
+        assert await cache.get("a") == {"x": 1}
+        await cache.delete("a")
+        assert await cache.get("a") is None
+
+    @pytest.mark.asyncio
+    async def test_get_many_returns_only_hits(self, backend):
+        cache = Cache("ns", backend=backend, ttl=60)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+
+        assert await cache.get_many(["a", "b", "c"]) == {"a": 1, "b": 2}
+        assert cache.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_namespaces_do_not_collide(self, backend):
+        first = Cache("one", backend=backend, ttl=60)
+        second = Cache("two", backend=backend, ttl=60)
+        await first.set("k", "first")
+
+        assert await second.get("k") is None
+
+    @pytest.mark.asyncio
+    async def test_tag_invalidation(self, backend):
+        cache = Cache("ns", backend=backend, ttl=60)
+        await cache.set("a", 1, tags=["group"])
+        await cache.set("b", 2, tags=["group", "other"])
+        await cache.set("c", 3, tags=["other"])
+
+        await cache.invalidate_tags("group")
+
+        assert await cache.get_many(["a", "b", "c"]) == {"c": 3}
+
+    @pytest.mark.asyncio
+    async def test_get_or_set_coalesces_concurrent_misses(self, backend):
+        cache = Cache("ns", backend=backend, ttl=60)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "value"
+
+        results = await asyncio.gather(*[cache.get_or_set("k", loader) for _ in range(5)])
+
+        assert results == ["value"] * 5
+        assert calls == 1
+        assert cache.stats()["coalesced"] == 4
+
+    @pytest.mark.asyncio
+    async def test_stale_while_revalidate(self, backend, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr("app.core.cache.time.time", lambda: now[0])
+        cache = Cache("ns", backend=backend, ttl=10, stale_ttl=100)
+        values = iter(["v1", "v2"])
+
+        async def loader():
+            return next(values)
+
+        assert await cache.get_or_set("k", loader) == "v1"
+        now[0] += 20
+        # Stale value is served immediately while a refresh runs in the background
+        assert await cache.get_or_set("k", loader) == "v1"
+        await asyncio.sleep(0.01)
+        assert await cache.get_or_set("k", loader) == "v2"
+        assert cache.stats()["refreshes"] == 1
+
+
+def _fake_redis():
+    return fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+
+
+class TestRedisBackend:
+    """Test the Redis wire format"""
+
+    @pytest.mark.asyncio
+    async def test_document_values_round_trip(self):
+        backend = RedisBackend(client=_fake_redis(), prefix="test")
+        cache = Cache("ns", backend=backend, ttl=60)
+        doc = {
+            "_id": ObjectId(),
+            "created_at": datetime(2024, 5, 1, 12, 30),
+            "scheduled_at": datetime(2024, 5, 2, tzinfo=timezone.utc),
+            "tags": [{"name": "garden"}],
+            "body": b"\x00\x01",
+        }
+        await cache.set("doc", doc)
+
+        assert await cache.get("doc") == doc
+
+    @pytest.mark.asyncio
+    async def test_payload_is_not_pickle(self):
+        client = _fake_redis()
+        cache = Cache("ns", backend=RedisBackend(client=client, prefix="test"), ttl=60)
+        await cache.set("a", {"x": 1})
+
+        assert not (await client.get("test:k:ns:a")).startswith(b"\x80")
+
+    @pytest.mark.asyncio
+    async def test_unsupported_values_are_not_cached(self):
+        cache = Cache("ns", backend=RedisBackend(client=_fake_redis(), prefix="test"), ttl=60)
+        await cache.set("a", object())
+
+        assert await cache.get("a") is None
+        assert cache.stats()["errors"] == 1
+
+    def test_backend_interface_is_abstract(self):
+        with pytest.raises(TypeError):
+            CacheBackend()
+
+
+class TestMemoryBackend:
+    """Test in-process specifics: LRU bound, expiry and load races"""
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        backend = MemoryBackend(maxsize=2)
+        cache = Cache("ns", backend=backend, ttl=60)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.get("a")  # "b" is now least recently used
+        await cache.set("c", 3)
+
+        assert await cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+        assert backend.stats()["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_are_misses(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr("app.core.cache.time.time", lambda: now[0])
+        cache = Cache("ns", backend=MemoryBackend(), ttl=5)
+        await cache.set("a", 1)
+
+        now[0] += 6
+        assert await cache.get("a") is None
+
+    @pytest.mark.asyncio
+    async def test_disabled_cache_always_loads(self):
+        cache = Cache("ns", backend=MemoryBackend(), ttl=0)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            return 1
+
+        await cache.get_or_set("k", loader)
+        await cache.get_or_set("k", loader)
+        assert calls == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidate_during_load_discards_result(self):
+        cache = Cache("ns", backend=MemoryBackend(), ttl=60)
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def loader():
+            started.set()
+            await release.wait()
+            return "stale"
+
+        task = asyncio.create_task(cache.get_or_set("k", loader, tags=["t"]))
+        await started.wait()
+        await cache.invalidate_tags("t")
+        release.set()
+
+        assert await task == "stale"
+        assert await cache.get("k") is None
+
+    @pytest.mark.asyncio
+    async def test_loader_errors_are_not_cached(self):
+        cache = Cache("ns", backend=MemoryBackend(), ttl=60)
+
+        async def failing():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_set("k", failing)
+
+        async def ok():
+            return 1
+
+        assert await cache.get_or_set("k", ok) == 1
+
+    @pytest.mark.asyncio
+    async def test_value_derived_tags(self):
+        """Callable tags are computed from the loaded value and honoured on invalidation"""
+        cache = Cache("ns", backend=MemoryBackend(), ttl=60)
+
+        async def loader():
+            return ["a", "b"]
+
+        await cache.get_or_set("k", loader, tags=lambda items: [f"item:{i}" for i in items])
+        await cache.invalidate_tags("item:b")
+
+        assert await cache.get("k") is None
+
+    @pytest.mark.asyncio
+    async def test_value_derived_tags_discard_on_concurrent_invalidation(self):
+        """Any invalidation during a callable-tag load prevents publishing it"""
+        cache = Cache("ns", backend=MemoryBackend(), ttl=60)
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def loader():
+            started.set()
+            await release.wait()
+            return ["a"]
+
+        task = asyncio.create_task(
+            cache.get_or_set("k", loader, tags=lambda items: [f"item:{i}" for i in items])
+        )
+        await started.wait()
+        await cache.invalidate_tags("item:a")
+        release.set()
+
+        assert await task == ["a"]
+        assert await cache.get("k") is None
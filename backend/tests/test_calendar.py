@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+
+from app.core import ical
+from app.services.calendar_service import service_component
+
+
+def _unfold(body: str) -> str:
+    return body.replace("\r\n ", "")
+
+
+def _create_event(test_client, auth_headers, title="Garden day", days=3):
+    return test_client.post("/forum/events", json={
+        "title": title,
+        "description": "Bring gloves, water; and snacks",
+        "event_at": (datetime.utcnow() + timedelta(days=days)).isoformat(),
+        "location": "Community garden",
+    }, headers=auth_headers).json()
+
+
+class TestICalEncoding:
+    def test_text_escaping_and_folding(self):
+        assert ical.text("a,b;c\\d\ne") == "a\\,b\\;c\\\\d\\ne"
+
+        line = "SUMMARY:" + "ğ" * 60
+        folded = ical.fold(line)
+
+        assert all(len(part.encode()) <= 75 for part in folded.split("\r\n"))
+        assert _unfold(folded) == line + "\r\n"
+
+    def test_etag_matching(self):
+        etag = 'W/"abc"'
+        assert ical.etag_matches('W/"abc"', etag)
+        assert ical.etag_matches('"other", "abc"', etag)
+        assert ical.etag_matches("*", etag)
+        assert not ical.etag_matches('"other"', etag)
+        assert not ical.etag_matches(None, etag)
+
+    def test_recurring_service_becomes_weekly_rule(self):
+        doc = {
+            "_id": "svc1",
+            "title": "Weekly tutoring",
+            "estimated_duration": 1.5,
+            "scheduling_type": "recurring",
+            "recurring_pattern": {"days": ["Monday", "Thursday"], "time": "18:30"},
+            "created_at": datetime(2025, 6, 4, 9, 0),  # a Wednesday
+            "deadline": datetime(2025, 8, 1),
+            "location": {"type": "Point", "coordinates": [28.97, 41.0], "address": "Kadikoy"},
+        }
+
+        body = service_component(doc)
+
+        assert "DTSTART:20250605T183000\r\n" in body  # first Thursday
+        assert "RRULE:FREQ=WEEKLY;BYDAY=MO,TH;UNTIL=20250801T000000\r\n" in body
+        assert "DURATION:PT90M\r\n" in body
+        assert "LOCATION:Kadikoy\r\n" in body
+        assert service_component({**doc, "scheduling_type": "open", "recurring_pattern": None}) is None
+
+
+class TestCalendarFeeds:
+    def test_forum_feed_and_conditional_get(self, test_client, auth_headers):
+        event = _create_event(test_client, auth_headers)
+
+        response = test_client.get("/forum/events.ics")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/calendar")
+        body = _unfold(response.text)
+        assert body.startswith("BEGIN:VCALENDAR\r\n") and body.endswith("END:VCALENDAR\r\n")
+        assert f"UID:forum-event-{event['_id']}@hive" in body
+        assert "DESCRIPTION:Bring gloves\\, water\\; and snacks" in body
+
+        etag = response.headers["etag"]
+        cached = test_client.get("/forum/events.ics", headers={"If-None-Match": etag})
+        assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+        assert cached.content == b""
+
+        _create_event(test_client, auth_headers, title="Seed swap")
+        changed = test_client.get("/forum/events.ics", headers={"If-None-Match": etag})
+        assert changed.status_code == status.HTTP_200_OK
+        assert changed.headers["etag"] != etag
+
+    def test_forum_feed_is_ordered_by_start(self, test_client, auth_headers):
+        _create_event(test_client, auth_headers, title="Later event", days=9)
+        _create_event(test_client, auth_headers, title="Sooner event", days=2)
+
+        body = test_client.get("/forum/events.ics").text
+
+        assert body.index("SUMMARY:Sooner event") < body.index("SUMMARY:Later event")
+
+    def test_user_feed_with_calendar_token(
+        self, test_client, auth_headers, second_auth_headers, sample_service_data
+    ):
+        event = _create_event(test_client, second_auth_headers, title="Repair cafe")
+        test_client.post(f"/forum/events/{event['_id']}/attend", headers=auth_headers)
+        test_client.post("/services/", json={
+            **sample_service_data, "scheduling_type": "specific",
+            "specific_date": (datetime.utcnow() + timedelta(days=5)).strftime("%Y-%m-%d"), "specific_time": "10:00",
+        }, headers=auth_headers)
+        token = test_client.post("/me/calendar/token", headers=auth_headers).json()["token"]
+
+        response = test_client.get("/me/calendar.ics", params={"token": token})
+
+        assert response.status_code == status.HTTP_200_OK
+        body = _unfold(response.text)
+        assert "SUMMARY:Repair cafe" in body
+        assert "SUMMARY:Test Service" in body
+        assert "DURATION:PT120M" in body
+
+        etag = response.headers["etag"]
+        test_client.delete(f"/forum/events/{event['_id']}/attend", headers=auth_headers)
+        assert test_client.get(
+            "/me/calendar.ics", params={"token": token}, headers={"If-None-Match": etag}
+        ).status_code == status.HTTP_200_OK
+
+    def test_calendar_token_is_scoped(self, test_client, auth_headers):
+        token = test_client.post("/me/calendar/token", headers=auth_headers).json()["token"]
+
+        assert test_client.get("/auth/me", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+        assert test_client.get("/me/calendar.ics").status_code == status.HTTP_401_UNAUTHORIZED
+        login_token = auth_headers["Authorization"].split()[1]
+        assert test_client.get("/me/calendar.ics", params={"token": login_token}).status_code == 401
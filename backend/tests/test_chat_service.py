@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 
 import pytest
@@ -17,6 +18,19 @@ def _stabilize_chat_service_tests(monkeypatch):
     monkeypatch.setattr("app.services.chat_service.is_offensive", lambda _text: False)
 
 
+@pytest.fixture
+async def write_behind(monkeypatch):
+    from app.core.config import settings
+    from app.services.message_buffer import MessageWriteBuffer, set_message_buffer
+
+    buffer = MessageWriteBuffer(max_delay_ms=20, max_batch=100)
+    monkeypatch.setattr(settings, "chat_write_behind_enabled", True)
+    set_message_buffer(buffer)
+    yield buffer
+    await buffer.close()
+    set_message_buffer(None)
+
+
 async def _create_user(mock_db, username: str):
     auth_service = AuthService(mock_db)
     return await auth_service.create_user(
@@ -273,6 +287,660 @@ class TestChatService:
         with pytest.raises(ValueError, match="not authorized"):
             await chat_service.get_room_messages(str(room.id), str(outsider.id), page=1, limit=10)
 
+    @pytest.mark.asyncio
+    async def test_get_messages_by_cursor_pages_in_stable_order(self, mock_db):
+        owner = await _create_user(mock_db, "chat_cursor_owner")
+        participant = await _create_user(mock_db, "chat_cursor_participant")
+
+        chat_service = ChatService(mock_db)
+        room = await chat_service.create_chat_room(
+            ChatRoomCreate(participant_ids=[str(owner.id), str(participant.id)]),
+            str(owner.id),
+        )
+        for content in ("m1", "m2", "m3", "m4", "m5"):
+            await chat_service.send_message(
+                MessageCreate(room_id=str(room.id), content=content, message_type="text"),
+                str(owner.id),
+            )
+
+        latest, has_more = await chat_service.get_messages_by_cursor(str(room.id), str(owner.id), limit=2)
+        assert [m.content for m in latest] == ["m4", "m5"]
+        assert has_more is True
+        assert latest[0].sender["username"] == "chat_cursor_owner"
+
+        older, has_more = await chat_service.get_messages_by_cursor(
+            str(room.id), str(owner.id), before=latest[0].id, limit=2
+        )
+        assert [m.content for m in older] == ["m2", "m3"]
+        assert has_more is True
+
+        oldest, has_more = await chat_service.get_messages_by_cursor(
+            str(room.id), str(owner.id), before=older[0].id, limit=2
+        )
+        assert [m.content for m in oldest] == ["m1"]
+        assert has_more is False
+
+        newer, has_more = await chat_service.get_messages_by_cursor(
+            str(room.id), str(participant.id), after=oldest[0].id, limit=3
+        )
+        assert [m.content for m in newer] == ["m2", "m3", "m4"]
+        assert has_more is True
+
+        with pytest.raises(ValueError, match="either before or after"):
+            await chat_service.get_messages_by_cursor(
+                str(room.id), str(owner.id), before=latest[0].id, after=oldest[0].id
+            )
+        with pytest.raises(ValueError, match="Invalid message cursor"):
+            await chat_service.get_messages_by_cursor(str(room.id), str(owner.id), after="nope")
+
+    @pytest.mark.asyncio
+    async def test_get_messages_by_cursor_long_poll(self, mock_db):
+        owner = await _create_user(mock_db, "chat_poll_owner")
+        participant = await _create_user(mock_db, "chat_poll_participant")
+
+        chat_service = ChatService(mock_db)
+        room = await chat_service.create_chat_room(
+            ChatRoomCreate(participant_ids=[str(owner.id), str(participant.id)]),
+            str(owner.id),
+        )
+        first = await chat_service.send_message(
+            MessageCreate(room_id=str(room.id), content="first", message_type="text"),
+            str(owner.id),
+        )
+
+        # Nothing new: returns empty once the wait runs out
+        messages, has_more = await chat_service.get_messages_by_cursor(
+            str(room.id), str(participant.id), after=first.id, wait=0.05
+        )
+        assert messages == [] and has_more is False
+
+        async def send_later():
+            await asyncio.sleep(0.05)
+            await chat_service.send_message(
+                MessageCreate(room_id=str(room.id), content="second", message_type="text"),
+                str(owner.id),
+            )
+
+        sender = asyncio.create_task(send_later())
+        messages, _ = await asyncio.wait_for(
+            chat_service.get_messages_by_cursor(str(room.id), str(participant.id), after=first.id, wait=5),
+            timeout=2,
+        )
+        await sender
+        assert [m.content for m in messages] == ["second"]
+
+    @pytest.mark.asyncio
+    async def test_room_list_carries_unread_counts_and_preview(self, mock_db):
+        owner = await _create_user(mock_db, "chat_unread_owner")
+        participant = await _create_user(mock_db, "chat_unread_participant")
+
+        chat_service = ChatService(mock_db)
+        room = await chat_service.create_chat_room(
+            ChatRoomCreate(participant_ids=[str(owner.id), str(participant.id)]),
+            str(owner.id),
+        )
+        sent = []
+        for content in ("m1", "m2", "m3"):
+            sent.append(await chat_service.send_message(
+                MessageCreate(room_id=str(room.id), content=content, message_type="text"),
+                str(owner.id),
+            ))
+
+        rooms, _ = await chat_service.get_user_chat_rooms(str(participant.id))
+        assert rooms[0].unread_count == 3
+        assert rooms[0].last_message["content"] == "m3"
+        assert rooms[0].last_message["id"] == sent[-1].id
+        owner_rooms, _ = await chat_service.get_user_chat_rooms(str(owner.id))
+        assert owner_rooms[0].unread_count == 0
+        assert owner_rooms[0].last_read_message_id == sent[-1].id
+
+        assert await chat_service.mark_room_read(str(room.id), str(participant.id), sent[0].id) == 2
+        room_view = await chat_service.get_chat_room_by_id(str(room.id), str(participant.id))
+        assert room_view.unread_count == 2
+        assert room_view.last_read_message_id == sent[0].id
+
+        assert await chat_service.mark_room_read(str(room.id), str(participant.id)) == 0
+        room_view = await chat_service.get_chat_room_by_id(str(room.id), str(participant.id))
+        assert room_view.unread_count == 0
+
+        # Replying counts for the other side and marks the replier's own side read
+        await chat_service.send_message(
+            MessageCreate(room_id=str(room.id), content="reply", message_type="text"),
+            str(participant.id),
+        )
+        owner_rooms, _ = await chat_service.get_user_chat_rooms(str(owner.id))
+        assert owner_rooms[0].unread_count == 1
+        assert owner_rooms[0].last_message["content"] == "reply"
+
+    @pytest.mark.asyncio
+    async def test_mark_read_keeps_message_sent_meanwhile_unread(self, mock_db, monkeypatch):
+        owner = await _create_user(mock_db, "chat_race_owner")
+        participant = await _create_user(mock_db, "chat_race_participant")
+        chat_service = ChatService(mock_db)
+        room = await chat_service.create_chat_room(
+            ChatRoomCreate(participant_ids=[str(owner.id), str(participant.id)]),
+            str(owner.id),
+        )
+
+        async def send(content):
+            return await chat_service.send_message(
+                MessageCreate(room_id=str(room.id), content=content, message_type="text"), str(owner.id)
+            )
+
+        seen = await send("seen")
+        find_one = chat_service.chat_rooms_collection.find_one
+        sent_meanwhile = []
+
+        async def find_one_then_send(*args, **kwargs):
+            room_doc = await find_one(*args, **kwargs)
+            if not sent_meanwhile:
+                sent_meanwhile.append(await send("meanwhile"))
+            return room_doc
+
+        monkeypatch.setattr(chat_service.chat_rooms_collection, "find_one", find_one_then_send)
+        assert await chat_service.mark_room_read(str(room.id), str(participant.id)) == 1
+        monkeypatch.setattr(chat_service.chat_rooms_collection, "find_one", find_one)
+
+        room_view = await chat_service.get_chat_room_by_id(str(room.id), str(participant.id))
+        assert room_view.unread_count == 1
+        assert room_view.last_read_message_id == seen.id
+
+    @pytest.mark.asyncio
+    async def test_deleting_last_message_blanks_preview(self, mock_db):
+        owner = await _create_user(mock_db, "chat_preview_owner")
+        participant = await _create_user(mock_db, "chat_preview_participant")
+
+        chat_service = ChatService(mock_db)
+        room = await chat_service.create_chat_room(
+            ChatRoomCreate(participant_ids=[str(owner.id), str(participant.id)]),
+            str(owner.id),
+        )
+        message = await chat_service.send_message(
+            MessageCreate(room_id=str(room.id), content="oops", message_type="text"),
+            str(owner.id),
+        )
+        await chat_service.delete_message(message.id, str(owner.id))
+
+        room_view = await chat_service.get_chat_room_by_id(str(room.id), str(participant.id))
+        assert room_view.last_message["content"] is None
+        assert room_view.last_message["is_deleted"] is True
+
+        with pytest.raises(ValueError, match="not authorized"):
+            await chat_service.mark_room_read(str(room.id), str(ObjectId()))
+
+    @pytest.mark.asyncio
+    async def test_write_behind_batches_inserts_per_room(self, mock_db, write_behind):
+        owner = await _create_user(mock_db, "chat_wb_owner")
+        participant = await _create_user(mock_db, "chat_wb_participant")
+
+        chat_service = ChatService(mock_db)
+        room = await chat_service.create_chat_room(
+            ChatRoomCreate(participant_ids=[str(owner.id), str(participant.id)]),
+            str(owner.id),
+        )
+        senders = [owner, participant, owner, owner]
+        sent = await asyncio.gather(*(
+            chat_service.send_message(
+                MessageCreate(room_id=str(room.id), content=f"m{i}", message_type="text"), str(sender.id)
+            )
+            for i, sender in enumerate(senders)
+        ))
+
+        assert write_behind.flushes == 1
+        assert [m.id for m in sent] == sorted(m.id for m in sent)
+        stored, _ = await chat_service.get_messages_by_cursor(str(room.id), str(owner.id))
+        assert [m.content for m in stored] == ["m0", "m1", "m2", "m3"]
+
+        owner_rooms, _ = await chat_service.get_user_chat_rooms(str(owner.id))
+        participant_rooms, _ = await chat_service.get_user_chat_rooms(str(participant.id))
+        assert owner_rooms[0].unread_count == 0
+        assert participant_rooms[0].unread_count == 2  # m2 and m3 came after their own m1
+        assert participant_rooms[0].last_read_message_id == sent[1].id
+        assert participant_rooms[0].last_message["content"] == "m3"
+
+    @pytest.mark.asyncio
+    async def test_write_behind_numbers_batch_with_one_room_write(self, mock_db, write_behind, monkeypatch):
+        owner = await _create_user(mock_db, "chat_wb_seq_owner")
+        participant = await _create_user(mock_db, "chat_wb_seq_participant")
+        chat_service = ChatService(mock_db)
+        room = await chat_service.create_chat_room(
+            ChatRoomCreate(participant_ids=[str(owner.id), str(participant.id)]),
+            str(owner.id),
+        )
+        find_one_and_update = chat_service.chat_rooms_collection.find_one_and_update
+        reservations = []
+
+        async def counted(*args, **kwargs):
+            reservations.append(args[1])
+            return await find_one_and_update(*args, **kwargs)
+
+        monkeypatch.setattr(chat_service.chat_rooms_collection, "find_one_and_update", counted)
+        sent = await asyncio.gather(*(
+            chat_service.send_message(
+                MessageCreate(room_id=str(room.id), content=f"m{i}", message_type="text"), str(owner.id)
+            )
+            for i in range(3)
+        ))
+
+        assert reservations == [{"$inc": {"message_seq": 3}}]
+        assert [m.seq for m in sent] == [1, 2, 3]
+        assert [m.content for m in sent] == ["m0", "m1", "m2"]
+
+    @pytest.mark.asyncio
+    async def test_write_behind_accepted_ack_returns_before_write(self, mock_db, write_behind):
+        owner = await _create_user(mock_db, "chat_wb_ack_owner")
+        participant = await _create_user(mock_db, "chat_wb_ack_participant")
+
+        chat_service = ChatService(mock_db)
+        room = await chat_service.create_chat_room(
+            ChatRoomCreate(participant_ids=[str(owner.id), str(participant.id)]),
+            str(owner.id),
+        )
+        message = await chat_service.send_message(
+            MessageCreate(room_id=str(room.id), content="fast", message_type="text"), str(owner.id), "accepted"
+        )
+        assert await mock_db.messages.find_one({"_id": ObjectId(message.id)}) is None
+        assert message.seq is None
+
+        await write_behind.flush()
+        assert await mock_db.messages.find_one({"_id": ObjectId(message.id)}) is not None
+
+    @pytest.mark.asyncio
+    async def test_write_behind_publishes_only_stored_messages(self, mock_db, write_behind):
+        from app.core.pubsub import get_broker, room_channel
+
+        owner = await _create_user(mock_db, "chat_wb_pub_owner")
+        participant = await _create_user(mock_db, "chat_wb_pub_participant")
+        chat_service = ChatService(mock_db)
+        room = await chat_service.create_chat_room(
+            ChatRoomCreate(participant_ids=[str(owner.id), str(participant.id)]),
+            str(owner.id),
+        )
+        subscription = get_broker().subscription()
+        await subscription.subscribe(room_channel(str(room.id)))
+        try:
+            message = await chat_service.send_message(
+                MessageCreate(room_id=str(room.id), content="queued", message_type="text"), str(owner.id), "accepted"
+            )
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(subscription.get(), 0.005)
+
+            await write_behind.flush()
+            _, payload = await asyncio.wait_for(subscription.get(), 1)
+        finally:
+            await subscription.close()
+        assert b"message.created" in payload and message.id.encode() in payload
+
+    @pytest.mark.asyncio
+    async def test_write_behind_partial_batch_failure(self, mock_db, write_behind, monkeypatch):
+        from pymongo.errors import BulkWriteError
+
+        owner = await _create_user(mock_db, "chat_wb_fail_owner")
+        participant = await _create_user(mock_db, "chat_wb_fail_participant")
+        chat_service = ChatService(mock_db)
+        room = await chat_service.create_chat_room(
+            ChatRoomCreate(participant_ids=[str(owner.id), str(participant.id)]),
+            str(owner.id),
+        )
+        insert_many = chat_service.messages_collection.insert_many
+        calls = []
+
+        async def second_document_fails(docs, *args, **kwargs):
+            calls.append(len(docs))
+            if len(calls) > 1:
+                return await insert_many(docs, *args, **kwargs)
+            await insert_many(docs[:1], *args, **kwargs)
+            raise BulkWriteError({"nInserted": 1, "writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate"}]})
+
+        monkeypatch.setattr(chat_service.messages_collection, "insert_many", second_document_fails)
+        results = await asyncio.gather(*(
+            chat_service.send_message(
+                MessageCreate(room_id=str(room.id), content=content, message_type="text"), str(owner.id)
+            )
+            for content in ("stored", "rejected", "retried")
+        ), return_exceptions=True)
+
+        assert calls == [3, 1]
+        assert results[0].content == "stored" and results[2].content == "retried"
+        assert isinstance(results[1], ValueError)
+        stored = await mock_db.messages.find({"room_id": ObjectId(room.id)}).to_list(length=None)
+        assert sorted(doc["content"] for doc in stored) == ["retried", "stored"]
+        participant_rooms, _ = await chat_service.get_user_chat_rooms(str(participant.id))
+        assert participant_rooms[0].unread_count == 2
+        assert participant_rooms[0].last_message["content"] == "retried"
+
+    @pytest.mark.asyncio
+    async def test_write_behind_overlapping_flushes_write_a_room_in_order(self, mock_db, write_behind, monkeypatch):
+        owner = await _create_user(mock_db, "chat_wb_order_owner")
+        participant = await _create_user(mock_db, "chat_wb_order_participant")
+        chat_service = ChatService(mock_db)
+        room = await chat_service.create_chat_room(
+            ChatRoomCreate(participant_ids=[str(owner.id), str(participant.id)]),
+            str(owner.id),
+        )
+        insert_many = chat_service.messages_collection.insert_many
+        started, release = asyncio.Event(), asyncio.Event()
+        inserted = []
+
+        async def first_insert_stalls(docs, *args, **kwargs):
+            inserted.append([doc["content"] for doc in docs])
+            if len(inserted) == 1:
+                started.set()
+                await release.wait()
+            return await insert_many(docs, *args, **kwargs)
+
+        monkeypatch.setattr(chat_service.messages_collection, "insert_many", first_insert_stalls)
+
+        def send(content):
+            return asyncio.create_task(chat_service.send_message(
+                MessageCreate(room_id=str(room.id), content=content, message_type="text"), str(owner.id)
+            ))
+
+        older = send("older")
+        await asyncio.sleep(0)
+        first_flush = asyncio.create_task(write_behind.flush())
+        await started.wait()
+        newer = send("newer")
+        await asyncio.sleep(0)
+        second_flush = asyncio.create_task(write_behind.flush())
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert inserted == [["older"]]
+
+        release.set()
+        await asyncio.gather(first_flush, second_flush)
+        assert [(await older).seq, (await newer).seq] == [1, 2]
+        assert inserted == [["older"], ["newer"]]
+        participant_rooms, _ = await chat_service.get_user_chat_rooms(str(participant.id))
+        assert participant_rooms[0].last_message["content"] == "newer"
+        assert participant_rooms[0].unread_count == 2
+
+    @pytest.mark.asyncio
+    async def test_room_list_hydrates_page_with_one_query_per_collection(self, mock_db, monkeypatch):
+        owner = await _create_user(mock_db, "chat_page_owner")
+        first = await _create_user(mock_db, "chat_page_first")
+        second = await _create_user(mock_db, "chat_page_second")
+        service_a = await _insert_service(mock_db, "Service A")
+        service_b = await _insert_service(mock_db, "Service B")
+        tx_id = await _insert_transaction(mock_db, str(owner.id), str(second.id), service_b)
+
+        chat_service = ChatService(mock_db)
+        await chat_service.create_chat_room(
+            ChatRoomCreate(participant_ids=[str(owner.id), str(first.id)], service_ids=[str(service_a)]),
+            str(owner.id),
+        )
+        await chat_service.create_chat_room(
+            ChatRoomCreate(
+                participant_ids=[str(owner.id), str(second.id)],
+                service_ids=[str(service_b)],
+                transaction_id=str(tx_id),
+            ),
+            str(owner.id),
+        )
+
+        async def no_single_lookups(*args, **kwargs):
+            raise AssertionError("per-row find_one during room list hydration")
+
+        for collection in (chat_service.users_collection, chat_service.services_collection,
+                           chat_service.transactions_collection):
+            monkeypatch.setattr(collection, "find_one", no_single_lookups)
+
+        rooms, total = await chat_service.get_user_chat_rooms(str(owner.id))
+
+        assert total == 2
+        by_partner = {room.participants[1]["username"]: room for room in rooms}
+        assert by_partner["chat_page_first"].services[0]["title"] == "Service A"
+        assert by_partner["chat_page_second"].service["title"] == "Service B"
+        assert by_partner["chat_page_second"].transaction == {
+            "id": str(tx_id), "status": "pending", "hours": 2.0
+        }
+        assert by_partner["chat_page_first"].transaction is None
+
+    @pytest.mark.asyncio
+    async def test_archived_messages_stay_readable_through_cursors(self, mock_db, monkeypatch):
+        from datetime import timedelta
+        from app.core.config import settings
+        from app.services.message_archive_service import MessageArchiveService
+
+        monkeypatch.setattr(settings, "chat_archive_bucket_size", 2)
+        owner = await _create_user(mock_db, "chat_archive_owner")
+        participant = await _create_user(mock_db, "chat_archive_participant")
+
+        chat_service = ChatService(mock_db)
+        room = await chat_service.create_chat_room(
+            ChatRoomCreate(participant_ids=[str(owner.id), str(participant.id)]),
+            str(owner.id),
+        )
+        sent = []
+        for content in ("m1", "m2", "gone", "m3", "m4", "m5"):
+            sent.append(await chat_service.send_message(
+                MessageCreate(room_id=str(room.id), content=content, message_type="text"), str(owner.id)
+            ))
+        await chat_service.delete_message(sent[2].id, str(owner.id))
+        old = datetime.utcnow() - timedelta(days=200)
+        await mock_db.messages.update_many(
+            {"_id": {"$in": [ObjectId(m.id) for m in sent[:4]]}}, {"$set": {"created_at": old}}
+        )
+
+        archive_service = MessageArchiveService(mock_db)
+        assert await archive_service.archive_old_messages() == 3
+        assert await archive_service.archive_old_messages() == 0
+        assert await mock_db.messages.count_documents({}) == 2
+        assert await mock_db.message_archive.count_documents({}) == 2
+
+        latest, has_more = await chat_service.get_messages_by_cursor(str(room.id), str(owner.id), limit=3)
+        assert [m.content for m in latest] == ["m3", "m4", "m5"]
+        assert has_more is True
+        older, has_more = await chat_service.get_messages_by_cursor(
+            str(room.id), str(owner.id), before=latest[0].id, limit=10
+        )
+        assert [m.content for m in older] == ["m1", "m2"]
+        assert has_more is False
+        newer, has_more = await chat_service.get_messages_by_cursor(
+            str(room.id), str(participant.id), after=sent[0].id, limit=3
+        )
+        assert [m.content for m in newer] == ["m2", "m3", "m4"]
+        assert has_more is True
+
+        page, total = await chat_service.get_room_messages(str(room.id), str(owner.id), page=1, limit=3)
+        assert ([m.content for m in page], total) == (["m5", "m4", "m3"], 5)
+        page, total = await chat_service.get_room_messages(str(room.id), str(owner.id), page=2, limit=3)
+        assert ([m.content for m in page], total) == (["m2", "m1"], 5)
+        page, _ = await chat_service.get_room_messages(str(room.id), str(owner.id), page=2, limit=2)
+        assert [m.content for m in page] == ["m3", "m2"]
+
+        archived = await chat_service.get_message_by_id(sent[0].id, str(participant.id))
+        assert archived.content == "m1"
+        reply = await chat_service.send_message(
+            MessageCreate(room_id=str(room.id), content="re", message_type="text", reply_to_message_id=sent[1].id),
+            str(participant.id),
+        )
+        replies, _ = await chat_service.get_messages_by_cursor(str(room.id), str(owner.id), after=latest[-1].id)
+        assert replies[0].id == reply.id
+        assert replies[0].reply_to_message["content"] == "m2"
+
+    @pytest.mark.asyncio
+    async def test_archived_messages_can_be_deleted_but_not_edited(self, mock_db, monkeypatch):
+        from datetime import timedelta
+        from app.core.config import settings
+        from app.models.chat import MessageUpdate
+        from app.services.chat_service import MessageArchivedError
+        from app.services.message_archive_service import MessageArchiveService
+
+        monkeypatch.setattr(settings, "chat_archive_bucket_size", 2)
+        owner = await _create_user(mock_db, "chat_archive_del_owner")
+        participant = await _create_user(mock_db, "chat_archive_del_participant")
+        chat_service = ChatService(mock_db)
+        room = await chat_service.create_chat_room(
+            ChatRoomCreate(participant_ids=[str(owner.id), str(participant.id)]),
+            str(owner.id),
+        )
+        sent = []
+        for content in ("m1", "m2", "m3"):
+            sent.append(await chat_service.send_message(
+                MessageCreate(room_id=str(room.id), content=content, message_type="text"), str(owner.id)
+            ))
+        await mock_db.messages.update_many({}, {"$set": {"created_at": datetime.utcnow() - timedelta(days=200)}})
+        assert await MessageArchiveService(mock_db).archive_old_messages() == 3
+
+        with pytest.raises(MessageArchivedError):
+            await chat_service.update_message(sent[0].id, MessageUpdate(content="edited"), str(owner.id))
+        with pytest.raises(ValueError, match="not authorized"):
+            await chat_service.delete_message(sent[0].id, str(participant.id))
+
+        assert await chat_service.delete_message(sent[0].id, str(owner.id)) is True
+        assert await chat_service.delete_message(sent[2].id, str(owner.id)) is True
+        with pytest.raises(ValueError, match="not found"):
+            await chat_service.delete_message(sent[0].id, str(owner.id))
+
+        assert await mock_db.message_archive.count_documents({}) == 1
+        assert await chat_service.get_message_by_id(sent[0].id, str(owner.id)) is None
+        page, total = await chat_service.get_room_messages(str(room.id), str(owner.id), page=1, limit=10)
+        assert ([m.content for m in page], total) == (["m2"], 1)
+        tombstones = await mock_db.sync_tombstones.find({"entity": "message"}).to_list(length=None)
+        assert sorted(doc["entity_id"] for doc in tombstones) == sorted([sent[0].id, sent[2].id])
+
+    @pytest.mark.asyncio
+    async def test_after_cursor_follows_seq_and_waits_for_pending_writes(self, mock_db):
+        from datetime import timedelta
+        from pymongo import ReturnDocument
+
+        owner = await _create_user(mock_db, "chat_seq_owner")
+        participant = await _create_user(mock_db, "chat_seq_participant")
+        chat_service = ChatService(mock_db)
+        room = await chat_service.create_chat_room(
+            ChatRoomCreate(participant_ids=[str(owner.id), str(participant.id)]),
+            str(owner.id),
+        )
+
+        async def send(content):
+            return await chat_service.send_message(
+                MessageCreate(room_id=str(room.id), content=content, message_type="text"), str(owner.id)
+            )
+
+        async def read_after(message):
+            messages, has_more = await chat_service.get_messages_by_cursor(
+                str(room.id), str(participant.id), after=message.id
+            )
+            return [m.content for m in messages], has_more
+
+        async def take_seq():
+            room_doc = await mock_db.chat_rooms.find_one_and_update(
+                {"_id": ObjectId(room.id)}, {"$inc": {"message_seq": 1}}, return_document=ReturnDocument.AFTER
+            )
+            return room_doc["message_seq"]
+
+        first = await send("first")
+        # Another worker took its seq (and minted its id) first but writes after "second"
+        late_id, late_seq = ObjectId(), await take_seq()
+        second = await send("second")
+        assert late_id < ObjectId(second.id) and late_seq < second.seq
+
+        assert await read_after(first) == ([], True)
+        latest, _ = await chat_service.get_messages_by_cursor(str(room.id), str(participant.id))
+        assert [m.content for m in latest] == ["first"]
+
+        now = datetime.utcnow()
+        await mock_db.messages.insert_one({
+            "_id": late_id, "room_id": ObjectId(room.id), "sender_id": ObjectId(owner.id), "content": "late",
+            "message_type": "text", "seq": late_seq, "is_edited": False, "is_deleted": False,
+            "created_at": now, "updated_at": now,
+        })
+        assert await read_after(first) == (["late", "second"], False)
+
+        # A seq that is never written is skipped once the messages after it have settled
+        await take_seq()
+        third = await send("third")
+        assert await read_after(second) == ([], True)
+        await mock_db.messages.update_one({"_id": ObjectId(third.id)}, {"$set": {"created_at": now - timedelta(minutes=1)}})
+        assert await read_after(second) == (["third"], False)
+
+    @pytest.mark.asyncio
+    async def test_archiving_runs_in_bounded_batches(self, mock_db, monkeypatch):
+        from datetime import timedelta
+        from app.core.config import settings
+        from app.services import message_archive_service
+        from app.services.message_archive_service import MessageArchiveService, unpack_messages
+
+        monkeypatch.setattr(settings, "chat_archive_bucket_size", 3)
+        monkeypatch.setattr(message_archive_service, "_BATCH_BUCKETS", 2)
+        room_id = ObjectId()
+        old = datetime.utcnow() - timedelta(days=200)
+        await mock_db.messages.insert_many([
+            {"_id": ObjectId(), "room_id": room_id, "sender_id": ObjectId(), "content": f"m{i}", "seq": i + 1,
+             "message_type": "text", "is_deleted": i == 4, "created_at": old + timedelta(seconds=i)}
+            for i in range(14)
+        ])
+
+        archive_service = MessageArchiveService(mock_db)
+        deletes = []
+        delete_many = archive_service.messages_collection.delete_many
+
+        async def spy_delete_many(query):
+            deletes.append(len(query["_id"]["$in"]))
+            return await delete_many(query)
+
+        monkeypatch.setattr(archive_service.messages_collection, "delete_many", spy_delete_many)
+        assert await archive_service.archive_room(room_id, datetime.utcnow()) == 13
+
+        assert max(deletes) <= 6
+        buckets = await mock_db.message_archive.find({"room_id": room_id}).sort("first_id", 1).to_list(length=None)
+        contents = [[m["content"] for m in unpack_messages(bucket)] for bucket in buckets]
+        # A bucket cut short by a batch boundary is completed by the next batch
+        assert contents == [["m0", "m1", "m2"], ["m3", "m5", "m6"], ["m7", "m8", "m9"], ["m10", "m11", "m12"], ["m13"]]
+        assert await mock_db.messages.count_documents({}) == 0
+
+    @pytest.mark.asyncio
+    async def test_search_room_messages_ranks_and_pages(self, mock_db):
+        owner = await _create_user(mock_db, "chat_search_owner")
+        participant = await _create_user(mock_db, "chat_search_participant")
+        outsider = await _create_user(mock_db, "chat_search_outsider")
+
+        chat_service = ChatService(mock_db)
+        room = await chat_service.create_chat_room(
+            ChatRoomCreate(participant_ids=[str(owner.id), str(participant.id)]),
+            str(owner.id),
+        )
+
+        async def send(content, sender=owner):
+            return await chat_service.send_message(
+                MessageCreate(room_id=str(room.id), content=content, message_type="text"), str(sender.id)
+            )
+
+        garden_only = await send("Can we meet at the garden?")
+        both = await send("Garden tools are ready for Saturday")
+        unrelated = await send("Thanks!")
+        saturday = await send("saturday works", participant)
+        deleted = await send("Garden on SATURDAY, final")
+        await chat_service.delete_message(deleted.id, str(owner.id))
+        edited = await send("See you later")
+        await chat_service.update_message(edited.id, MessageUpdate(content="Bring gloves for the garden"), str(owner.id))
+
+        hits, next_cursor = await chat_service.search_room_messages(
+            str(room.id), str(participant.id), "garden saturday", limit=2
+        )
+        assert [(m.id, score) for m, score in hits] == [(both.id, 2), (edited.id, 1)]
+        assert hits[0][0].sender["username"] == "chat_search_owner"
+        assert next_cursor
+
+        rest, next_cursor = await chat_service.search_room_messages(
+            str(room.id), str(participant.id), "garden saturday", limit=2, cursor=next_cursor
+        )
+        assert [m.id for m, _ in rest] == [saturday.id, garden_only.id]
+        assert next_cursor is None
+        assert unrelated.id not in {m.id for m, _ in hits + rest}
+
+        # Accents and case are ignored
+        hits, _ = await chat_service.search_room_messages(str(room.id), str(owner.id), "GÄRDEN")
+        assert len(hits) == 3
+
+        with pytest.raises(ValueError, match="not authorized"):
+            await chat_service.search_room_messages(str(room.id), str(outsider.id), "garden")
+        with pytest.raises(ValueError, match="no searchable words"):
+            await chat_service.search_room_messages(str(room.id), str(owner.id), "?!")
+        with pytest.raises(ValueError, match="Invalid search cursor"):
+            await chat_service.search_room_messages(str(room.id), str(owner.id), "garden", cursor="bogus")
+
     @pytest.mark.asyncio
     async def test_update_message_allows_sender_and_rejects_non_sender(self, mock_db):
         sender = await _create_user(mock_db, "chat_update_msg_sender")
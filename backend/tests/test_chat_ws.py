@@ -0,0 +1,159 @@
+import asyncio
+import pytest
+from fastapi import status
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.pubsub import MemoryPubSub, RedisPubSub, room_channel
+
+
+@pytest.fixture
+def chat_room(test_client, auth_headers, test_user, second_user):
+    response = test_client.post(
+        "/chat/rooms",
+        json={"participant_ids": [str(test_user.id), str(second_user.id)]},
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+def _ws_url(test_client, headers):
+    response = test_client.post("/chat/ws/token", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()["path"]
+
+
+class TestChatWebSocket:
+    """Test the /chat/ws realtime endpoint"""
+
+    def test_rejects_missing_token(self, test_client):
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            with test_client.websocket_connect("/chat/ws"):
+                pass
+        assert exc_info.value.code == status.WS_1008_POLICY_VIOLATION
+
+    def test_rejects_invalid_token(self, test_client):
+        with pytest.raises(WebSocketDisconnect):
+            with test_client.websocket_connect("/chat/ws?token=not-a-jwt"):
+                pass
+
+    def test_query_token_must_be_websocket_scoped(self, test_client, auth_headers):
+        login_token = auth_headers["Authorization"].split(" ", 1)[1]
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            with test_client.websocket_connect(f"/chat/ws?token={login_token}"):
+                pass
+        assert exc_info.value.code == status.WS_1008_POLICY_VIOLATION
+
+    def test_websocket_token_is_refused_elsewhere(self, test_client, auth_headers):
+        token = test_client.post("/chat/ws/token", headers=auth_headers).json()["token"]
+
+        response = test_client.get("/chat/rooms", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_header_auth_and_ready(self, test_client, auth_headers, chat_room):
+        with test_client.websocket_connect("/chat/ws", headers=auth_headers) as ws:
+            ready = ws.receive_json()
+            assert ready == {"type": "ready", "room_ids": [chat_room["_id"]]}
+            ws.send_json({"type": "ping"})
+            assert ws.receive_json() == {"type": "pong"}
+
+    def test_pushes_message_sent_over_http(self, test_client, auth_headers, second_auth_headers, chat_room):
+        with test_client.websocket_connect(_ws_url(test_client, second_auth_headers)) as ws:
+            assert ws.receive_json()["type"] == "ready"
+            response = test_client.post(
+                "/chat/messages",
+                json={"room_id": chat_room["_id"], "content": "Hello there"},
+                headers=auth_headers,
+            )
+            assert response.status_code == status.HTTP_200_OK
+
+            event = ws.receive_json()
+            assert event["type"] == "message.created"
+            assert event["room_id"] == chat_room["_id"]
+            assert event["message"]["content"] == "Hello there"
+            assert event["message"]["_id"] == response.json()["_id"]
+
+    def test_send_frame(self, test_client, auth_headers, second_auth_headers, chat_room):
+        with test_client.websocket_connect(_ws_url(test_client, second_auth_headers)) as receiver, \
+                test_client.websocket_connect(_ws_url(test_client, auth_headers)) as sender:
+            receiver.receive_json()
+            sender.receive_json()
+            sender.send_json({"type": "send", "room_id": chat_room["_id"], "content": "Hi", "client_id": "c1"})
+
+            frames = [sender.receive_json(), sender.receive_json()]
+            ack = next(f for f in frames if f["type"] == "sent")
+            assert ack["client_id"] == "c1"
+            # The sender's other devices see it too
+            assert any(f["type"] == "message.created" for f in frames)
+
+            event = receiver.receive_json()
+            assert event["type"] == "message.created"
+            assert event["message"]["_id"] == ack["message_id"]
+
+    def test_send_frame_to_foreign_room(self, test_client, auth_headers):
+        with test_client.websocket_connect(_ws_url(test_client, auth_headers)) as ws:
+            ws.receive_json()
+            ws.send_json({"type": "send", "room_id": "507f1f77bcf86cd799439011", "content": "Hi", "client_id": "c2"})
+            error = ws.receive_json()
+            assert error["type"] == "error"
+            assert error["client_id"] == "c2"
+
+    def test_subscribes_to_new_rooms(self, test_client, auth_headers, second_auth_headers, test_user, second_user):
+        with test_client.websocket_connect(_ws_url(test_client, second_auth_headers)) as ws:
+            assert ws.receive_json()["room_ids"] == []
+            room = test_client.post(
+                "/chat/rooms",
+                json={"participant_ids": [str(test_user.id), str(second_user.id)]},
+                headers=auth_headers,
+            ).json()
+            assert ws.receive_json() == {"type": "room.created", "room_id": room["_id"]}
+
+            test_client.post("/chat/messages", json={"room_id": room["_id"], "content": "First"}, headers=auth_headers)
+            assert ws.receive_json()["message"]["content"] == "First"
+
+
+class TestPubSub:
+    """Test the pub/sub backends"""
+
+    async def test_overflow_closes_subscription(self):
+        broker = MemoryPubSub()
+        subscription = broker.subscription()
+        subscription.queue = asyncio.Queue(maxsize=1)
+        await subscription.subscribe(room_channel("r1"))
+
+        await broker.publish(room_channel("r1"), b"1")
+        await broker.publish(room_channel("r1"), b"2")
+
+        assert subscription.overflowed
+        assert await subscription.get() == (room_channel("r1"), b"1")
+        assert await subscription.get() is None
+
+    async def test_unsubscribed_channels_are_not_delivered(self):
+        broker = MemoryPubSub()
+        subscription = broker.subscription()
+        await subscription.subscribe(room_channel("r1"))
+        await subscription.close()
+
+        await broker.publish(room_channel("r1"), b"x")
+
+        assert subscription.queue.empty()
+        assert broker.stats()["channels"] == 0
+
+    async def test_redis_fan_out_across_workers(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        server = fakeredis.FakeServer()
+        worker_a = RedisPubSub(client=fakeredis.aioredis.FakeRedis(server=server))
+        worker_b = RedisPubSub(client=fakeredis.aioredis.FakeRedis(server=server))
+        try:
+            subscription = worker_b.subscription()
+            await subscription.subscribe(room_channel("r1"))
+
+            await worker_a.publish(room_channel("r1"), b'{"type":"message.created"}')
+
+            assert await asyncio.wait_for(subscription.get(), timeout=5) == (
+                room_channel("r1"), b'{"type":"message.created"}'
+            )
+            await subscription.close()
+        finally:
+            await worker_a.close()
+            await worker_b.close()
@@ -0,0 +1,42 @@
+from app.models.comment import CommentCreate
+from app.services.comment_service import CommentService
+
+
+async def _comment(comment_service, service_id, user_id, content="Great service"):
+    return await comment_service.create_comment(CommentCreate(content=content, service_id=str(service_id)), user_id)
+
+
+class TestCommentAuthors:
+    async def test_comments_carry_compact_author(self, mock_db, test_user, sample_service):
+        comment_service = CommentService(mock_db)
+        created = await _comment(comment_service, sample_service.id, str(test_user.id))
+
+        fetched = await comment_service.get_comment_by_id(created.id)
+
+        expected = {
+            "_id": str(test_user.id),
+            "username": test_user.username,
+            "full_name": test_user.full_name,
+            "profile_picture": test_user.profile_picture,
+            "profile_picture_variants": None,
+        }
+        assert created.user == expected
+        assert fetched.user == expected
+
+    async def test_page_resolves_authors_in_one_query(
+        self, mock_db, test_user, second_user, sample_service, monkeypatch
+    ):
+        comment_service = CommentService(mock_db)
+        await _comment(comment_service, sample_service.id, str(test_user.id))
+        await _comment(comment_service, sample_service.id, str(second_user.id))
+        await _comment(comment_service, sample_service.id, str(test_user.id))
+
+        async def no_single_lookups(*args, **kwargs):
+            raise AssertionError("per-comment user lookup")
+
+        monkeypatch.setattr(comment_service.users_collection, "find_one", no_single_lookups)
+        comments, total = await comment_service.get_comments_by_service(str(sample_service.id))
+
+        assert total == 3
+        assert {c.user["username"] for c in comments} == {"testuser", "testuser2"}
+        assert all("email" not in c.user and "timebank_balance" not in c.user for c in comments)
@@ -0,0 +1,101 @@
+import gzip
+from datetime import datetime
+
+import brotli
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.compression import (
+    CompressionMiddleware, compression_stats, negotiate_encoding, reset_compression_stats, skip_compression
+)
+from app.core.responses import ORJSONResponse
+
+
+def _make_app():
+    app = FastAPI(default_response_class=ORJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/large")
+    async def large():
+        return {"items": [{"id": ObjectId(), "text": "hello world"} for _ in range(50)]}
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/raw")
+    @skip_compression
+    async def raw():
+        return {"items": ["x" * 20] * 50}
+
+    return app
+
+
+@pytest.fixture
+def client():
+    reset_compression_stats()
+    return TestClient(_make_app())
+
+
+class TestNegotiation:
+    def test_prefers_brotli(self):
+        assert negotiate_encoding("gzip, deflate, br") == "br"
+
+    def test_honours_quality(self):
+        assert negotiate_encoding("br;q=0, gzip") == "gzip"
+        assert negotiate_encoding("br;q=0.5, gzip;q=0.8") == "gzip"
+
+    def test_nothing_acceptable(self):
+        assert negotiate_encoding("") is None
+        assert negotiate_encoding("identity") is None
+        assert negotiate_encoding("*;q=0") is None
+
+
+class TestCompressionMiddleware:
+    def test_gzip_large_response(self, client):
+        response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert len(response.json()["items"]) == 50
+
+    def test_brotli_large_response(self, client):
+        with client.stream("GET", "/large", headers={"Accept-Encoding": "br"}) as response:
+            raw = b"".join(response.iter_raw())
+
+        assert response.headers["content-encoding"] == "br"
+        assert int(response.headers["content-length"]) == len(raw)
+        assert b'"items"' in brotli.decompress(raw)
+
+    def test_small_response_not_compressed(self, client):
+        response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert "Accept-Encoding" in response.headers["vary"]
+
+    def test_skip_compression_opt_out(self, client):
+        response = client.get("/raw", headers={"Accept-Encoding": "gzip, br"})
+
+        assert "content-encoding" not in response.headers
+
+    def test_stats_track_bytes_saved(self, client):
+        with client.stream("GET", "/large", headers={"Accept-Encoding": "gzip"}) as response:
+            raw = b"".join(response.iter_raw())
+        client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+        stats = compression_stats()
+        assert stats["compressed_responses"] == {"gzip": 1}
+        assert stats["skipped_responses"] == 1
+        assert stats["bytes_out"] == len(raw)
+        assert stats["bytes_in"] == len(gzip.decompress(raw))
+        assert stats["bytes_saved"] > 0
+
+
+class TestORJSONResponse:
+    def test_renders_objectid_and_datetime(self):
+        oid = ObjectId()
+        body = ORJSONResponse({"id": oid, "at": datetime(2024, 1, 2, 3, 4, 5)}).body
+
+        assert body == f'{{"id":"{oid}","at":"2024-01-02T03:04:05"}}'.encode()
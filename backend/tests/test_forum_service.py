@@ -0,0 +1,228 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.models.forum import ForumCommentCreate, ForumDiscussionCreate, ForumEventCreate, ForumEventUpdate
+from app.services.forum_service import ForumService, event_list_query
+
+
+def _discussion(title="Community garden plans"):
+    return ForumDiscussionCreate(title=title, body="Let's talk", tags=["garden"])
+
+
+def _event(title="Garden day", service_id=None):
+    return ForumEventCreate(
+        title=title,
+        description="Bring gloves",
+        event_at=datetime.utcnow() + timedelta(days=3),
+        service_id=service_id,
+    )
+
+
+async def _comment(forum_service, target_type, target_id, user_id, content="Count me in"):
+    return await forum_service.create_comment(
+        ForumCommentCreate(target_type=target_type, target_id=str(target_id), content=content), user_id
+    )
+
+
+class TestForumCommentCounts:
+    async def test_comment_count_follows_create_and_delete(self, mock_db, test_user, second_user):
+        forum_service = ForumService(mock_db)
+        discussion = await forum_service.create_discussion(_discussion(), str(test_user.id))
+        first = await _comment(forum_service, "discussion", discussion.id, str(test_user.id))
+        await _comment(forum_service, "discussion", discussion.id, str(second_user.id))
+
+        stored = await mock_db.forum_discussions.find_one({"_id": ObjectId(discussion.id)})
+        assert stored["comment_count"] == 2
+
+        await forum_service.delete_comment(first.id, str(test_user.id))
+        fetched = await forum_service.get_discussion_by_id(discussion.id)
+        assert fetched.comment_count == 1
+
+    async def test_listings_hydrate_page_without_per_row_queries(
+        self, mock_db, test_user, second_user, sample_service, monkeypatch
+    ):
+        forum_service = ForumService(mock_db)
+        await forum_service.create_discussion(_discussion("First discussion"), str(test_user.id))
+        await forum_service.create_discussion(_discussion("Second discussion"), str(second_user.id))
+        event = await forum_service.create_event(_event(service_id=str(sample_service.id)), str(test_user.id))
+        await _comment(forum_service, "event", event.id, str(second_user.id))
+
+        async def no_single_lookups(*args, **kwargs):
+            raise AssertionError("per-row query during forum listing")
+
+        monkeypatch.setattr(forum_service.users, "find_one", no_single_lookups)
+        monkeypatch.setattr(forum_service.services, "find_one", no_single_lookups)
+        monkeypatch.setattr(forum_service.forum_comments, "count_documents", no_single_lookups)
+
+        discussions, total = await forum_service.get_discussions()
+        assert total == 2
+        assert {d.user["username"] for d in discussions} == {"testuser", "testuser2"}
+
+        events, _ = await forum_service.get_events()
+        assert events[0].comment_count == 1
+        assert events[0].user["username"] == "testuser"
+        assert events[0].service["title"] == sample_service.title
+
+    async def test_legacy_documents_are_counted_until_reconciled(self, mock_db, test_user, second_user):
+        forum_service = ForumService(mock_db)
+        discussion = await forum_service.create_discussion(_discussion(), str(test_user.id))
+        event = await forum_service.create_event(_event(), str(test_user.id))
+        await _comment(forum_service, "discussion", discussion.id, str(second_user.id))
+        await _comment(forum_service, "event", event.id, str(second_user.id))
+        await _comment(forum_service, "event", event.id, str(test_user.id))
+
+        # A document from before the counter existed, and one whose counter drifted
+        await mock_db.forum_discussions.update_one(
+            {"_id": ObjectId(discussion.id)}, {"$unset": {"comment_count": ""}}
+        )
+        await mock_db.forum_events.update_one({"_id": ObjectId(event.id)}, {"$set": {"comment_count": 7}})
+
+        assert (await forum_service.get_discussion_by_id(discussion.id)).comment_count == 1
+
+        assert await forum_service.reconcile_comment_counts() == {"discussion": 1, "event": 1}
+        assert await forum_service.reconcile_comment_counts() == {"discussion": 0, "event": 0}
+        assert (await mock_db.forum_events.find_one({"_id": ObjectId(event.id)}))["comment_count"] == 2
+        assert (await mock_db.forum_discussions.find_one({"_id": ObjectId(discussion.id)}))["comment_count"] == 1
+
+
+    async def test_first_comment_change_on_legacy_document_recounts(self, mock_db, test_user, second_user):
+        forum_service = ForumService(mock_db)
+        discussion = await forum_service.create_discussion(_discussion(), str(test_user.id))
+        event = await forum_service.create_event(_event(), str(test_user.id))
+        for _ in range(3):
+            await _comment(forum_service, "discussion", discussion.id, str(second_user.id))
+        doomed = await _comment(forum_service, "event", event.id, str(test_user.id))
+        await _comment(forum_service, "event", event.id, str(second_user.id))
+        for collection, target in ((mock_db.forum_discussions, discussion), (mock_db.forum_events, event)):
+            await collection.update_one({"_id": ObjectId(target.id)}, {"$unset": {"comment_count": ""}})
+
+        await _comment(forum_service, "discussion", discussion.id, str(test_user.id))
+        await forum_service.delete_comment(doomed.id, str(test_user.id))
+
+        assert (await mock_db.forum_discussions.find_one({"_id": ObjectId(discussion.id)}))["comment_count"] == 4
+        assert (await mock_db.forum_events.find_one({"_id": ObjectId(event.id)}))["comment_count"] == 1
+
+class TestForumEventGeo:
+    async def test_events_carry_geojson_point(self, mock_db, test_user):
+        forum_service = ForumService(mock_db)
+        data = _event()
+        data.latitude, data.longitude = 41.0, 29.0
+        event = await forum_service.create_event(data, str(test_user.id))
+
+        stored = await mock_db.forum_events.find_one({"_id": ObjectId(event.id)})
+        assert stored["geo"] == {"type": "Point", "coordinates": [29.0, 41.0]}
+
+        await forum_service.update_event(event.id, ForumEventUpdate(latitude=40.5), str(test_user.id))
+        stored = await mock_db.forum_events.find_one({"_id": ObjectId(event.id)})
+        assert stored["geo"] == {"type": "Point", "coordinates": [29.0, 40.5]}
+
+    async def test_has_location_and_upcoming_filters(self, mock_db, test_user):
+        forum_service = ForumService(mock_db)
+        located = _event("Located soon")
+        located.latitude, located.longitude = 41.0, 29.0
+        await forum_service.create_event(located, str(test_user.id))
+        later = _event("Later, anywhere")
+        later.event_at = datetime.utcnow() + timedelta(days=10)
+        await forum_service.create_event(later, str(test_user.id))
+        past = _event("Already happened")
+        past.event_at = datetime.utcnow() - timedelta(days=1)
+        await forum_service.create_event(past, str(test_user.id))
+
+        events, total = await forum_service.get_events(has_location=True)
+        assert total == 1 and events[0].title == "Located soon"
+
+        events, _ = await forum_service.get_events(upcoming=True)
+        assert [e.title for e in events] == ["Located soon", "Later, anywhere"]
+
+    def test_area_filters_use_geo_within(self):
+        query = event_list_query(near=(41.0, 29.0), radius_km=6.3781, upcoming=True)
+        assert query["geo"] == {"$geoWithin": {"$centerSphere": [[29.0, 41.0], 0.001]}}
+        assert "$gte" in query["event_at"]
+
+        query = event_list_query(bbox=(40.0, 42.0, 28.0, 30.0))
+        ring = query["geo"]["$geoWithin"]["$geometry"]["coordinates"][0]
+        assert ring[0] == ring[-1] == [28.0, 40.0]
+        assert [28.0, 42.0] in ring and [30.0, 40.0] in ring
+
+        with pytest.raises(ValueError, match="either near or bbox"):
+            event_list_query(near=(41.0, 29.0), radius_km=5, bbox=(40.0, 42.0, 28.0, 30.0))
+        with pytest.raises(ValueError, match="Invalid bounding box"):
+            event_list_query(bbox=(42.0, 40.0, 28.0, 30.0))
+
+    def test_list_endpoint_validates_area_params(self, test_client):
+        response = test_client.get("/forum/events", params={"near_lat": 41.0})
+        assert response.status_code == 400
+        response = test_client.get("/forum/events", params={"bbox": "1,2,3"})
+        assert response.status_code == 400
+
+
+class TestEventAttendance:
+    async def test_attend_and_unattend_keep_count(self, mock_db, test_user, second_user):
+        forum_service = ForumService(mock_db)
+        event = await forum_service.create_event(_event(), str(test_user.id))
+
+        attended = await forum_service.attend_event(str(event.id), str(second_user.id))
+        assert attended.attendee_count == 1
+        assert attended.is_attending is True
+        with pytest.raises(ValueError, match="Already attending"):
+            await forum_service.attend_event(str(event.id), str(second_user.id))
+
+        await forum_service.attend_event(str(event.id), str(test_user.id))
+        left = await forum_service.unattend_event(str(event.id), str(second_user.id))
+        assert left.attendee_count == 1
+        assert left.is_attending is False
+        left_again = await forum_service.unattend_event(str(event.id), str(second_user.id))
+        assert left_again.attendee_count == 1
+
+        viewer = await forum_service.get_event_by_id(str(event.id), viewer_id=str(test_user.id))
+        assert viewer.is_attending is True
+        anonymous = await forum_service.get_event_by_id(str(event.id))
+        assert anonymous.is_attending is None
+
+    async def test_unmigrated_event_moves_legacy_attendees_on_first_change(
+        self, mock_db, test_user, second_user
+    ):
+        forum_service = ForumService(mock_db)
+        event = await forum_service.create_event(_event(), str(test_user.id))
+        legacy_ids = [ObjectId(str(test_user.id)), ObjectId()]
+        await mock_db.forum_events.update_one(
+            {"_id": ObjectId(str(event.id))},
+            {"$set": {"attendee_ids": legacy_ids}, "$unset": {"attendee_count": ""}},
+        )
+
+        attended = await forum_service.attend_event(str(event.id), str(second_user.id))
+        assert attended.attendee_count == 3
+
+        left = await forum_service.unattend_event(str(event.id), str(test_user.id))
+        assert left.attendee_count == 2
+        assert left.is_attending is False
+        stored = await mock_db.forum_events.find_one({"_id": ObjectId(str(event.id))})
+        assert "attendee_ids" not in stored
+
+    async def test_attendees_are_paged_without_per_user_queries(
+        self, mock_db, test_user, second_user, monkeypatch
+    ):
+        forum_service = ForumService(mock_db)
+        event = await forum_service.create_event(_event(), str(test_user.id))
+        await forum_service.attend_event(str(event.id), str(test_user.id))
+        await forum_service.attend_event(str(event.id), str(second_user.id))
+
+        async def no_single_lookups(*args, **kwargs):
+            raise AssertionError("per-attendee user lookup")
+
+        monkeypatch.setattr(forum_service.users, "find_one", no_single_lookups)
+        first_page = await forum_service.get_event_attendees(str(event.id), page=1, limit=1)
+        second_page = await forum_service.get_event_attendees(str(event.id), page=2, limit=1)
+
+        assert [a["username"] for a in first_page + second_page] == ["testuser", "testuser2"]
+
+    async def test_deleting_event_drops_attendance(self, mock_db, test_user):
+        forum_service = ForumService(mock_db)
+        event = await forum_service.create_event(_event(), str(test_user.id))
+        await forum_service.attend_event(str(event.id), str(test_user.id))
+
+        await forum_service.delete_event(str(event.id), str(test_user.id))
+
+        assert await mock_db.event_attendance.count_documents({}) == 0
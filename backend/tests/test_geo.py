@@ -0,0 +1,46 @@
+import math
+import random
+
+from app.core import geo
+
+
+class TestGeoGrid:
+    """Test the grid backing the near-me candidate cache"""
+
+    def test_radius_bucket(self):
+        assert geo.radius_bucket(0.5) == 1
+        assert geo.radius_bucket(5) == 5
+        assert geo.radius_bucket(7.5) == 10
+        assert geo.radius_bucket(500) is None
+
+    def test_coverage_box_contains_query_disk(self):
+        """Every point within the bucket radius of any point in the cell lies in the box"""
+        rng = random.Random(7)
+        for _ in range(200):
+            bucket = rng.choice(geo.RADIUS_BUCKETS_KM)
+            lat, lon = rng.uniform(-60, 60), rng.uniform(-170, 170)
+            box = geo.coverage_box(geo.cell_for(lat, lon, bucket), bucket)
+            lat_min, lat_max, lon_min, lon_max = box
+            lat_pad = bucket / geo.KM_PER_DEGREE
+            lon_pad = bucket / (geo.KM_PER_DEGREE * math.cos(math.radians(abs(lat) + lat_pad)))
+            assert lat_min <= lat - lat_pad and lat + lat_pad <= lat_max
+            assert lon_min <= lon - lon_pad and lon + lon_pad <= lon_max
+
+    def test_point_cell_is_tagged_on_covering_entries(self):
+        """A write at a point invalidates every cell whose coverage box holds that point"""
+        bucket = 5
+        cell = geo.cell_for(41.0, 29.0, bucket)
+        box = geo.coverage_box(cell, bucket)
+        entry_tags = {geo.cell_tag(bucket, c) for c in geo.cells_in_box(box, bucket)}
+
+        inside = (box[0] + 0.001, box[3] - 0.001)
+        assert set(geo.cell_tags_for_point(*inside)) & entry_tags
+
+    def test_polar_and_antimeridian_cells_are_not_cached(self):
+        assert geo.coverage_box(geo.cell_for(89.99, 0, 100), 100) is None
+        assert geo.coverage_box(geo.cell_for(0, 179.99, 100), 100) is None
+
+    def test_point_of_accepts_plain_and_geojson(self):
+        assert geo.point_of({"latitude": 1.0, "longitude": 2.0}) == (1.0, 2.0)
+        assert geo.point_of({"type": "Point", "coordinates": [2.0, 1.0]}) == (1.0, 2.0)
+        assert geo.point_of(None) is None
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.models.service import ServiceCreate, ServiceUpdate
+from app.models.user import UserUpdate
+from app.services import image_service
+from app.services.image_service import ImageService, upload_path
+from app.services.service_service import ServiceService
+from app.services.user_service import UserService
+
+
+def _manifest(url):
+    base = url.rsplit(".", 1)[0]
+    manifest = {"url": url, "width": 2000, "height": 1500, "placeholder": "data:image/webp;base64,AAAA"}
+    for name, edge in (("thumb", 160), ("card", 480), ("full", 1280)):
+        manifest[name] = {"webp": f"{base}_{name}.webp", "fallback": f"{base}_{name}.jpg", "width": edge, "height": edge}
+    return manifest
+
+
+class TestImageVariants:
+    def test_upload_path_stays_inside_upload_dir(self):
+        assert upload_path("/uploads/services/a.jpg") == os.path.join(
+            os.path.abspath(settings.upload_dir), "services", "a.jpg"
+        )
+        assert upload_path("/uploads/../secret.jpg") is None
+        assert upload_path("https://example.com/a.jpg") is None
+        assert upload_path(None) is None
+
+    async def test_service_carries_known_variants(self, mock_db, test_user, sample_service_data):
+        processed, pending = "/uploads/services/a.jpg", "/uploads/services/b.jpg"
+        await mock_db.image_variants.insert_one(_manifest(processed))
+        service_service = ServiceService(mock_db)
+
+        service = await service_service.create_service(
+            ServiceCreate(**sample_service_data, image_urls=[processed, pending]), str(test_user.id)
+        )
+
+        assert [v and v["card"]["webp"] for v in service.image_variants] == ["/uploads/services/a_card.webp", None]
+        card = service_service.to_card(await mock_db.services.find_one({"title": service.title}))
+        assert card.image_variants["thumb"]["webp"] == "/uploads/services/a_thumb.webp"
+
+        updated = await service_service.update_service(
+            str(service.id), ServiceUpdate(image_urls=[pending]), str(test_user.id)
+        )
+        assert updated.image_variants == [None]
+
+    async def test_late_manifest_reaches_existing_documents(self, mock_db, test_user, sample_service_data):
+        url = "/uploads/services/late.jpg"
+        service_service = ServiceService(mock_db)
+        service = await service_service.create_service(
+            ServiceCreate(**sample_service_data, image_urls=[url]), str(test_user.id)
+        )
+        await UserService(mock_db).update_user(str(test_user.id), UserUpdate(profile_picture=url))
+        assert service.image_variants == [None]
+
+        manifest = _manifest(url)
+        await mock_db.image_variants.insert_one(dict(manifest))
+        await ImageService(mock_db).refresh_references(url, manifest)
+
+        refreshed = await service_service.get_service_by_id(str(service.id))
+        assert refreshed.image_variants[0]["full"]["webp"] == "/uploads/services/late_full.webp"
+        user = await UserService(mock_db).get_user_by_id(str(test_user.id))
+        assert user.profile_picture_variants["thumb"]["webp"] == "/uploads/services/late_thumb.webp"
+
+    async def test_profile_update_picks_up_manifest(self, mock_db, test_user):
+        url = "/uploads/profile/me.jpg"
+        await mock_db.image_variants.insert_one(_manifest(url))
+
+        user = await UserService(mock_db).update_user(str(test_user.id), UserUpdate(profile_picture=url))
+
+        assert user.profile_picture_variants["placeholder"].startswith("data:image/webp")
+
+    async def test_skipped_without_local_file(self, mock_db):
+        assert await ImageService(mock_db).process_upload("https://example.com/a.jpg") is None
+
+    async def test_derive_variants(self, mock_db, tmp_path, monkeypatch):
+        Image = pytest.importorskip("PIL.Image")
+        monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+        monkeypatch.setattr(settings, "image_worker_processes", 0)
+        (tmp_path / "services").mkdir()
+        Image.new("RGB", (2000, 1000), "orange").save(tmp_path / "services" / "big.jpg", "JPEG")
+
+        try:
+            manifest = await ImageService(mock_db).process_upload("/uploads/services/big.jpg")
+        finally:
+            image_service.close_image_pool()
+
+        assert (manifest["thumb"]["width"], manifest["thumb"]["height"]) == (160, 160)
+        assert (manifest["card"]["width"], manifest["card"]["height"]) == (480, 240)
+        assert manifest["full"]["fallback"] == "/uploads/services/big_full.jpg"
+        for name in ("thumb", "card", "full"):
+            with Image.open(tmp_path / "services" / f"big_{name}.webp") as derived:
+                assert derived.format == "WEBP"
+                assert "exif" not in derived.info
+        stored = await mock_db.image_variants.find_one({"url": "/uploads/services/big.jpg"})
+        assert stored["card"]["webp"] == "/uploads/services/big_card.webp"
@@ -0,0 +1,26 @@
+import pytest
+from fastapi import status
+
+
+class TestBootstrapAPI:
+    """Test GET /me/bootstrap"""
+
+    def test_bootstrap_matches_individual_endpoints(self, test_client, auth_headers, sample_service):
+        """Each section carries the same payload as the endpoint it replaces"""
+        test_client.post(f"/services/{sample_service.id}/save", headers=auth_headers)
+
+        response = test_client.get("/me/bootstrap", headers=auth_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["user"] == test_client.get("/auth/me", headers=auth_headers).json()
+        assert data["timebank"] == test_client.get("/users/timebank", headers=auth_headers).json()
+        assert data["badges"] == test_client.get("/users/badges", headers=auth_headers).json()
+        assert data["saved_service_ids"] == [str(sample_service.id)]
+        assert data["chat_rooms"] == test_client.get("/chat/rooms", headers=auth_headers).json()
+        assert data["join_requests"] == test_client.get("/join-requests/my-requests", headers=auth_headers).json()
+
+    def test_bootstrap_requires_auth(self, test_client):
+        response = test_client.get("/me/bootstrap")
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,74 @@
+from datetime import datetime
+from bson import ObjectId
+from fastapi import status
+
+from app.core.negotiation import MSGPACK_MEDIA_TYPE, packb, prefers_msgpack, unpackb
+
+MSGPACK = {"Accept": MSGPACK_MEDIA_TYPE}
+
+
+class TestAcceptParsing:
+    def test_prefers_msgpack(self):
+        assert prefers_msgpack("application/msgpack")
+        assert prefers_msgpack("application/x-msgpack, application/json;q=0.5")
+
+    def test_json_wins_ties_and_defaults(self):
+        assert not prefers_msgpack("")
+        assert not prefers_msgpack("*/*")
+        assert not prefers_msgpack("application/json, application/msgpack")
+        assert not prefers_msgpack("application/msgpack;q=0")
+
+
+class TestPackb:
+    def test_bson_types_encoded_like_json(self):
+        oid = ObjectId()
+        at = datetime(2024, 5, 6, 7, 8, 9, 123000)
+        data = unpackb(packb({"id": oid, "at": at}))
+
+        assert data == {"id": str(oid), "at": "2024-05-06T07:08:09.123000"}
+
+
+class TestMessagePackResponses:
+    def test_service_list(self, test_client, sample_service):
+        """List routes encode the same data as the JSON response"""
+        json_body = test_client.get("/services/").json()
+        response = test_client.get("/services/", headers=MSGPACK)
+
+        assert response.headers["content-type"] == MSGPACK_MEDIA_TYPE
+        assert unpackb(response.content) == json_body
+
+    def test_list_and_detail_encode_alike(self, test_client, sample_service):
+        """A service has the same value types whether it comes from a list or a detail route"""
+        listed = unpackb(test_client.get("/services/", headers=MSGPACK).content)["services"][0]
+        detail = unpackb(test_client.get(f"/services/{sample_service.id}", headers=MSGPACK).content)
+
+        for key in ("_id", "user_id", "created_at", "updated_at"):
+            assert type(listed[key]) is type(detail[key]) is str
+            assert listed[key] == detail[key]
+
+    def test_vary_accept(self, test_client, sample_service):
+        """Shared caches must key negotiated responses on Accept (and Accept-Encoding)"""
+        for headers in ({}, MSGPACK, {**MSGPACK, "Accept-Encoding": "gzip"}):
+            for path in ("/services/", f"/services/{sample_service.id}"):
+                vary = {v.strip() for v in test_client.get(path, headers=headers).headers["vary"].split(",")}
+                assert {"Accept", "Accept-Encoding"} <= vary
+
+    def test_formats_cached_separately(self, test_client, sample_service):
+        """A cached JSON page is never served to a MessagePack client and vice versa"""
+        test_client.get("/services/")
+        assert test_client.get("/services/", headers=MSGPACK).headers["content-type"] == MSGPACK_MEDIA_TYPE
+        assert test_client.get("/services/").headers["content-type"] == "application/json"
+
+    def test_detail_route_uses_default_response_class(self, test_client, sample_service):
+        """Routes without custom encoding switch format through the default response class"""
+        response = test_client.get(f"/services/{sample_service.id}", headers=MSGPACK)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == MSGPACK_MEDIA_TYPE
+        assert unpackb(response.content)["title"] == sample_service.title
+
+    def test_errors_stay_json(self, test_client):
+        response = test_client.get(f"/services/{ObjectId()}", headers=MSGPACK)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json()["detail"]
@@ -0,0 +1,75 @@
+import pytest
+from datetime import datetime
+from bson import ObjectId, Decimal128
+from pydantic import ValidationError
+
+from app.core.serialization import TrustedReader, encode_json, stringify_ids, trusted_reader
+from app.models.chat import MessageResponse, MessageListResponse
+from app.models.service import ServiceResponse, ServiceListResponse
+from app.models.transaction import TransactionBase, TransactionResponse
+
+
+def _service_doc():
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(), "title": "Garden help", "description": "Weeding and watering",
+        "category": "garden", "tags": [{"label": "garden", "entityId": "Q1"}], "estimated_duration": 2.0,
+        "location": {"latitude": 41.0, "longitude": 29.0, "address": "Istanbul"}, "is_remote": False,
+        "service_type": "offer", "max_participants": 2, "user_id": ObjectId(), "status": "active",
+        "created_at": now, "updated_at": now, "matched_user_ids": [ObjectId()],
+        "receiver_confirmed_ids": [], "image_urls": [], "legacy_field": "dropped",
+    }
+
+
+class TestTrustedReader:
+    """Test the trusted read path against regular validation"""
+
+    def test_stringify_ids(self):
+        oid = ObjectId()
+        assert stringify_ids({"a": [oid, {"b": oid}]}) == {"a": [str(oid), {"b": str(oid)}]}
+
+    def test_service_listing_bytes_match_validated(self):
+        doc = _service_doc()
+        trusted = ServiceListResponse.model_construct(
+            services=[trusted_reader(ServiceResponse).build(doc)], total=1, page=1, limit=20
+        )
+        validated = ServiceListResponse(services=[ServiceResponse(**doc)], total=1, page=1, limit=20)
+
+        assert encode_json(trusted) == validated.model_dump_json(by_alias=True).encode()
+
+    def test_transaction_coercion(self):
+        now = datetime.utcnow()
+        doc = {
+            "_id": ObjectId(), "service_id": ObjectId(), "provider_id": ObjectId(),
+            "requester_id": ObjectId(), "timebank_hours": Decimal128("1.5"), "status": "pending",
+            "created_at": now, "updated_at": now,
+        }
+        reader = TrustedReader(
+            TransactionResponse, coerce={"timebank_hours": TransactionBase.validate_timebank_hours}
+        )
+
+        transaction = reader.build(doc)
+
+        assert transaction.timebank_hours == 1.5
+        assert encode_json(transaction) == TransactionResponse(**doc).model_dump_json(by_alias=True).encode()
+
+    def test_message_listing_bytes_match_validated(self):
+        now = datetime.utcnow()
+        doc = {
+            "_id": ObjectId(), "room_id": ObjectId(), "sender_id": ObjectId(), "content": "hi",
+            "message_type": "text", "created_at": now, "updated_at": now,
+            "sender": {"id": "x", "username": "u"},
+        }
+        trusted = MessageListResponse.model_construct(
+            messages=[trusted_reader(MessageResponse).build(doc)], total=1, page=1, limit=50
+        )
+        validated = MessageListResponse(messages=[MessageResponse(**doc)], total=1, page=1, limit=50)
+
+        assert encode_json(trusted) == validated.model_dump_json(by_alias=True).encode()
+
+    def test_missing_required_field_falls_back_to_validation(self):
+        doc = _service_doc()
+        del doc["title"]
+
+        with pytest.raises(ValidationError):
+            trusted_reader(ServiceResponse).build(doc)
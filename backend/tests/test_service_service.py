@@ -303,3 +303,142 @@ class TestServiceService:
                 str(sample_service.user_id),
             )
 
+
+
+class TestServiceDetailCache:
+    """Test the read-through cache behind get_service_by_id"""
+
+    @pytest.mark.asyncio
+    async def test_repeated_reads_hit_cache(self, mock_db, sample_service):
+        """Second lookup is served from the cache"""
+        from app.services.service_service import service_cache
+        service_service = ServiceService(mock_db)
+
+        await service_service.get_service_by_id(str(sample_service.id))
+        before = service_cache.stats()
+        service = await service_service.get_service_by_id(str(sample_service.id))
+
+        assert service.id == sample_service.id
+        assert service_cache.stats()["hits"] == before["hits"] + 1
+        assert service_cache.stats()["misses"] == before["misses"]
+
+    @pytest.mark.asyncio
+    async def test_update_invalidates_cache(self, mock_db, sample_service):
+        """update_service never returns the pre-update cached document"""
+        service_service = ServiceService(mock_db)
+        await service_service.get_service_by_id(str(sample_service.id))
+
+        await service_service.update_service(
+            str(sample_service.id), ServiceUpdate(title="Renamed Service")
+        )
+        service = await service_service.get_service_by_id(str(sample_service.id))
+
+        assert service.title == "Renamed Service"
+
+    @pytest.mark.asyncio
+    async def test_cancel_and_match_invalidate_cache(self, mock_db, sample_service, second_user):
+        """Status changes from match/cancel are visible on the next read"""
+        service_service = ServiceService(mock_db)
+        await service_service.get_service_by_id(str(sample_service.id))
+
+        await service_service.match_service(str(sample_service.id), str(second_user.id))
+        service = await service_service.get_service_by_id(str(sample_service.id))
+        assert service.status == ServiceStatus.IN_PROGRESS
+
+        await service_service.cancel_service(str(sample_service.id), str(sample_service.user_id))
+        service = await service_service.get_service_by_id(str(sample_service.id))
+        assert service.status == ServiceStatus.CANCELLED
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_load_once(self, mock_db, sample_service):
+        """Concurrent misses for the same id are coalesced into one load"""
+        import asyncio
+        from app.services.service_service import service_cache
+        service_service = ServiceService(mock_db)
+        calls = 0
+        original = service_service._load_service_doc
+
+        async def slow_load(service_id):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return await original(service_id)
+
+        service_service._load_service_doc = slow_load
+        results = await asyncio.gather(*[
+            service_service.get_service_by_id(str(sample_service.id)) for _ in range(5)
+        ])
+
+        assert calls == 1
+        assert all(r.id == sample_service.id for r in results)
+        assert service_cache.stats()["coalesced"] >= 4
+
+
+class TestNearbyServiceCache:
+    """Test near-me queries served from geo-cell candidate sets"""
+
+    async def _create_at(self, service_service, user_id, data, latitude, longitude, **overrides):
+        service_data = {**data, **overrides}
+        service_data["location"] = {"latitude": latitude, "longitude": longitude, "address": "x"}
+        return await service_service.create_service(ServiceCreate(**service_data), user_id)
+
+    @pytest.mark.asyncio
+    async def test_radius_filter_is_exact(self, mock_db, test_user, sample_service_data):
+        """Only services within the requested radius are returned, newest first"""
+        service_service = ServiceService(mock_db)
+        user_id = str(test_user.id)
+        near = await self._create_at(service_service, user_id, sample_service_data, 41.010, 28.980)
+        nearer = await self._create_at(service_service, user_id, sample_service_data, 41.009, 28.979)
+        await self._create_at(service_service, user_id, sample_service_data, 41.100, 28.980)  # ~10 km
+
+        filters = ServiceFilters(location={"latitude": 41.008, "longitude": 28.978}, radius=3)
+        services, total = await service_service.get_services(filters, page=1, limit=10)
+
+        assert total == 2
+        assert [s.id for s in services] == [nearer.id, near.id]
+
+    @pytest.mark.asyncio
+    async def test_nearby_queries_share_cell(self, mock_db, test_user, sample_service_data):
+        """Slightly different coordinates and radii in one cell reuse the candidate set"""
+        from app.services.service_service import nearby_cache
+        service_service = ServiceService(mock_db)
+        await self._create_at(service_service, str(test_user.id), sample_service_data, 41.010, 28.980)
+
+        first = ServiceFilters(location={"latitude": 41.0081, "longitude": 28.9781}, radius=4)
+        second = ServiceFilters(location={"latitude": 41.0083, "longitude": 28.9786}, radius=5)
+        await service_service.get_services(first, page=1, limit=10)
+        before = nearby_cache.stats()
+        services, total = await service_service.get_services(second, page=1, limit=10)
+
+        assert total == 1
+        assert nearby_cache.stats()["hits"] == before["hits"] + 1
+        assert nearby_cache.stats()["misses"] == before["misses"]
+
+    @pytest.mark.asyncio
+    async def test_create_and_status_change_invalidate_cell(self, mock_db, test_user, sample_service_data):
+        """New services in the cell and status changes are visible on the next query"""
+        service_service = ServiceService(mock_db)
+        user_id = str(test_user.id)
+        filters = ServiceFilters(
+            location={"latitude": 41.008, "longitude": 28.978}, radius=2, status=ServiceStatus.ACTIVE
+        )
+        first = await self._create_at(service_service, user_id, sample_service_data, 41.010, 28.980)
+        assert (await service_service.get_services(filters, page=1, limit=10))[1] == 1
+
+        await self._create_at(service_service, user_id, sample_service_data, 41.009, 28.979)
+        assert (await service_service.get_services(filters, page=1, limit=10))[1] == 2
+
+        await service_service.cancel_service(str(first.id), user_id)
+        assert (await service_service.get_services(filters, page=1, limit=10))[1] == 1
+
+    @pytest.mark.asyncio
+    async def test_dense_cell_falls_back_to_geo_query(self, mock_db, test_user, sample_service_data, monkeypatch):
+        """Cells with more candidates than the limit are not answered from the cache"""
+        from app.core.config import settings
+        service_service = ServiceService(mock_db)
+        monkeypatch.setattr(settings, "geo_cache_max_candidates", 1)
+        for _ in range(2):
+            await self._create_at(service_service, str(test_user.id), sample_service_data, 41.010, 28.980)
+
+        filters = ServiceFilters(location={"latitude": 41.008, "longitude": 28.978}, radius=2)
+        assert await service_service._get_nearby_services(filters, 1, 10) is None
@@ -236,3 +236,198 @@ class TestServicesAPI:
         
         assert response.status_code == status.HTTP_400_BAD_REQUEST
 
+
+
+class TestServiceListCache:
+    """Test the response cache behind GET /services"""
+
+    def test_repeated_listing_served_from_cache(self, test_client, sample_service):
+        """Identical queries (tag order aside) are answered with the same cached bytes"""
+        from app.services.service_service import service_list_cache
+
+        first = test_client.get("/services/", params={"tags": "test,sample"})
+        before = service_list_cache.stats()
+        second = test_client.get("/services/", params={"tags": "sample,test"})
+
+        assert second.status_code == status.HTTP_200_OK
+        assert second.content == first.content
+        assert service_list_cache.stats()["hits"] == before["hits"] + 2  # version + page
+
+    def test_create_bumps_listing_version(self, test_client, sample_service, auth_headers, sample_service_data):
+        """A newly created service shows up on the next listing request"""
+        assert test_client.get("/services/").json()["total"] == 1
+
+        test_client.post("/services/", json=sample_service_data, headers=auth_headers)
+
+        assert test_client.get("/services/").json()["total"] == 2
+
+    def test_status_change_bumps_listing_version(self, test_client, sample_service, auth_headers):
+        """Cancelling a service drops it from a cached status-filtered listing"""
+        params = {"service_status": "active"}
+        assert test_client.get("/services/", params=params).json()["total"] == 1
+
+        test_client.post(f"/services/{sample_service.id}/cancel", headers=auth_headers)
+
+        assert test_client.get("/services/", params=params).json()["total"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cached_body_matches_response_model(self, test_client, mock_db, sample_service):
+        """Cached bytes carry the same payload the response model would produce"""
+        from fastapi.encoders import jsonable_encoder
+        from app.models.service import ServiceListResponse, ServiceFilters
+        from app.services.service_service import ServiceService
+
+        response = test_client.get("/services/")
+        services, total = await ServiceService(mock_db).get_services(ServiceFilters(), 1, 20)
+        expected = ServiceListResponse(services=services, total=total, page=1, limit=20)
+
+        assert response.json() == jsonable_encoder(expected)
+
+
+class TestServiceListViews:
+    """Test view=card and fields= on service listings"""
+
+    def test_card_view(self, test_client, auth_headers, sample_service_data):
+        """Card view returns slim items with a truncated description"""
+        data = {**sample_service_data, "description": "word " * 300}
+        test_client.post("/services/", json=data, headers=auth_headers)
+
+        response = test_client.get("/services/", params={"view": "card"})
+
+        assert response.status_code == status.HTTP_200_OK
+        card = response.json()["services"][0]
+        assert card["tags"] == ["test", "sample"]
+        assert card["description"].endswith("…")
+        assert len(card["description"]) <= 201
+        assert card["participant_count"] == 0
+        assert "scheduling_type" not in card
+        assert "receiver_confirmed_ids" not in card
+
+    def test_sparse_fields(self, test_client, sample_service):
+        """fields= returns only the requested fields plus the id"""
+        response = test_client.get("/services/", params={"fields": "title,status"})
+
+        assert response.status_code == status.HTTP_200_OK
+        item = response.json()["services"][0]
+        assert item == {"_id": str(sample_service.id), "title": sample_service.title, "status": "active"}
+
+    @pytest.mark.asyncio
+    async def test_sparse_image_urls_fall_back_to_legacy_image_url(self, test_client, mock_db, sample_service):
+        """fields=image_urls reads a legacy image_url the same way the card view does"""
+        from bson import ObjectId
+
+        await mock_db.services.update_one(
+            {"_id": ObjectId(str(sample_service.id))},
+            {"$set": {"image_url": "/uploads/services/legacy.jpg"}, "$unset": {"image_urls": ""}},
+        )
+
+        sparse = test_client.get("/services/", params={"fields": "image_urls"}).json()["services"][0]
+        card = test_client.get("/services/", params={"view": "card"}).json()["services"][0]
+
+        assert sparse == {"_id": str(sample_service.id), "image_urls": ["/uploads/services/legacy.jpg"]}
+        assert card["image_url"] == "/uploads/services/legacy.jpg"
+
+    def test_listing_schema_declares_every_shape(self, test_client):
+        for path in ("/services/", "/services/saved"):
+            schema = test_client.get("/openapi.json").json()["paths"][path]["get"]["responses"]["200"]
+            refs = {
+                option["$ref"].rsplit("/", 1)[-1]
+                for option in schema["content"]["application/json"]["schema"]["anyOf"]
+            }
+            assert refs == {"ServiceListResponse", "ServiceCardListResponse", "ServiceSparseListResponse"}
+
+    def test_unknown_field_rejected(self, test_client, sample_service):
+        response = test_client.get("/services/", params={"fields": "title,password"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "password" in response.json()["detail"]
+
+    def test_saved_services_card_view(self, test_client, auth_headers, sample_service):
+        """Saved services support the card view"""
+        test_client.post(f"/services/{sample_service.id}/save", headers=auth_headers)
+
+        full = test_client.get("/services/saved", headers=auth_headers).json()
+        cards = test_client.get("/services/saved", params={"view": "card"}, headers=auth_headers).json()
+
+        assert full["total"] == cards["total"] == 1
+        assert cards["services"][0]["_id"] == full["services"][0]["_id"] == str(sample_service.id)
+        assert "scheduling_type" in full["services"][0]
+        assert "scheduling_type" not in cards["services"][0]
+
+
+class TestServiceDetailView:
+    """Test GET /services/{id}/view"""
+
+    def _add_comment_and_event(self, test_client, auth_headers, service_id):
+        test_client.post("/comments/", json={"content": "Great", "service_id": service_id}, headers=auth_headers)
+        test_client.post(
+            "/forum/events",
+            json={"title": "Meetup", "description": "Bring tools", "event_at": "2030-01-01T10:00:00",
+                  "service_id": service_id},
+            headers=auth_headers,
+        )
+
+    def test_view_anonymous(self, test_client, auth_headers, sample_service, test_user):
+        """All sections are resolved in one call; viewer sections stay empty without a token"""
+        service_id = str(sample_service.id)
+        self._add_comment_and_event(test_client, auth_headers, service_id)
+
+        response = test_client.get(f"/services/{service_id}/view")
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["service"]["title"] == sample_service.title
+        assert data["participants"] == [{
+            "id": str(test_user.id), "username": test_user.username,
+            "full_name": test_user.full_name, "role": "provider",
+        }]
+        assert data["comment_total"] == 1
+        assert data["comments"][0]["user"]["username"] == test_user.username
+        assert data["linked_event_total"] == 1
+        event = data["linked_events"][0]
+        assert event["user"]["username"] == test_user.username
+        assert event["service"] == {"id": service_id, "title": sample_service.title, "service_type": "offer"}
+        assert event["comment_count"] == 0
+        assert data["pending_request"] is None
+        assert data["is_saved"] is None
+
+    def test_view_matches_section_endpoints(self, test_client, auth_headers, sample_service):
+        """Sections carry the same payloads as the individual endpoints"""
+        service_id = str(sample_service.id)
+        self._add_comment_and_event(test_client, auth_headers, service_id)
+
+        data = test_client.get(f"/services/{service_id}/view").json()
+
+        comments = test_client.get(f"/comments/service/{service_id}").json()["comments"]
+        # (the per-comment user lookup misses under the mock DB, which stringifies stored ObjectIds)
+        assert [{**c, "user": None} for c in data["comments"]] == [{**c, "user": None} for c in comments]
+        assert data["linked_events"] == test_client.get(f"/forum/services/{service_id}/linked-events").json()["events"]
+        assert data["participants"] == test_client.get(f"/services/{service_id}/participants").json()["participants"]
+
+    def test_view_authenticated_saved_status(self, test_client, auth_headers, sample_service):
+        service_id = str(sample_service.id)
+        assert test_client.get(f"/services/{service_id}/view", headers=auth_headers).json()["is_saved"] is False
+
+        test_client.post(f"/services/{service_id}/save", headers=auth_headers)
+
+        assert test_client.get(f"/services/{service_id}/view", headers=auth_headers).json()["is_saved"] is True
+
+    def test_view_section_limits(self, test_client, auth_headers, sample_service):
+        service_id = str(sample_service.id)
+        for _ in range(3):
+            self._add_comment_and_event(test_client, auth_headers, service_id)
+
+        data = test_client.get(
+            f"/services/{service_id}/view", params={"comment_limit": 2, "event_limit": 0}
+        ).json()
+
+        assert len(data["comments"]) == 2
+        assert data["comment_total"] == 3
+        assert data["linked_events"] == []
+        assert data["linked_event_total"] == 3
+
+    def test_view_not_found(self, test_client):
+        from bson import ObjectId
+
+        assert test_client.get(f"/services/{ObjectId()}/view").status_code == status.HTTP_404_NOT_FOUND
+        assert test_client.get("/services/not-an-id/view").status_code == status.HTTP_404_NOT_FOUND
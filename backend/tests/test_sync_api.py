@@ -0,0 +1,155 @@
+import pytest
+from bson import ObjectId
+from datetime import datetime, timedelta
+from fastapi import status
+
+from app.core.config import settings
+from app.services.sync_service import decode_sync_token, encode_sync_token
+
+
+def _sync(test_client, auth_headers, token=None):
+    params = {"since": token} if token else {}
+    response = test_client.get("/sync", params=params, headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+@pytest.fixture
+def no_overlap(monkeypatch):
+    """Tokens at the server clock, so a sync right after a write sees only that write"""
+    monkeypatch.setattr(settings, "sync_overlap_seconds", 0.0)
+
+
+class TestSyncAPI:
+    """Test GET /sync"""
+
+    def test_token_roundtrip(self):
+        moment = datetime(2025, 5, 1, 12, 30, 15, 123000)
+        assert decode_sync_token(encode_sync_token(moment)) == moment
+
+    def test_invalid_token(self, test_client, auth_headers):
+        response = test_client.get("/sync", params={"since": "not-a-token"}, headers=auth_headers)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_full_snapshot(self, test_client, auth_headers, sample_service):
+        data = _sync(test_client, auth_headers)
+
+        assert data["full"] is True
+        assert data["services"]["created"] == [str(sample_service.id)]
+        item = data["services"]["items"][0]
+        assert item["title"] == sample_service.title
+        assert item["tags"] == ["test", "sample"]  # card view
+        assert data["token"]
+
+    def test_delta_reports_updates_only(self, test_client, auth_headers, sample_service, no_overlap):
+        token = _sync(test_client, auth_headers)["token"]
+
+        assert _sync(test_client, auth_headers, token)["services"] == {
+            "created": [], "updated": [], "deleted": [], "items": []
+        }
+
+        test_client.put(f"/services/{sample_service.id}", json={"title": "Renamed service"}, headers=auth_headers)
+        data = _sync(test_client, auth_headers, token)
+
+        assert data["full"] is False
+        assert data["services"]["updated"] == [str(sample_service.id)]
+        assert data["services"]["items"][0]["title"] == "Renamed service"
+
+    def test_deleted_service_tombstone(self, test_client, auth_headers, sample_service, no_overlap):
+        token = _sync(test_client, auth_headers)["token"]
+
+        test_client.delete(f"/services/{sample_service.id}", headers=auth_headers)
+        data = _sync(test_client, auth_headers, token)
+
+        assert data["services"]["deleted"] == [str(sample_service.id)]
+        assert data["services"]["items"] == []
+
+    def test_saved_and_unsaved(self, test_client, auth_headers, sample_service, no_overlap):
+        token = _sync(test_client, auth_headers)["token"]
+
+        test_client.post(f"/services/{sample_service.id}/save", headers=auth_headers)
+        saved = _sync(test_client, auth_headers, token)
+        assert saved["saved_services"]["created"] == [str(sample_service.id)]
+
+        test_client.delete(f"/services/{sample_service.id}/save", headers=auth_headers)
+        unsaved = _sync(test_client, auth_headers, saved["token"])
+        assert unsaved["saved_services"]["deleted"] == [str(sample_service.id)]
+
+    def test_max_items_sets_has_more(self, test_client, auth_headers, sample_service_data, monkeypatch):
+        monkeypatch.setattr(settings, "sync_max_items", 2)
+        for _ in range(3):
+            test_client.post("/services/", json=sample_service_data, headers=auth_headers)
+
+        first = _sync(test_client, auth_headers)
+        assert first["has_more"] is True
+        assert len(first["services"]["items"]) == 2
+
+        second = _sync(test_client, auth_headers, first["token"])
+        ids = set(first["services"]["created"]) | set(second["services"]["created"])
+        assert second["has_more"] is False
+        assert len(ids) == 3
+
+    def test_expired_token_gets_full_snapshot(self, test_client, auth_headers, sample_service):
+        old = datetime.utcnow() - timedelta(days=settings.sync_tombstone_retention_days + 1)
+
+        data = _sync(test_client, auth_headers, encode_sync_token(old))
+
+        assert data["full"] is True
+        assert data["services"]["created"] == [str(sample_service.id)]
+
+    @pytest.mark.asyncio
+    async def test_capped_snapshot_of_old_documents_finishes(
+        self, test_client, auth_headers, mock_db, sample_service_data, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "sync_max_items", 2)
+        for _ in range(5):
+            test_client.post("/services/", json=sample_service_data, headers=auth_headers)
+        old = datetime.utcnow() - timedelta(days=settings.sync_tombstone_retention_days + 10)
+        docs = await mock_db.services.find({}).to_list(length=None)
+        for index, doc in enumerate(docs):
+            await mock_db.services.update_one(
+                {"_id": ObjectId(doc["_id"])}, {"$set": {"updated_at": old + timedelta(days=index)}}
+            )
+        service_ids = [str(doc["_id"]) for doc in docs]
+
+        page = _sync(test_client, auth_headers)
+        assert page["full"] is True
+        seen = set(page["services"]["created"])
+        for _ in range(len(service_ids)):
+            if not page["has_more"]:
+                break
+            page = _sync(test_client, auth_headers, page["token"])
+            assert page["full"] is False
+            seen |= set(page["services"]["created"]) | set(page["services"]["updated"])
+
+        assert page["has_more"] is False
+        assert seen == set(service_ids)
+
+    def test_messages_and_soft_delete(
+        self, test_client, auth_headers, second_auth_headers, test_user, second_user, no_overlap
+    ):
+        room = test_client.post(
+            "/chat/rooms", json={"participant_ids": [str(test_user.id), str(second_user.id)]}, headers=auth_headers
+        ).json()
+        token = _sync(test_client, auth_headers)["token"]
+
+        message = test_client.post(
+            "/chat/messages", json={"room_id": room["_id"], "content": "Hello"}, headers=auth_headers
+        ).json()
+        data = _sync(test_client, auth_headers, token)
+        assert data["messages"]["created"] == [message["_id"]]
+        assert data["messages"]["items"][0]["content"] == "Hello"
+        assert data["chat_rooms"]["updated"] == [room["_id"]]  # last_message_at bump
+
+        # Reading on another device reaches this one through the room's updated_at
+        second_token = _sync(test_client, second_auth_headers)["token"]
+        test_client.post(f"/chat/rooms/{room['_id']}/read", headers=second_auth_headers)
+        rooms = _sync(test_client, second_auth_headers, second_token)["chat_rooms"]
+        assert rooms["updated"] == [room["_id"]]
+        assert rooms["items"][0]["unread_count"] == 0
+
+        test_client.delete(f"/chat/messages/{message['_id']}", headers=auth_headers)
+        data = _sync(test_client, auth_headers, data["token"])
+        assert data["messages"]["deleted"] == [message["_id"]]
+        assert data["messages"]["items"] == []
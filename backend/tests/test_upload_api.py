@@ -5,6 +5,7 @@ from app.core.config import settings
 
 
 UPLOAD_ENDPOINTS = ("/upload/profile-picture", "/upload/service-image")
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
 
 
 def _saved_path_from_url(tmp_path, url: str):
@@ -117,7 +118,7 @@ class TestUploadAPI:
         response = test_client.post(
             "/upload/service-image",
             headers=auth_headers,
-            files={"file": (original_name, b"safe", "image/png")},
+            files={"file": (original_name, PNG_HEADER + b"safe", "image/png")},
         )
 
         assert response.status_code == status.HTTP_200_OK
@@ -129,3 +130,37 @@ class TestUploadAPI:
         assert "/" not in filename
         assert "//" not in url
 
+
+    def test_type_is_sniffed_not_taken_from_content_type(self, test_client, auth_headers, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+
+        spoofed = test_client.post(
+            "/upload/service-image",
+            headers=auth_headers,
+            files={"file": ("script.png", b"<?php echo 1; ?>", "image/png")},
+        )
+        undeclared = test_client.post(
+            "/upload/service-image",
+            headers=auth_headers,
+            files={"file": ("photo", PNG_HEADER + b"pixels", "application/octet-stream")},
+        )
+
+        assert spoofed.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Invalid file type" in spoofed.json()["detail"]
+        assert undeclared.status_code == status.HTTP_200_OK
+        assert undeclared.json()["url"].endswith(".png")
+
+    def test_streamed_upload_leaves_no_partial_files(self, test_client, auth_headers, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+        monkeypatch.setattr(settings, "max_upload_size_mb", 0.1)
+        payload = PNG_HEADER + b"x" * 80_000
+
+        ok = test_client.post("/upload/service-image", headers=auth_headers, files={"file": ("a.png", payload, "image/png")})
+        too_large = test_client.post(
+            "/upload/service-image", headers=auth_headers, files={"file": ("b.png", payload * 2, "image/png")}
+        )
+
+        assert ok.status_code == status.HTTP_200_OK
+        assert too_large.status_code == status.HTTP_400_BAD_REQUEST
+        assert [p.name for p in (tmp_path / "services").iterdir()] == [ok.json()["url"].split("/")[-1]]
+        assert _saved_path_from_url(tmp_path, ok.json()["url"]).read_bytes() == payload
@@ -79,6 +79,15 @@ class TestUserServiceGetters:
         svc = UserService(mock_db)
         assert await svc.get_user_by_username("ghost") is None
 
+    @pytest.mark.asyncio
+    async def test_get_user_docs_by_ids_reads_summary_fields_only(self, mock_db):
+        user = await _make_user(mock_db)
+        svc = UserService(mock_db)
+        docs = await svc.get_user_docs_by_ids([str(user.id), str(ObjectId()), "not-an-objectid"])
+
+        assert list(docs) == [str(user.id)]
+        assert set(docs[str(user.id)]) == {"_id", "username", "full_name", "profile_picture"}
+
 
 class TestUserServiceUpdate:
 
@@ -60,8 +60,7 @@ export function ForumEventDetail() {
   const [attendees, setAttendees] = useState<Attendee[]>([]);
   const [attendToggling, setAttendToggling] = useState(false);
 
-  const isAttending =
-    event?.attendee_ids?.includes(currentUserId || "") ?? false;
+  const isAttending = event?.is_attending ?? false;
 
   useEffect(() => {
     if (!id) return;
@@ -71,7 +70,7 @@ export function ForumEventDetail() {
         const [eRes, cRes, aRes] = await Promise.all([
           forumApi.getEvent(id),
           forumApi.getComments("event", id),
-          forumApi.getEventAttendees(id),
+          forumApi.getEventAttendees(id, 1, 10),
         ]);
         setEvent(eRes.data);
         setComments(cRes.data.comments);
@@ -95,7 +94,7 @@ export function ForumEventDetail() {
         const res = await forumApi.attendEvent(id);
         setEvent(res.data);
       }
-      const aRes = await forumApi.getEventAttendees(id);
+      const aRes = await forumApi.getEventAttendees(id, 1, 10);
       setAttendees(aRes.data);
     } catch (e) {
       console.error(e);
@@ -258,7 +257,7 @@ export function ForumEventDetail() {
 
           {attendees.length > 0 ? (
             <Flex align="center" gap="2" wrap="wrap">
-              {attendees.slice(0, 10).map((a) => (
+              {attendees.map((a) => (
                 <Tooltip key={a._id} content={a.full_name || a.username}>
                   <Avatar
                     fallback={a.full_name?.[0] || a.username[0]}
@@ -268,11 +267,11 @@ export function ForumEventDetail() {
                   />
                 </Tooltip>
               ))}
-              {attendees.length > 10 && (
-                <Tooltip content={`${attendees.length - 10} more attendees`}>
+              {event.attendee_count > attendees.length && (
+                <Tooltip content={`${event.attendee_count - attendees.length} more attendees`}>
                   <Avatar
                     size="3"
-                    fallback={`+${attendees.length - 10}`}
+                    fallback={`+${event.attendee_count - attendees.length}`}
                     className="cursor-pointer hover:ring-2 hover:ring-purple-500 transition-all bg-gray-100"
                   />
                 </Tooltip>
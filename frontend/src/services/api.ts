@@ -366,8 +366,8 @@ export const forumApi = {
   unattendEvent: (eventId: string): Promise<AxiosResponse<ForumEvent>> =>
     api.delete(`/forum/events/${eventId}/attend`),
 
-  getEventAttendees: (eventId: string): Promise<AxiosResponse<{ _id: string; username: string; full_name?: string; profile_picture?: string }[]>> =>
-    api.get(`/forum/events/${eventId}/attendees`),
+  getEventAttendees: (eventId: string, page = 1, limit = 50): Promise<AxiosResponse<{ _id: string; username: string; full_name?: string; profile_picture?: string }[]>> =>
+    api.get(`/forum/events/${eventId}/attendees`, { params: { page, limit } }),
 
   // Comments
   getComments: (targetType: string, targetId: string, params?: { page?: number; limit?: number }): Promise<AxiosResponse<ForumCommentListResponse>> =>
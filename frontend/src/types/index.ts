@@ -61,6 +61,24 @@ export interface RatingForm {
   tags?: string[];
 }
 
+export interface ImageVariant {
+  webp: string;
+  fallback: string;
+  width: number;
+  height: number;
+}
+
+// Resized copies of an uploaded image (see backend image_service)
+export interface ImageVariants {
+  url: string;
+  width: number;
+  height: number;
+  placeholder: string;
+  thumb: ImageVariant;
+  card: ImageVariant;
+  full: ImageVariant;
+}
+
 export interface User {
   _id: string;
   username: string;
@@ -69,6 +87,7 @@ export interface User {
   bio?: string;
   location?: string;
   profile_picture?: string;
+  profile_picture_variants?: ImageVariants | null;
   social_links?: SocialLinks;
   interests?: string[];
   is_active: boolean;
@@ -148,6 +167,7 @@ export interface Service {
   open_availability?: string;
   is_remote?: boolean;
   image_urls?: string[];
+  image_variants?: (ImageVariants | null)[];
 }
 
 export interface TimeBankTransaction {
@@ -419,6 +439,7 @@ export interface Message {
   content: string;
   message_type: 'text' | 'image' | 'file' | 'system';
   reply_to_message_id?: string;
+  seq?: number;
   is_edited: boolean;
   is_deleted: boolean;
   created_at: string;
@@ -485,6 +506,7 @@ export interface ForumAuthor {
   username: string;
   full_name?: string;
   profile_picture?: string;
+  profile_picture_variants?: ImageVariants | null;
 }
 
 export interface ForumDiscussion {
@@ -533,8 +555,8 @@ export interface ForumEvent {
     service_type: string;
   };
   comment_count: number;
-  attendee_ids: string[];
   attendee_count: number;
+  is_attending?: boolean | null;
 }
 
 export interface ForumEventListResponse {